@@ -1,4 +1,5 @@
 import argparse
+import time
 import threading
 import os
 import json
@@ -7,15 +8,21 @@ from typing import Optional
 from logger import Logger
 from hive_node import HiveNode
 from message_queue import MessageQueue
+from durable_message_queue import DurableMessageQueue
 from hive_node_manager import HiveNodeManager
 from hive_receiver_service import HiveReceiverService
 from hive_sender_client import HiveSenderClient
 from monitor_service import ServiceMonitor
+from config_store import ConfigStore
+from results_store import ResultsStore
+from check_executor import CheckExecutor
+from async_check_executor import AsyncCheckExecutor
 from cli_command_processor import CliCommandProcessor
 from inbound_queue_command_processor import InboundQueueCommandProcessor
 from gossip_protocol_command_manager import GossipProtocolCommandManager
 from heartbeat_protocol_command_manager import HeartbeatProtocolCommandManager
 from config_protocol_command_manager import ConfigProtocolCommandManager
+from swim_protocol_command_manager import SwimProtocolCommandManager
 from app_settings import AppSettings
 
 
@@ -57,6 +64,11 @@ class AppMain:
         parser.add_argument('-ip', type=str, default=AppSettings.DEFAULT_IP_ADDRESS, help='IP address to bind the server')
         parser.add_argument('-port', type=int, default=AppSettings.DEFAULT_PORT_NUMBER, help='Port to bind the server')
         parser.add_argument('-friendly_name', type=str, default=AppSettings.DEFAULT_FRIENDLY_NAME, help='Friendly name for the local node')
+        parser.add_argument('-receiver_mode', type=str, choices=['threaded', 'asyncio'], default=AppSettings.RECEIVER_MODE, help='How the receiver serves incoming connections')
+        parser.add_argument('-membership_protocol', type=str, choices=['gossip', 'swim'], default=AppSettings.MEMBERSHIP_PROTOCOL, help='Protocol used to track cluster membership')
+        parser.add_argument('-config_sync', type=str, choices=['digest', 'merkle'], default=AppSettings.CONFIG_SYNC_MODE, help='How config replicas find their differences')
+        parser.add_argument('-check_mode', type=str, choices=['threaded', 'asyncio'], default=AppSettings.CHECK_MODE, help='How service checks run')
+        parser.add_argument('-durable_outbound_queue', action='store_true', help='Keep undelivered outbound messages in a write-ahead log across restarts')
         args = parser.parse_args()
 
         # Set the log file name based on the friendly_name
@@ -66,10 +78,18 @@ class AppMain:
         self.logger.debug("AppMain", f"Arguments: {args}")
 
         local_node: HiveNode = HiveNode(args.friendly_name, args.ip, args.port, is_local_node=True)
+        # Start each run from a new incarnation, so its gossip supersedes what is known about the previous run
+        local_node.incarnation = int(time.time())
         self.configuration[args.friendly_name] = []
         # Hive Node Manager
         self.hive_node_manager = HiveNodeManager(local_node)
 
+        # Durable outbound queue, replaying the messages left undelivered by the previous run
+        if args.durable_outbound_queue:
+            wal_directory = f"{args.friendly_name.replace(' ', '_')}.outbound.wal"
+            self.outbound_message_queue = DurableMessageQueue("Outbound", wal_directory)
+            self.outbound_message_queue.replay(self.hive_node_manager)
+
         # Set the config file name based on the friendly_name
         config_file_name = f"{args.friendly_name.replace(' ', '_')}.json"
         lock_path = f"{config_file_name}.lock"
@@ -78,13 +98,21 @@ class AppMain:
             with open(config_file_name, 'r') as file:
                 self.configuration = json.load(file)
 
-        # Service Monitor Thread
-        service_monitor = ServiceMonitor(args.friendly_name, self.configuration, lock)
+        # Config Store Thread, the only writer of the config file
+        config_store = ConfigStore(config_file_name, self.configuration, args.friendly_name, lock)
+        config_store_thread = threading.Thread(target=config_store.run, daemon=True)
+        config_store_thread.start()
+
+        # Service Monitor Thread, running the checks on a thread pool or on an event loop
+        check_executor = AsyncCheckExecutor() if args.check_mode == 'asyncio' else CheckExecutor()
+        # Check results are kept apart from the replicated config
+        results_store = ResultsStore(f"{args.friendly_name.replace(' ', '_')}.results")
+        service_monitor = ServiceMonitor(args.friendly_name, self.configuration, lock, config_store, check_executor, results_store)
         service_monitor_thread = threading.Thread(target=service_monitor.monitor_loop, daemon=True)
         service_monitor_thread.start()
 
         # Hive service server thread
-        hive_service = HiveReceiverService(local_node.friendly_name, local_node.ip_address, local_node.port_number, self.hive_node_manager, self.inbound_message_queue, self.outbound_message_queue, service_monitor, lock)
+        hive_service = HiveReceiverService(local_node.friendly_name, local_node.ip_address, local_node.port_number, self.hive_node_manager, self.inbound_message_queue, self.outbound_message_queue, service_monitor, lock, args.receiver_mode)
         hive_service_thread = threading.Thread(target=hive_service.run, daemon=True)
         hive_service_thread.start()
 
@@ -93,31 +121,50 @@ class AppMain:
         hive_client_thread = threading.Thread(target=hive_client.run, daemon=True)
         hive_client_thread.start()
 
-        # Queue Command Processor
-        inbound_queue_command_processor = InboundQueueCommandProcessor(self.hive_node_manager, self.outbound_message_queue, self.inbound_message_queue)
-        inbound_queue_command_processor_thread = threading.Thread(target=inbound_queue_command_processor.run, daemon=True)
-        inbound_queue_command_processor_thread.start()
+        # SWIM Protocol Command Manager, replacing the gossip and heartbeat protocols
+        swim_protocol_command_manager: Optional[SwimProtocolCommandManager] = None
+        if args.membership_protocol == 'swim':
+            swim_protocol_command_manager = SwimProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue)
+            # Failed sends make a member suspect instead of marking it dead, the suspicion timeout decides
+            hive_client.on_failed_connection = swim_protocol_command_manager.report_failed_connection
+            swim_protocol_command_manager_thread = threading.Thread(target=swim_protocol_command_manager.run, daemon=True)
+            swim_protocol_command_manager_thread.start()
 
         # Gossip Protocol Command Manager
-        gossip_protocol_command_manager = GossipProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue)
-        gossip_protocol_command_manager_thread = threading.Thread(target=gossip_protocol_command_manager.run, daemon=True)
-        gossip_protocol_command_manager_thread.start()
-
-        # Heartbeat Protocol Command Manager
-        heartbeat_protocol_command_manager = HeartbeatProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue)
-        heartbeat_protocol_command_manager_thread = threading.Thread(target=heartbeat_protocol_command_manager.run, daemon=True)
-        heartbeat_protocol_command_manager_thread.start()
+        gossip_protocol_command_manager: Optional[GossipProtocolCommandManager] = None
+        if args.membership_protocol == 'gossip':
+            gossip_protocol_command_manager = GossipProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue)
+            gossip_protocol_command_manager_thread = threading.Thread(target=gossip_protocol_command_manager.run, daemon=True)
+            gossip_protocol_command_manager_thread.start()
 
         # Config Protocol Command Manager
-        config_protocol_command_manager = ConfigProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue, service_monitor)
+        config_protocol_command_manager = ConfigProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue, service_monitor, args.config_sync)
         config_protocol_command_manager_thread = threading.Thread(target=config_protocol_command_manager.run, daemon=True)
         config_protocol_command_manager_thread.start()
 
+        # Queue Command Processor
+        inbound_queue_command_processor = InboundQueueCommandProcessor(self.hive_node_manager, self.outbound_message_queue, self.inbound_message_queue,
+                                                                       swim_protocol_command_manager, gossip_protocol_command_manager,
+                                                                       config_protocol_command_manager)
+        inbound_queue_command_processor_thread = threading.Thread(target=inbound_queue_command_processor.run, daemon=True)
+        inbound_queue_command_processor_thread.start()
+
+        if args.membership_protocol == 'gossip':
+
+            # Heartbeat Protocol Command Manager
+            heartbeat_protocol_command_manager = HeartbeatProtocolCommandManager(self.hive_node_manager, self.outbound_message_queue)
+            heartbeat_protocol_command_manager_thread = threading.Thread(target=heartbeat_protocol_command_manager.run, daemon=True)
+            heartbeat_protocol_command_manager_thread.start()
+
         # CLI Command Processor
         self.cli_command_processor = CliCommandProcessor(self.hive_node_manager, self.outbound_message_queue, self.inbound_message_queue)
         self.cli_command_processor.set_prompt(f"{local_node.friendly_name}> ")
         self.cli_command_processor.command_loop()
 
+        # Write the config changes and check results of the last flush interval before exiting
+        config_store.flush()
+        results_store.close()
+
 
 if __name__ == "__main__":
     app = AppMain()
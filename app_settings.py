@@ -1,3 +1,6 @@
+from typing import Dict, Tuple
+
+
 class AppSettings:
     """
     AppSettings holds the configuration settings for the Hive network application.
@@ -11,13 +14,127 @@ class AppSettings:
     DEFAULT_FRIENDLY_NAME : str
         The default friendly name for the local node.
     GOSSIP_PROTOCOL_FREQUENCY_IN_SECONDS : int
-        The frequency in seconds at which the gossip protocol runs.
+        The number of seconds between gossip rounds while membership is stable.
+    GOSSIP_MIN_INTERVAL_IN_SECONDS : float
+        The number of seconds between gossip rounds while membership is changing.
+    GOSSIP_FANOUT : int
+        The number of random peers the gossip protocol exchanges digests with per round.
     HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS : int
         The frequency in seconds at which the heartbeat protocol runs.
-    QUEUE_SEND_SLEEP_IN_SECONDS : int
-        The sleep duration in seconds between message send attempts.
+    CONFIG_SYNC_MODE : str
+        How config replicas find their differences, 'digest' (section versions) or 'merkle' (Merkle tree hashes).
+    CONFIG_MERKLE_DEPTH : int
+        The number of hex digits naming a leaf bucket of the config Merkle tree, which has 16^depth buckets.
+    CONFIG_FLUSH_INTERVAL_IN_SECONDS : float
+        The minimum time between two writes of the config file, changes made in between are written together.
+    CONFIG_COMPRESSION_THRESHOLD_IN_BYTES : int
+        The JSON size of the sections of a config message above which they are sent zlib compressed.
+    CONFIG_COMPRESSION_LEVEL : int
+        The zlib compression level of config message payloads.
+    CHECK_MODE : str
+        How service checks run, 'threaded' (a bounded thread pool) or 'asyncio' (tasks on one event loop).
+    CHECK_MAX_WORKERS : int
+        The number of worker threads running service checks.
+    CHECK_TYPE_CONCURRENCY : Dict[str, int]
+        The maximum number of checks of each type running at once.
+    CHECK_TIMEOUT_IN_SECONDS : float
+        The deadline of a service check of a type without its own deadline.
+    CHECK_TYPE_TIMEOUTS_IN_SECONDS : Dict[str, float]
+        The deadline of each type of service check.
+    ASYNC_CHECK_TYPE_CONCURRENCY : Dict[str, int]
+        The maximum number of checks of each type running at once in 'asyncio' mode. Bounded by the open file limit, and
+        by how many checks the event loop can run before their deadlines; TLS handshakes cost the most.
+    ASYNC_CHECK_DEFAULT_TYPE_CONCURRENCY : int
+        The maximum number of checks of a type not listed in ASYNC_CHECK_TYPE_CONCURRENCY running at once.
+    CHECK_STATS_WINDOW_SIZE : int
+        The number of most recent checks whose schedule lateness is kept for the statistics.
+    CHECK_STATS_INTERVAL_IN_SECONDS : float
+        How often the service monitor logs the check rate and schedule lateness.
+    MONITOR_CONFIG_POLL_INTERVAL_IN_SECONDS : float
+        How often the idle service monitor looks for services added to the config file by hand.
+    RESULTS_COMMIT_INTERVAL_IN_SECONDS : float
+        How long check results are collected before the results store writes them together.
+    RESULTS_RESPONSE_MAX_LENGTH : int
+        The maximum number of characters of a check response kept in the results store.
+    QUEUE_WAIT_TIMEOUT_IN_SECONDS : float
+        How long queue consumers block waiting for a message before doing their periodic housekeeping.
+    QUEUE_BATCH_SIZE : int
+        The maximum number of messages a consumer takes from a queue at once.
+    MESSAGE_PRIORITY_LANES : Dict[str, int]
+        The message queue priority lanes in priority order, with the number of messages each may dequeue per round.
+    MESSAGE_PRIORITY_COMMAND_LANES : Dict[str, str]
+        The priority lane of each command, commands not listed use the lowest priority lane.
+    COALESCED_COMMANDS : Tuple[str, ...]
+        The commands whose queued message is replaced by a newer one for the same sender and recipient.
     MAX_SEND_ATTEMPTS : int
         The maximum number of attempts to send a message.
+    SEND_RETRY_BACKOFF_IN_SECONDS : float
+        The delay before a message that failed to send is retried the first time, doubled after every further failure.
+        A peer's failed connection count grows by at most one per such delay, however many messages to it fail.
+    SEND_RETRY_MAX_BACKOFF_IN_SECONDS : float
+        The longest delay before a message that failed to send is retried.
+    PHI_SUSPICION_THRESHOLD : float
+        The phi accrual suspicion level at which a node is no longer picked as a gossip or config peer. Suspect
+        nodes are still sent heartbeats.
+    PHI_WINDOW_SIZE : int
+        The number of recent heartbeat inter-arrival times the failure detector keeps per node.
+    PHI_MIN_STD_DEVIATION_IN_SECONDS : float
+        The smallest standard deviation of heartbeat inter-arrival times the failure detector uses.
+    PHI_MIN_STD_DEVIATION_RATIO : float
+        The smallest standard deviation the failure detector uses, as a fraction of the mean inter-arrival time,
+        so the delays of the network and the outbound queue do not make a node suspect after a single late heartbeat.
+    PHI_ACCEPTABLE_HEARTBEAT_PAUSE_IN_SECONDS : float
+        How late a heartbeat may be before it adds to the suspicion of its node.
+    MEMBERSHIP_PROTOCOL : str
+        Either 'gossip' for the heartbeat and gossip protocols, or 'swim' for the SWIM membership protocol.
+    SWIM_PROTOCOL_PERIOD_IN_SECONDS : float
+        The SWIM protocol period, in which one member is probed.
+    SWIM_TICK_IN_SECONDS : float
+        How often the SWIM protocol checks its probe and suspicion deadlines.
+    SWIM_PING_TIMEOUT_IN_SECONDS : float
+        How long a SWIM ping waits for its ack before members are asked to probe indirectly.
+    SWIM_INDIRECT_PROBE_COUNT : int
+        The number of members asked to probe a member that did not answer a ping.
+    SWIM_SUSPICION_MULTIPLIER : int
+        Scales the time a suspect member has to refute the suspicion, in protocol periods times log10 of the cluster size.
+    SWIM_DISSEMINATION_MULTIPLIER : int
+        Scales the number of times a membership update is piggybacked, times log10 of the cluster size.
+    SWIM_MAX_PIGGYBACKED_UPDATES : int
+        The maximum number of membership updates piggybacked on one SWIM message.
+    MAX_FRAME_SIZE_IN_BYTES : int
+        The largest message payload accepted on the wire.
+    SOCKET_RECEIVE_SIZE_IN_BYTES : int
+        The number of bytes requested per socket recv call.
+    RECEIVER_MODE : str
+        How the receiver serves connections, 'threaded' (one thread per connection) or 'asyncio' (one event loop).
+    RECEIVER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS : int
+        How long the receiver keeps a connection open without receiving a message.
+    SENDER_MAX_IDLE_CONNECTIONS_PER_PEER : int
+        The maximum number of idle pooled connections kept open to a single peer.
+    SENDER_MAX_IDLE_CONNECTIONS : int
+        The maximum number of idle pooled connections kept open across all peers.
+    SENDER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS : int
+        How long an idle pooled connection is kept before it is closed.
+    SENDER_MAX_WORKERS : int
+        The maximum number of worker threads sending to destinations concurrently.
+    SENDER_LANE_BATCH_SIZE : int
+        The number of messages a worker sends from one destination lane before yielding to other lanes.
+    SENDER_MAX_MESSAGES_PER_LANE : int
+        The maximum number of messages waiting for a single destination, new messages are dropped beyond it.
+    SENDER_CONNECT_TIMEOUT_IN_SECONDS : float
+        How long to wait for a connection to a peer to be established.
+    SENDER_SEND_TIMEOUT_IN_SECONDS : float
+        How long to wait for a message to be written to a peer.
+    SENDER_ACK_TIMEOUT_IN_SECONDS : float
+        How long to wait for a peer to acknowledge a message.
+    WAL_SEGMENT_SIZE_IN_BYTES : int
+        The size after which a write-ahead log segment is sealed and a new one started.
+    WAL_GROUP_COMMIT_INTERVAL_IN_SECONDS : float
+        How long write-ahead log appends are collected before they are written with a single fsync.
+    WAL_COMPACTION_INTERVAL_IN_SECONDS : int
+        The minimum time between write-ahead log compactions.
+    WAL_SYNC_COMMIT : bool
+        Whether enqueueing on a durable queue waits until the message has been fsync'd.
     TIMESTAMP_FORMAT : str
         The format for timestamps in logs.
     LOG_LINE_WIDTH : int
@@ -28,10 +145,106 @@ class AppSettings:
     DEFAULT_PORT_NUMBER: int = 54321
     DEFAULT_FRIENDLY_NAME: str = 'Local Node'
 
-    GOSSIP_PROTOCOL_FREQUENCY_IN_SECONDS: int = 10
+    GOSSIP_PROTOCOL_FREQUENCY_IN_SECONDS: int = 20
+    GOSSIP_MIN_INTERVAL_IN_SECONDS: float = 1.0
+    GOSSIP_FANOUT: int = 2
     HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS: int = 10
-    QUEUE_SEND_SLEEP_IN_SECONDS: int = 5
+    CONFIG_SYNC_MODE: str = 'digest'
+    CONFIG_MERKLE_DEPTH: int = 3
+    CONFIG_FLUSH_INTERVAL_IN_SECONDS: float = 1.0
+    CONFIG_COMPRESSION_THRESHOLD_IN_BYTES: int = 4096
+    CONFIG_COMPRESSION_LEVEL: int = 6
+
+    CHECK_MODE: str = 'threaded'
+    CHECK_MAX_WORKERS: int = 64
+    CHECK_TYPE_CONCURRENCY: Dict[str, int] = {
+        'HTTP': 32,
+        'HTTPS': 32,
+        'DNS': 16,
+        'NTP': 8,
+        'TCP': 64,
+        'UDP': 32,
+    }
+    CHECK_TIMEOUT_IN_SECONDS: float = 5.0
+    CHECK_TYPE_TIMEOUTS_IN_SECONDS: Dict[str, float] = {
+        'TCP': 3.0,
+        'UDP': 3.0,
+    }
+    ASYNC_CHECK_TYPE_CONCURRENCY: Dict[str, int] = {
+        'HTTP': 2000,
+        'HTTPS': 500,
+        'DNS': 2000,
+        'NTP': 1000,
+        'TCP': 4000,
+        'UDP': 4000,
+    }
+    ASYNC_CHECK_DEFAULT_TYPE_CONCURRENCY: int = 500
+    CHECK_STATS_WINDOW_SIZE: int = 10000
+    CHECK_STATS_INTERVAL_IN_SECONDS: float = 60.0
+    MONITOR_CONFIG_POLL_INTERVAL_IN_SECONDS: float = 1.0
+    RESULTS_COMMIT_INTERVAL_IN_SECONDS: float = 1.0
+    RESULTS_RESPONSE_MAX_LENGTH: int = 512
+    QUEUE_WAIT_TIMEOUT_IN_SECONDS: float = 1.0
+    QUEUE_BATCH_SIZE: int = 64
+    MESSAGE_PRIORITY_LANES: Dict[str, int] = {
+        'connect': 8,
+        'heartbeat': 4,
+        'gossip': 2,
+        'config': 1,
+    }
+    MESSAGE_PRIORITY_COMMAND_LANES: Dict[str, str] = {
+        'connect': 'connect',
+        'heartbeat': 'heartbeat',
+        'ping': 'heartbeat',
+        'ping_req': 'heartbeat',
+        'ping_ack': 'heartbeat',
+        'gossip': 'gossip',
+        'gossip_digest': 'gossip',
+        'gossip_delta': 'gossip',
+        'config': 'config',
+        'config_digest': 'config',
+        'config_request': 'config',
+        'config_tree': 'config',
+        'config_leaves': 'config',
+    }
+    COALESCED_COMMANDS: Tuple[str, ...] = ('gossip', 'gossip_digest', 'config_digest')
     MAX_SEND_ATTEMPTS: int = 3
+    SEND_RETRY_BACKOFF_IN_SECONDS: float = 1.0
+    SEND_RETRY_MAX_BACKOFF_IN_SECONDS: float = 30.0
+    PHI_SUSPICION_THRESHOLD: float = 8.0
+    PHI_WINDOW_SIZE: int = 100
+    PHI_MIN_STD_DEVIATION_IN_SECONDS: float = 0.5
+    PHI_MIN_STD_DEVIATION_RATIO: float = 0.25
+    PHI_ACCEPTABLE_HEARTBEAT_PAUSE_IN_SECONDS: float = 0.0
+
+    MEMBERSHIP_PROTOCOL: str = 'gossip'
+    SWIM_PROTOCOL_PERIOD_IN_SECONDS: float = 1.0
+    SWIM_TICK_IN_SECONDS: float = 0.1
+    SWIM_PING_TIMEOUT_IN_SECONDS: float = 0.5
+    SWIM_INDIRECT_PROBE_COUNT: int = 3
+    SWIM_SUSPICION_MULTIPLIER: int = 4
+    SWIM_DISSEMINATION_MULTIPLIER: int = 3
+    SWIM_MAX_PIGGYBACKED_UPDATES: int = 6
+
+    MAX_FRAME_SIZE_IN_BYTES: int = 16 * 1024 * 1024
+    SOCKET_RECEIVE_SIZE_IN_BYTES: int = 64 * 1024
+    RECEIVER_MODE: str = 'threaded'
+    RECEIVER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS: int = 60
+
+    SENDER_MAX_IDLE_CONNECTIONS_PER_PEER: int = 2
+    SENDER_MAX_IDLE_CONNECTIONS: int = 128
+    SENDER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS: int = 30
+    SENDER_MAX_WORKERS: int = 16
+    SENDER_LANE_BATCH_SIZE: int = 8
+    SENDER_MAX_MESSAGES_PER_LANE: int = 100
+    SENDER_CONNECT_TIMEOUT_IN_SECONDS: float = 2.0
+    SENDER_SEND_TIMEOUT_IN_SECONDS: float = 5.0
+    SENDER_ACK_TIMEOUT_IN_SECONDS: float = 5.0
+
+    WAL_SEGMENT_SIZE_IN_BYTES: int = 4 * 1024 * 1024
+    WAL_GROUP_COMMIT_INTERVAL_IN_SECONDS: float = 0.01
+    WAL_COMPACTION_INTERVAL_IN_SECONDS: int = 60
+    WAL_SYNC_COMMIT: bool = True
 
     TIMESTAMP_FORMAT: str = '%Y-%m-%d %H:%M:%S'
     LOG_LINE_WIDTH: int = 120
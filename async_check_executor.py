@@ -0,0 +1,109 @@
+import time
+import asyncio
+import functools
+import threading
+from app_settings import AppSettings
+from check_executor import CheckExecutor
+from check_registry import ASYNC_CHECKS
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+class AsyncCheckExecutor(CheckExecutor):
+    """
+    AsyncCheckExecutor is a CheckExecutor that runs the asyncio variants of the service checks as tasks on one event
+    loop, on its own thread, instead of tying up a worker thread per check, so tens of thousands of probes can be in
+    flight at once. Submitting, per-type limits, results and statistics work as in CheckExecutor. A check still
+    running a second past its deadline is cancelled. Checks without an asyncio variant run on the loop's default
+    thread pool.
+
+    Attributes:
+    ----------
+    loop : asyncio.AbstractEventLoop
+        The event loop running the checks.
+    loop_thread : threading.Thread
+        The thread running the event loop.
+    tasks : Set[asyncio.Task]
+        The running check tasks, referenced so they are not garbage collected while they run.
+    """
+
+    def __init__(self, type_limits: Optional[Dict[str, int]] = None,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 timeout: float = AppSettings.CHECK_TIMEOUT_IN_SECONDS):
+        """
+        Initializes a new instance of AsyncCheckExecutor and starts its event loop thread.
+
+        Parameters:
+        ----------
+        type_limits : Optional[Dict[str, int]], optional
+            The maximum number of checks of each type running at once (default is AppSettings.ASYNC_CHECK_TYPE_CONCURRENCY).
+        timeouts : Optional[Dict[str, float]], optional
+            The deadline of each type of check in seconds (default is AppSettings.CHECK_TYPE_TIMEOUTS_IN_SECONDS).
+        timeout : float, optional
+            The deadline of a check of an unlisted type in seconds (default is AppSettings.CHECK_TIMEOUT_IN_SECONDS).
+        """
+        super().__init__(AppSettings.CHECK_MAX_WORKERS, type_limits if type_limits is not None else AppSettings.ASYNC_CHECK_TYPE_CONCURRENCY,
+                         timeouts, timeout)
+        self.default_type_limit = AppSettings.ASYNC_CHECK_DEFAULT_TYPE_CONCURRENCY
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.loop_thread: threading.Thread = threading.Thread(target=self.loop.run_forever, name='AsyncCheckExecutor', daemon=True)
+        self.tasks: Set[asyncio.Task] = set()
+        self.loop_thread.start()
+
+    def start(self, request: Tuple) -> None:
+        """
+        Starts a check that has a slot of its type as a task on the event loop.
+
+        Parameters:
+        ----------
+        request : Tuple
+            The (service_name, check_type, check, args, due_time, timeout) of the check.
+        """
+        self.loop.call_soon_threadsafe(self.create_task, request)
+
+    def create_task(self, request: Tuple) -> None:
+        """
+        Creates the task running a check. Must be called on the event loop thread.
+
+        Parameters:
+        ----------
+        request : Tuple
+            The (service_name, check_type, check, args, due_time, timeout) of the check.
+        """
+        task: asyncio.Task = self.loop.create_task(self.run_check_async(request))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run_check_async(self, request: Tuple) -> None:
+        """
+        Runs the asyncio variant of a check on the event loop. Each asyncio check bounds all of its steps by its
+        timeout itself; the check is also cancelled a second past its deadline, as a backstop for checks run on a thread.
+
+        Parameters:
+        ----------
+        request : Tuple
+            The (service_name, check_type, check, args, due_time, timeout) of the check.
+        """
+        check, args, timeout = request[2], request[3], request[5]
+        async_check = ASYNC_CHECKS.get(check)
+        started_time: float = time.time()
+        start: float = time.monotonic()
+        try:
+            if async_check is not None:
+                awaitable = async_check(*args, timeout=timeout)
+            else:
+                awaitable = self.loop.run_in_executor(None, functools.partial(check, *args, timeout=timeout))
+            response: Any = await asyncio.wait_for(awaitable, timeout + 1.0)
+        except asyncio.TimeoutError:
+            response = (False, f"Check cancelled after its {timeout}s deadline")
+        except Exception as e:
+            response = (False, f"Check failed: {e}")
+        self.complete(request, response, started_time, time.monotonic() - start)
+
+    def shutdown(self) -> None:
+        """
+        Stops the event loop, abandoning the running checks and dropping the waiting ones.
+        """
+        with self.lock:
+            self.waiting.clear()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        super().shutdown()
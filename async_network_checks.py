@@ -0,0 +1,222 @@
+# asyncio variants of the service checks in network_monitoring_examples, for running many probes on one event loop.
+# Each returns the same result tuple as its blocking counterpart and takes the same arguments; check_registry pairs them.
+# Each check runs all of its steps under one asyncio.wait_for of its timeout, so a slow step leaves less time for the next.
+
+import asyncio
+import socket
+import ssl
+import struct
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.exception
+from time import ctime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Seconds between the NTP era (1900) and the Unix epoch (1970)
+NTP_EPOCH_OFFSET: int = 2208988800
+
+
+async def exchange_datagram(host: str, port: int, payload: bytes) -> bytes:
+    """
+    Sends a datagram to a host from a connected UDP socket and returns the first datagram it answers with. The
+    socket is connected, so an ICMP 'Destination Unreachable' answer is reported as a ConnectionRefusedError.
+    Resolving the host and waiting for the answer are not bounded here, the caller's asyncio.wait_for bounds both.
+
+    Args:
+    host (str): The hostname or IP address to send to.
+    port (int): The UDP port to send to.
+    payload (bytes): The datagram to send, which may be empty.
+
+    Returns:
+    bytes: The answer. Raises the OSError reported for the destination.
+    """
+    loop = asyncio.get_running_loop()
+    address_info = await loop.getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp_socket:
+        udp_socket.setblocking(False)
+        # Connecting a UDP socket only sets its destination, it never blocks
+        udp_socket.connect(address_info[0][4])
+        # Sent from the socket, as datagram transports silently drop an empty payload
+        udp_socket.send(payload)
+        return await loop.sock_recv(udp_socket, 4096)
+
+
+async def get_http_status(url: str, headers: Optional[Dict[str, str]] = None) -> int:
+    """
+    Sends a GET request for a URL over an asyncio stream and returns the status code of the response. Connecting
+    and waiting for the status line are not bounded here, the caller's asyncio.wait_for bounds both.
+
+    Args:
+    url (str): The URL, starting with http:// or https://.
+    headers (Optional[Dict[str, str]]): Extra request headers.
+
+    Returns:
+    int: The status code. Raises OSError or ValueError if no valid response arrives.
+    """
+    parts = urlsplit(url)
+    is_https: bool = parts.scheme == 'https'
+    host: str = parts.hostname or ''
+    port: int = parts.port or (443 if is_https else 80)
+    path: str = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    ssl_context: Optional[ssl.SSLContext] = ssl.create_default_context() if is_https else None
+
+    reader, writer = await asyncio.open_connection(host, port, ssl=ssl_context)
+    try:
+        request_headers: Dict[str, str] = {'Host': parts.netloc, 'Connection': 'close', **(headers or {})}
+        request: str = f"GET {path} HTTP/1.1\r\n" + ''.join(f"{name}: {value}\r\n" for name, value in request_headers.items()) + "\r\n"
+        writer.write(request.encode('latin-1'))
+        await writer.drain()
+        status_line: bytes = await reader.readline()
+        # "HTTP/1.1 200 OK"
+        fields: List[bytes] = status_line.split(None, 2)
+        if len(fields) < 2 or not fields[0].startswith(b'HTTP/'):
+            raise ValueError(f"Invalid HTTP status line: {status_line[:64]!r}")
+        return int(fields[1])
+    finally:
+        writer.close()
+
+
+async def async_check_server_http(url: str, timeout: int = 5) -> Tuple[bool, Optional[int]]:
+    """
+    Check if an HTTP server is up by making a request to the provided URL, like check_server_http.
+
+    Args:
+    url (str): URL of the server (including http://).
+    timeout (int): Timeout for the whole request in seconds. Default is 5 seconds.
+
+    Returns:
+    Tuple[bool, Optional[int]]: True if the server is up (status code < 400) and the status code, or False and None.
+    """
+    try:
+        status_code: int = await asyncio.wait_for(get_http_status(url), timeout)
+        return status_code < 400, status_code
+    except (asyncio.TimeoutError, OSError, ValueError):
+        return False, None
+
+
+async def async_check_server_https(url: str, timeout: int = 5) -> Tuple[bool, Optional[int], str]:
+    """
+    Check if an HTTPS server is up by making a request to the provided URL, like check_server_https.
+
+    Args:
+    url (str): URL of the server (including https://).
+    timeout (int): Timeout for the whole request in seconds. Default is 5 seconds.
+
+    Returns:
+    Tuple[bool, Optional[int], str]: The server status, the status code and a descriptive message.
+    """
+    try:
+        status_code: int = await asyncio.wait_for(get_http_status(url, {'User-Agent': 'Mozilla/5.0'}), timeout)
+        return status_code < 400, status_code, "Server is up"
+    except asyncio.TimeoutError:
+        return False, None, "Timeout occurred"
+    except OSError:
+        return False, None, "Connection error"
+    except ValueError as e:
+        return False, None, f"Error during request: {e}"
+
+
+async def async_check_ntp_server(server: str, port: int = 123, timeout: int = 5) -> Tuple[bool, Optional[str]]:
+    """
+    Checks if an NTP server is up and returns its status and time, like check_ntp_server.
+
+    Args:
+    server (str): The hostname or IP address of the NTP server to check.
+    port (int): The UDP port of the NTP server. Default is 123.
+    timeout (int): The timeout in seconds for the whole request. Default is 5 seconds.
+
+    Returns:
+    Tuple[bool, Optional[str]]: True and the server time as a string if the server is up, False and None otherwise.
+    """
+    # LI 0, version 3, mode 3 (client), the rest of the 48 byte request zeroed
+    request: bytes = b'\x1b' + bytes(47)
+    try:
+        response: bytes = await asyncio.wait_for(exchange_datagram(server, port, request), timeout)
+        if len(response) < 48:
+            return False, None
+        transmit_seconds, transmit_fraction = struct.unpack('!II', response[40:48])
+        return True, ctime(transmit_seconds - NTP_EPOCH_OFFSET + transmit_fraction / 2 ** 32)
+    except (asyncio.TimeoutError, OSError):
+        return False, None
+
+
+async def async_check_dns_server_status(server, query, record_type, port: int = 53, timeout: int = 5) -> (bool, Any):
+    """
+    Check if a DNS server is up and return the DNS query results for a specified domain and record type,
+    like check_dns_server_status.
+
+    Args:
+    server: DNS server name or IP address.
+    query: Domain name to query.
+    record_type: Type of DNS record (e.g., 'A', 'AAAA', 'MX', 'CNAME').
+    port (int): The UDP port of the DNS server. Default is 53.
+    timeout (int): Time in seconds the query may take in total. Default is 5 seconds.
+
+    Returns:
+    Tuple (status, query_results): True and the records found, or False and a description of the failure.
+    """
+    try:
+        rdtype = dns.rdatatype.from_text(record_type)
+        request = dns.message.make_query(query, rdtype)
+        wire: bytes = await asyncio.wait_for(exchange_datagram(server, port, request.to_wire()), timeout)
+        response = dns.message.from_wire(wire)
+        if response.id != request.id:
+            return False, "The DNS response does not answer the query."
+        if response.rcode() != dns.rcode.NOERROR:
+            return False, f"The DNS query name does not exist or failed: {dns.rcode.to_text(response.rcode())}"
+        results: List[str] = [str(rdata) for rrset in response.answer if rrset.rdtype == rdtype for rdata in rrset]
+        if not results:
+            return False, "The DNS response does not contain an answer to the question."
+        return True, results
+    except asyncio.TimeoutError:
+        return False, f"The DNS operation timed out after {timeout} seconds."
+    except (OSError, dns.exception.DNSException) as e:
+        return False, str(e)
+
+
+async def async_check_tcp_port(ip_address: str, port: int, timeout: int = 3) -> (bool, str):
+    """
+    Checks the status of a specific TCP port on a given IP address with a non-blocking connect, like check_tcp_port.
+
+    Args:
+    ip_address (str): The IP address of the target server.
+    port (int): The TCP port number to check.
+    timeout (int): The timeout duration in seconds for the connection attempt. Default is 3 seconds.
+
+    Returns:
+    tuple: True if the port is open, False otherwise, and a description of the port status.
+    """
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip_address, port), timeout)
+        writer.close()
+        return True, f"Port {port} on {ip_address} is open."
+    except asyncio.TimeoutError:
+        return False, f"Port {port} on {ip_address} timed out."
+    except OSError:
+        return False, f"Port {port} on {ip_address} is closed or not reachable."
+
+
+async def async_check_udp_port(ip_address: str, port: int, timeout: int = 3) -> (bool, str):
+    """
+    Checks the status of a specific UDP port on a given IP address, like check_udp_port. The socket is connected, so
+    an ICMP 'Destination Unreachable' answer is reported and the port found closed; an answer means the port is open.
+
+    Args:
+    ip_address (str): The IP address of the target server.
+    port (int): The UDP port number to check.
+    timeout (int): The timeout duration in seconds for resolving the address and the answer. Default is 3 seconds.
+
+    Returns:
+    tuple: False if the port is definitely closed, True otherwise, and a description of the port status.
+    """
+    try:
+        await asyncio.wait_for(exchange_datagram(ip_address, port, b''), timeout)
+        return True, f"Port {port} on {ip_address} is open."
+    except asyncio.TimeoutError:
+        return True, f"Port {port} on {ip_address} is open or no response received."
+    except ConnectionRefusedError:
+        return False, f"Port {port} on {ip_address} is closed."
+    except OSError as e:
+        return False, f"Failed to check UDP port {port} on {ip_address} due to an error: {e}"
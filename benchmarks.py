@@ -0,0 +1,1553 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from logger import Logger
+from hive_node import HiveNode
+from hive_node_manager import HiveNodeManager
+from message_queue import MessageQueue
+from heartbeat_message import HeartbeatMessage
+from message_framing import MessageFraming, FrameDecoder
+from app_settings import AppSettings
+
+
+def get_rss_in_kb() -> int:
+    """
+    Returns the resident set size of the current process in KB, read from /proc on Linux.
+    """
+    try:
+        with open('/proc/self/status', 'r') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def quiet_logger() -> None:
+    """
+    Raises the log level of the networking components so logging does not dominate the measurements.
+    """
+    logger = Logger()
+    for source in list(Logger.class_list):
+        logger.set_log_level(source, Logger.LogLevel.WARNING)
+
+
+def run_receiver_server(args: argparse.Namespace) -> None:
+    """
+    Child process side of the receiver benchmark: serves heartbeats in the requested receiver mode,
+    drains the inbound queue and reports peak RSS and thread count when asked on stdin.
+    """
+    from hive_receiver_service import HiveReceiverService
+
+    quiet_logger()
+    local_node = HiveNode('bench', '127.0.0.1', args.port, is_local_node=True)
+    inbound_message_queue = MessageQueue('Inbound')
+    service = HiveReceiverService('bench', '127.0.0.1', args.port, HiveNodeManager(local_node), inbound_message_queue, MessageQueue('Outbound'), None, None, args.mode)
+    threading.Thread(target=service.run, daemon=True).start()
+
+    peak = {'rss': get_rss_in_kb(), 'threads': threading.active_count()}
+
+    def sample() -> None:
+        while True:
+            inbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE)
+            peak['rss'] = max(peak['rss'], get_rss_in_kb())
+            peak['threads'] = max(peak['threads'], threading.active_count())
+            time.sleep(0.01)
+
+    threading.Thread(target=sample, daemon=True).start()
+    baseline_rss = get_rss_in_kb()
+    print('ready', flush=True)
+    sys.stdin.readline()
+    print(f"{baseline_rss} {peak['rss']} {peak['threads']}", flush=True)
+
+
+def benchmark_receiver(args: argparse.Namespace) -> None:
+    """
+    Compares connections/sec and RSS of the threaded and asyncio receiver modes. Each mode runs in its own
+    child process while this process opens short-lived connections that each send one heartbeat.
+    """
+    sender = HiveNode('client', '127.0.0.1', 1)
+    for index, mode in enumerate(['threaded', 'asyncio']):
+        port = args.port + index
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'receiver_server', '-mode', mode, '-port', str(port)],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()
+        frame = MessageFraming.encode_frame(HeartbeatMessage(sender, HiveNode('bench', '127.0.0.1', port)).to_json().encode())
+
+        def connect_and_send(_: int) -> None:
+            with socket.create_connection(('127.0.0.1', port)) as client_socket:
+                client_socket.sendall(frame)
+                FrameDecoder().read_frame(client_socket)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(connect_and_send, range(args.connections)))
+        elapsed = time.perf_counter() - start
+
+        server.stdin.write('stats\n')
+        server.stdin.flush()
+        baseline_rss, peak_rss, peak_threads = (int(value) for value in server.stdout.readline().split())
+        server.kill()
+        server.wait()
+
+        print(f"{mode:<9} {args.connections / elapsed:>10.0f} conn/s  baseline RSS {baseline_rss:>7} KB  "
+              f"peak RSS {peak_rss:>7} KB  peak threads {peak_threads}")
+
+
+def benchmark_blackhole(args: argparse.Namespace) -> None:
+    """
+    Sends a heartbeat to every peer each interval while one stand-in peer is black-holed (it accepts connections
+    but never reads or acknowledges), and reports whether the healthy peers still receive heartbeats on schedule.
+    """
+    from hive_receiver_service import HiveReceiverService
+    from hive_sender_client import HiveSenderClient
+    from hive_message import HiveMessage
+
+    quiet_logger()
+    AppSettings.SENDER_ACK_TIMEOUT_IN_SECONDS = 2.0
+    interval = 0.5
+
+    black_hole = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    black_hole.bind(('127.0.0.1', args.port))
+    black_hole.listen()
+    accepted = []
+
+    def accept_and_ignore() -> None:
+        while True:
+            accepted.append(black_hole.accept())
+
+    threading.Thread(target=accept_and_ignore, daemon=True).start()
+
+    peers = [HiveNode('black_hole', '127.0.0.1', args.port)]
+    arrivals: Dict[str, list] = {}
+    for index in range(1, args.peers + 1):
+        peer = HiveNode(f"peer{index}", '127.0.0.1', args.port + index, is_local_node=True)
+        inbound_message_queue = MessageQueue(peer.friendly_name)
+        service = HiveReceiverService(peer.friendly_name, peer.ip_address, peer.port_number, HiveNodeManager(peer), inbound_message_queue, MessageQueue('Outbound'), None, None)
+        threading.Thread(target=service.run, daemon=True).start()
+        arrivals[peer.friendly_name] = []
+
+        def record(name: str = peer.friendly_name, queue: MessageQueue = inbound_message_queue) -> None:
+            while True:
+                queue.dequeue(timeout=None)
+                arrivals[name].append(time.monotonic())
+
+        threading.Thread(target=record, daemon=True).start()
+        peers.append(peer)
+    time.sleep(0.2)
+
+    local_node = HiveNode('local', '127.0.0.1', 1, is_local_node=True)
+    outbound_message_queue = MessageQueue('Outbound')
+    threading.Thread(target=HiveSenderClient(outbound_message_queue, MessageQueue('Inbound')).run, daemon=True).start()
+
+    start = time.monotonic()
+    for _ in range(args.rounds):
+        for peer in peers:
+            outbound_message_queue.enqueue(HiveMessage(HeartbeatMessage(local_node, peer)))
+        time.sleep(interval)
+    time.sleep(interval)
+
+    on_schedule = True
+    for name, times in arrivals.items():
+        gaps = [later - earlier for earlier, later in zip([start] + times, times)]
+        max_gap = max(gaps) if gaps else float('inf')
+        on_schedule = on_schedule and len(times) == args.rounds and max_gap < interval * 2
+        print(f"{name:<8} received {len(times):>3}/{args.rounds} heartbeats, max gap {max_gap:.3f}s (interval {interval}s)")
+    print(f"black-holed peer accepted {len(accepted)} connections and acknowledged none")
+    print("PASS" if on_schedule else "FAIL")
+
+
+def benchmark_retry(args: argparse.Namespace) -> None:
+    """
+    Sends 20 heartbeats to a stand-in peer that refuses connections for the first 1.5 seconds, as in a restart,
+    and then starts its receiver. Reports how far apart the send attempts were, how many failures were counted
+    against the peer, whether it was marked Dead, and whether every heartbeat arrived once it was back.
+    """
+    from hive_receiver_service import HiveReceiverService
+    from hive_sender_client import HiveSenderClient
+    from hive_message import HiveMessage
+
+    quiet_logger()
+    message_count, outage = 20, 1.5
+    peer = HiveNode('peer', '127.0.0.1', args.port)
+    local_node = HiveNode('local', '127.0.0.1', 1, is_local_node=True)
+    inbound_message_queue = MessageQueue('Inbound')
+    arrivals = []
+
+    def start_peer() -> None:
+        time.sleep(outage)
+        receiving_node = HiveNode(peer.friendly_name, peer.ip_address, peer.port_number, is_local_node=True)
+        service = HiveReceiverService(peer.friendly_name, peer.ip_address, peer.port_number, HiveNodeManager(receiving_node), inbound_message_queue, MessageQueue('Outbound'), None, None)
+        threading.Thread(target=service.run, daemon=True).start()
+        while True:
+            inbound_message_queue.dequeue(timeout=None)
+            arrivals.append(time.monotonic())
+
+    outbound_message_queue = MessageQueue('Outbound')
+    sender_client = HiveSenderClient(outbound_message_queue, MessageQueue('Inbound'))
+    attempts = []
+    exchange_frame = sender_client.exchange_frame
+
+    def record_attempt(address, frame):
+        attempts.append(time.monotonic())
+        return exchange_frame(address, frame)
+
+    sender_client.exchange_frame = record_attempt
+    start = time.monotonic()
+    threading.Thread(target=start_peer, daemon=True).start()
+    threading.Thread(target=sender_client.run, daemon=True).start()
+    statuses = set()
+    peer.add_status_listener(lambda node: statuses.add(node.status))
+    for _ in range(message_count):
+        outbound_message_queue.enqueue(HiveMessage(HeartbeatMessage(local_node, peer)))
+    deadline = start + outage + AppSettings.SEND_RETRY_BACKOFF_IN_SECONDS * 2 ** AppSettings.MAX_SEND_ATTEMPTS
+    while len(arrivals) < message_count and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    failed_attempts = [attempt - start for attempt in attempts if attempt - start < outage]
+    retry_times = sorted({round(attempt, 1) for attempt in failed_attempts})
+    print(f"peer refused connections for {outage}s: {len(failed_attempts)} failed attempts at {', '.join(f'{t:.1f}s' for t in retry_times)}")
+    print(f"failures counted against the peer {peer.failed_connection_count}  marked Dead {'yes' if 'Dead' in statuses else 'no'}")
+    print(f"heartbeats delivered {len(arrivals)}/{message_count}, the last {max(arrivals, default=start) - start:.1f}s after the first send")
+    print("PASS" if len(arrivals) == message_count and 'Dead' not in statuses else "FAIL")
+
+
+def benchmark_wal(args: argparse.Namespace) -> None:
+    """
+    Compares the enqueue throughput of a durable outbound queue with group commit against one that fsyncs
+    every append, with several producer threads enqueueing concurrently and every enqueue waiting until its
+    message is on disk. Each log is then reopened to check that every message is replayed.
+    """
+    import tempfile
+    from durable_message_queue import DurableMessageQueue
+    from hive_message import HiveMessage
+
+    quiet_logger()
+    AppSettings.WAL_SYNC_COMMIT = True
+    local_node = HiveNode('local', '127.0.0.1', 1, is_local_node=True)
+    peers = [HiveNode(f"peer{index}", '127.0.0.1', args.port + index) for index in range(args.peers)]
+
+    for name, group_commit_interval in [('fsync each', 0.0), ('group', AppSettings.WAL_GROUP_COMMIT_INTERVAL_IN_SECONDS)]:
+        with tempfile.TemporaryDirectory() as directory:
+            queue = DurableMessageQueue('Outbound', directory, group_commit_interval=group_commit_interval)
+
+            def produce(producer: int) -> None:
+                for index in range(producer, args.messages, args.concurrency):
+                    queue.enqueue(HiveMessage(HeartbeatMessage(local_node, peers[index % len(peers)])))
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(produce, range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+            queue.wal.close()
+
+            reopened = DurableMessageQueue('Outbound', directory)
+            replayed = reopened.replay(HiveNodeManager(local_node))
+            reopened.wal.close()
+            print(f"{name:<10} {args.messages / elapsed:>10.0f} msg/s  replayed {replayed}/{args.messages}")
+
+
+def benchmark_gossip(args: argparse.Namespace) -> None:
+    """
+    Measures how long the receiver takes to handle a gossip message listing every node of a cluster, for each
+    requested cluster size. The first message adds every node; the following ones only look the nodes up.
+    Also measures picking random live peers from the cluster.
+    """
+    from hive_receiver_service import HiveReceiverService
+
+    quiet_logger()
+    for node_count in args.nodes:
+        local_node = HiveNode('local', '127.0.0.1', 1, is_local_node=True)
+        hive_node_manager = HiveNodeManager(local_node)
+        service = HiveReceiverService('bench', '127.0.0.1', 1, hive_node_manager, MessageQueue('Inbound'), MessageQueue('Outbound'), None, None)
+        nodes = {f"node{index}": {'ip_address': f"10.{index // 65536}.{index // 256 % 256}.{index % 256}", 'port_number': 54321}
+                 for index in range(node_count)}
+        sender = HiveNode('node0', '10.0.0.0', 54321)
+
+        start = time.perf_counter()
+        service.handle_gossip({'nodes': nodes}, sender)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            service.handle_gossip({'nodes': nodes}, sender)
+        repeat = (time.perf_counter() - start) / args.rounds
+
+        print(f"{node_count:>6} nodes  first gossip {first * 1000:>9.1f} ms  repeat gossip {repeat * 1000:>9.1f} ms  "
+              f"({repeat / node_count * 1e6:.2f} us/node)  known nodes {len(hive_node_manager.hive_nodes)}")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            hive_node_manager.get_random_live_node()
+            hive_node_manager.get_random_live_nodes(3)
+        selection = (time.perf_counter() - start) / 1000
+        print(f"{node_count:>6} nodes  random peer + 3 random peers {selection * 1e6:>7.2f} us")
+
+
+def benchmark_membership(args: argparse.Namespace) -> None:
+    """
+    Stress test of the membership table: writer threads add, kill, revive and remove their own nodes while reader
+    threads iterate snapshots and pick random peers. Reports throughput and the slowest read, checks every
+    snapshot a reader saw was internally consistent, and checks the final table against what the writers did.
+    """
+    quiet_logger()
+    local_node = HiveNode('local', '127.0.0.1', 1, is_local_node=True)
+    hive_node_manager = HiveNodeManager(local_node)
+    stop = threading.Event()
+    reads = [0] * args.threads
+    slowest_reads = [0.0] * args.threads
+    inconsistent = []
+
+    def write(writer: int) -> None:
+        nodes = [HiveNode(f"w{writer}n{index}", f"10.0.{writer}.{index % 256}", 1000 + index) for index in range(args.operations)]
+        for node in nodes:
+            hive_node_manager.add_node(node)
+        for node in nodes[::2]:
+            node.node_is_dead()
+        for node in nodes[::4]:
+            node.node_is_alive()
+        for node in nodes[1::3]:
+            hive_node_manager.remove_node(node)
+
+    def read(reader: int) -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            snapshot = hive_node_manager.snapshot
+            peers = random.sample(snapshot.live_nodes, min(3, len(snapshot.live_nodes)))
+            if len(snapshot.nodes) != len(snapshot.node_index) or len(snapshot.live_nodes) != len(snapshot.live_node_index) \
+                    or any(snapshot.node_index.get(HiveNodeManager.get_node_key(peer.ip_address, peer.port_number)) is not peer for peer in peers):
+                inconsistent.append(snapshot.version)
+            slowest_reads[reader] = max(slowest_reads[reader], time.perf_counter() - start)
+            reads[reader] += 1
+            time.sleep(0.0005)
+
+    readers = [threading.Thread(target=read, args=(reader,)) for reader in range(args.threads)]
+    for reader in readers:
+        reader.start()
+    start = time.perf_counter()
+    writers = [threading.Thread(target=write, args=(writer,)) for writer in range(args.threads)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    expected_nodes = {(f"10.0.{writer}.{index % 256}", 1000 + index): index % 2 == 1 or index % 4 == 0
+                      for writer in range(args.threads) for index in range(args.operations) if index % 3 != 1}
+    snapshot = hive_node_manager.snapshot
+    actual_nodes = {HiveNodeManager.get_node_key(node.ip_address, node.port_number): node.status == "Live" for node in snapshot.nodes if node is not local_node}
+    actual_live = {HiveNodeManager.get_node_key(node.ip_address, node.port_number) for node in snapshot.live_nodes}
+    lost_updates = actual_nodes != expected_nodes or actual_live != {key for key, is_live in expected_nodes.items() if is_live}
+
+    writes = args.threads * (args.operations + args.operations // 2 + args.operations // 4 + args.operations // 3)
+    print(f"{args.threads} writers, {args.threads} readers: {writes / elapsed:>8.0f} writes/s  {sum(reads) / elapsed:>8.0f} reads/s  "
+          f"slowest read {max(slowest_reads) * 1000:.2f} ms  versions published {snapshot.version}")
+    print(f"inconsistent snapshots {len(inconsistent)}  lost updates {'yes' if lost_updates else 'no'}  nodes {len(actual_nodes)}/{len(expected_nodes)}")
+    print("PASS" if not inconsistent and not lost_updates else "FAIL")
+
+
+def benchmark_failure_detector(args: argparse.Namespace) -> None:
+    """
+    Simulates clusters of 3, 10, 30 and the requested number of nodes on a virtual clock, each node running the
+    heartbeat schedule of HeartbeatProtocolCommandManager: every interval, plus a little processing time, it queues
+    heartbeats with send_heartbeats() and the heartbeats reach their recipients after a jittered network delay, now
+    and then stretched by a load spike. Some nodes go silent half way. Every second each running node checks its
+    phi accrual failure detectors, and the benchmark reports the share of healthy peers that are suspect and how
+    long the silent nodes take to be suspected by every running node.
+    """
+    import heapq
+    from heartbeat_protocol_command_manager import HeartbeatProtocolCommandManager
+
+    quiet_logger()
+    interval = AppSettings.HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS
+    processing_time, network_delay, spike_probability, spike_mean, sample_step = 0.05, 0.02, 0.02, 1.5, 1.0
+    passed = True
+    for node_count in sorted({3, 10, 30, args.cluster_size}):
+        rng = random.Random(args.port + node_count)
+        random.seed(node_count)
+        local_nodes = [HiveNode(f"node{index}", '10.0.0.1', 20000 + index, is_local_node=True) for index in range(node_count)]
+        managers = []
+        for local_node in local_nodes:
+            hive_node_manager = HiveNodeManager(local_node)
+            for remote_node in local_nodes:
+                if remote_node is not local_node:
+                    hive_node_manager.add_node(HiveNode(remote_node.friendly_name, remote_node.ip_address, remote_node.port_number))
+            managers.append(HeartbeatProtocolCommandManager(hive_node_manager, MessageQueue(local_node.friendly_name)))
+        crash_times = [rng.uniform(args.duration / 4, args.duration / 2) if rng.random() < 0.2 else None for _ in range(node_count)]
+        if node_count > 1 and all(crash_time is None for crash_time in crash_times):
+            crash_times[-1] = args.duration / 3
+
+        def is_running(index: int, now: float) -> bool:
+            return crash_times[index] is None or now < crash_times[index]
+
+        next_sends = [(rng.uniform(0, interval), index) for index in range(node_count)]
+        heapq.heapify(next_sends)
+        deliveries = []
+        sequence = 0
+        healthy_samples = suspect_samples = worst_suspect = 0
+        detection = {}
+        now = sample_step
+        while now <= args.duration:
+            while next_sends and next_sends[0][0] <= now:
+                sent_time, index = heapq.heappop(next_sends)
+                if not is_running(index, sent_time):
+                    continue
+                manager = managers[index]
+                manager.send_heartbeats()
+                for hive_message in manager.outbound_message_queue.dequeue_many(node_count):
+                    delay = rng.uniform(0, 2 * network_delay)
+                    if rng.random() < spike_probability:
+                        delay += rng.expovariate(1 / spike_mean)
+                    sequence += 1
+                    heapq.heappush(deliveries, (sent_time + delay, sequence, index, int(hive_message.message.recipient.port_number) - 20000))
+                heapq.heappush(next_sends, (sent_time + interval + rng.uniform(0, 2 * processing_time), index))
+            while deliveries and deliveries[0][0] <= now:
+                arrival, _, sender, recipient = heapq.heappop(deliveries)
+                if is_running(recipient, arrival):
+                    remote_node = managers[recipient].hive_node_manager.get_node_by_ip_address_and_port('10.0.0.1', 20000 + sender)
+                    remote_node.set_last_heartbeat_timestamp(arrival)
+
+            suspects_now = 0
+            for observer, manager in enumerate(managers):
+                if not is_running(observer, now):
+                    continue
+                for remote_node in manager.hive_node_manager.live_nodes:
+                    peer = remote_node.port_number - 20000
+                    suspect = remote_node.is_suspect(now)
+                    if is_running(peer, now):
+                        healthy_samples += 1
+                        suspect_samples += suspect
+                        suspects_now += suspect
+                    elif suspect and (observer, peer) not in detection:
+                        detection[(observer, peer)] = now - crash_times[peer]
+            worst_suspect = max(worst_suspect, suspects_now)
+            now += sample_step
+
+        # A silent node is detected once every node still running suspects it
+        latencies = []
+        undetected = 0
+        for peer, crash_time in enumerate(crash_times):
+            if crash_time is None:
+                continue
+            observers = [observer for observer in range(node_count) if observer != peer and is_running(observer, args.duration)]
+            if all((observer, peer) in detection for observer in observers):
+                latencies.append(max((detection[(observer, peer)] for observer in observers), default=0.0))
+            else:
+                undetected += 1
+        latencies.sort()
+        suspect_rate = suspect_samples / max(healthy_samples, 1)
+        median = f"{latencies[len(latencies) // 2]:.1f}s" if latencies else "-"
+        worst = f"{latencies[-1]:.1f}s" if latencies else "-"
+        print(f"{node_count:>4} nodes, heartbeat every {interval}s: healthy peers suspect {suspect_rate:.4%} of the time "
+              f"(at most {worst_suspect} at once)  silent nodes detected {len(latencies)}/{len(latencies) + undetected}  "
+              f"median latency {median}  worst {worst}")
+        passed = passed and suspect_rate < 0.001 and not undetected
+    print(f"heartbeats delayed {network_delay * 1000:.0f} ms on average, {spike_probability:.0%} by load spikes (mean {spike_mean}s), "
+          f"{args.duration}s simulated per cluster")
+    print("PASS" if passed else "FAIL")
+
+
+def benchmark_swim(args: argparse.Namespace) -> None:
+    """
+    Simulates SWIM clusters of each requested size in-process on a virtual clock, delivering messages between the
+    nodes' outbound queues directly. Every node starts knowing only the first node. Reports the time until every
+    node knows every other, the messages and bytes each node sends per protocol period once membership is stable,
+    the time until every node sees a node live again after the sender failed to reach it MAX_SEND_ATTEMPTS times in
+    a row, the time until every node has declared a silent node dead, and the size of the full-dump gossip message it replaces.
+    """
+    from hive_message import HiveMessage
+    from gossip_message import GossipMessage
+    from swim_protocol_command_manager import SwimProtocolCommandManager
+
+    quiet_logger()
+    period = AppSettings.SWIM_PROTOCOL_PERIOD_IN_SECONDS
+    step = AppSettings.SWIM_TICK_IN_SECONDS
+    for node_count in args.nodes:
+        random.seed(node_count)
+        local_nodes = [HiveNode(f"node{index}", '10.0.0.1', 20000 + index, is_local_node=True) for index in range(node_count)]
+        managers = {}
+        for local_node in local_nodes:
+            hive_node_manager = HiveNodeManager(local_node)
+            if local_node is not local_nodes[0]:
+                hive_node_manager.add_node(HiveNode('node0', '10.0.0.1', 20000))
+            managers[local_node.port_number] = SwimProtocolCommandManager(hive_node_manager, MessageQueue(local_node.friendly_name))
+        silent = set()
+        traffic = {'messages': 0, 'bytes': 0}
+
+        def advance(now: float) -> None:
+            for port, manager in managers.items():
+                if port not in silent:
+                    manager.tick(now)
+            delivered = True
+            while delivered:
+                delivered = False
+                for port, manager in managers.items():
+                    for hive_message in manager.outbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE):
+                        delivered = True
+                        if port in silent:
+                            continue
+                        traffic['messages'] += 1
+                        traffic['bytes'] += len(hive_message.message.to_json())
+                        recipient_port = int(hive_message.message.recipient.port_number)
+                        if recipient_port not in silent:
+                            managers[recipient_port].handle_message(hive_message, now)
+
+        now = 0.0
+        while any(len(manager.hive_node_manager.hive_nodes) < node_count for manager in managers.values()) and now < args.duration:
+            now += step
+            advance(now)
+        converged = now
+
+        # Let the joins finish disseminating, then measure steady state traffic
+        for _ in range(int(10 * period / step)):
+            now += step
+            advance(now)
+        traffic.update(messages=0, bytes=0)
+        steady_periods = 10
+        for _ in range(int(steady_periods * period / step)):
+            now += step
+            advance(now)
+        messages_per_period = traffic['messages'] / node_count / steady_periods
+        bytes_per_period = traffic['bytes'] / node_count / steady_periods
+
+        # A brief outage between two live nodes: the sender reports each failed send, as HiveSenderClient does
+        first_manager = managers[local_nodes[0].port_number]
+        blipped_port = local_nodes[1].port_number
+        blipped_node = first_manager.hive_node_manager.get_node_by_ip_address_and_port('10.0.0.1', blipped_port)
+        for _ in range(AppSettings.MAX_SEND_ATTEMPTS):
+            first_manager.report_failed_connection(blipped_node, now)
+        blipped_at = now
+        while now - blipped_at < args.duration and (now - blipped_at < period or any(
+                manager.hive_node_manager.get_node_by_ip_address_and_port('10.0.0.1', blipped_port).status != 'Live'
+                for port, manager in managers.items() if port != blipped_port)):
+            now += step
+            advance(now)
+        recovered = all(manager.hive_node_manager.get_node_by_ip_address_and_port('10.0.0.1', blipped_port).status == 'Live'
+                        for port, manager in managers.items() if port != blipped_port)
+
+        silent_port = local_nodes[-1].port_number
+        silent.add(silent_port)
+        failed_at = now
+        while now - failed_at < args.duration and any(
+                manager.hive_node_manager.get_node_by_ip_address_and_port('10.0.0.1', silent_port).status != 'Dead'
+                for port, manager in managers.items() if port not in silent):
+            now += step
+            advance(now)
+
+        gossip_bytes = len(GossipMessage(local_nodes[0], local_nodes[1], {
+            node.friendly_name: {'ip_address': node.ip_address, 'port_number': str(node.port_number)} for node in local_nodes}).to_json())
+        print(f"{node_count:>5} nodes  full membership after {converged:>5.1f}s  {messages_per_period:>4.1f} msgs / {bytes_per_period:>6.0f} bytes "
+              f"per node per period  unreachable node live everywhere {f'after {failed_at - blipped_at:>5.1f}s' if recovered else 'never'}  "
+              f"silent node dead everywhere after {now - failed_at:>5.1f}s  (full gossip message: {gossip_bytes} bytes)")
+
+
+def benchmark_gossip_delta(args: argparse.Namespace) -> None:
+    """
+    Simulates delta gossip clusters of each requested size in-process, one gossip round at a time, delivering
+    messages between the nodes' outbound queues directly. Every node starts knowing every other. Reports the bytes
+    each node sends per round while in sync, then restarts one node and adds a new one and reports the rounds and
+    bytes until every node knows both, next to the rounds and bytes the full-dump gossip it replaces would take.
+    """
+    from gossip_message import GossipMessage
+    from gossip_protocol_command_manager import GossipProtocolCommandManager
+
+    quiet_logger()
+    for node_count in args.nodes:
+        random.seed(node_count)
+        local_nodes = [HiveNode(f"node{index}", '10.0.0.1', 20000 + index, is_local_node=True) for index in range(node_count + 1)]
+        for local_node in local_nodes:
+            local_node.incarnation = 1
+        managers = {}
+        for local_node in local_nodes[:node_count]:
+            hive_node_manager = HiveNodeManager(local_node)
+            peers = []
+            for peer in local_nodes[:node_count]:
+                if peer is not local_node:
+                    node = HiveNode(peer.friendly_name, peer.ip_address, peer.port_number)
+                    node.incarnation = 1
+                    peers.append(node)
+            hive_node_manager.add_nodes(peers)
+            managers[local_node.port_number] = GossipProtocolCommandManager(hive_node_manager, MessageQueue(local_node.friendly_name))
+        traffic = {'messages': 0, 'bytes': 0}
+
+        def gossip_round() -> None:
+            for manager in list(managers.values()):
+                manager.gossip_once()
+            delivered = True
+            while delivered:
+                delivered = False
+                for manager in list(managers.values()):
+                    for hive_message in manager.outbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE):
+                        delivered = True
+                        traffic['messages'] += 1
+                        traffic['bytes'] += len(hive_message.message.to_json())
+                        managers[int(hive_message.message.recipient.port_number)].handle_message(hive_message)
+
+        steady_rounds = 5
+        start = time.perf_counter()
+        for _ in range(steady_rounds):
+            gossip_round()
+        steady_cpu = (time.perf_counter() - start) / steady_rounds / node_count
+        steady_bytes = traffic['bytes'] / node_count / steady_rounds
+
+        # Restart the last node and join a new node through the first one
+        restarted, joined = local_nodes[node_count - 1], local_nodes[node_count]
+        restarted.incarnation = 2
+        joined_manager = HiveNodeManager(joined)
+        joined_manager.add_node(HiveNode('node0', '10.0.0.1', 20000))
+        managers[joined.port_number] = GossipProtocolCommandManager(joined_manager, MessageQueue(joined.friendly_name))
+        managers[20000].hive_node_manager.add_node(HiveNode(joined.friendly_name, joined.ip_address, joined.port_number))
+
+        def converged() -> bool:
+            for manager in managers.values():
+                index = manager.hive_node_manager.snapshot.node_index
+                if len(index) != node_count + 1 or index[('10.0.0.1', restarted.port_number)].incarnation != 2 or index[('10.0.0.1', joined.port_number)].incarnation != 1:
+                    return False
+            return True
+
+        traffic.update(messages=0, bytes=0)
+        rounds = 0
+        start = time.perf_counter()
+        while not converged() and rounds < args.rounds * 10:
+            gossip_round()
+            rounds += 1
+        change_cpu = (time.perf_counter() - start) / max(rounds, 1) / (node_count + 1)
+        change_bytes = traffic['bytes'] / (node_count + 1) / max(rounds, 1)
+
+        # The full-dump gossip pushes every live node to one random peer per round
+        informed = {0}
+        full_rounds = 0
+        while len(informed) < node_count + 1:
+            for index in list(informed):
+                peer = random.randrange(node_count)
+                informed.add(peer if peer < index else peer + 1)
+            full_rounds += 1
+        full_bytes = len(GossipMessage(local_nodes[0], local_nodes[1], {
+            node.friendly_name: {'ip_address': node.ip_address, 'port_number': str(node.port_number)} for node in local_nodes}).to_json())
+
+        print(f"{node_count:>5} nodes  in sync {steady_bytes:>8.0f} bytes {steady_cpu * 1e6:>7.1f} us per node per round  "
+              f"after a change {rounds:>3} rounds {change_bytes:>8.0f} bytes {change_cpu * 1e6:>7.1f} us per node per round  "
+              f"(full gossip: ~{full_rounds} rounds, {full_bytes} bytes per node per round)")
+
+
+def benchmark_gossip_schedule(args: argparse.Namespace) -> None:
+    """
+    Simulates delta gossip clusters of each requested size in-process on a virtual clock, with every node running
+    its own GossipSchedule. Every node starts knowing every other with membership stable, then one node restarts.
+    Reports the seconds and rounds per node until every node has its new version, and the digests each node sends
+    per minute once membership is stable again, for the old single-peer fixed interval and for the adaptive schedule
+    at several fan-outs.
+    """
+    import heapq
+    from gossip_protocol_command_manager import GossipProtocolCommandManager
+    from gossip_schedule import GossipSchedule
+
+    quiet_logger()
+    fixed = AppSettings.HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS
+    configurations = [('fixed 1 peer', lambda: GossipSchedule(fixed, fixed, 1))]
+    configurations += [(f"adaptive {fanout} peers", lambda fanout=fanout: GossipSchedule(fanout=fanout)) for fanout in (1, 2, 3)]
+    for node_count in args.nodes:
+        for name, make_schedule in configurations:
+            random.seed(node_count)
+            local_nodes = [HiveNode(f"node{index}", '10.0.0.1', 20000 + index, is_local_node=True) for index in range(node_count)]
+            managers = {}
+            for local_node in local_nodes:
+                hive_node_manager = HiveNodeManager(local_node)
+                hive_node_manager.add_nodes([HiveNode(peer.friendly_name, peer.ip_address, peer.port_number) for peer in local_nodes if peer is not local_node])
+                schedule = make_schedule()
+                # Start settled: stable interval, rounds spread over it
+                schedule.interval = schedule.max_interval
+                schedule.rounds_since_change = node_count
+                schedule.next_round_time = random.uniform(0, schedule.max_interval)
+                manager = GossipProtocolCommandManager(hive_node_manager, MessageQueue(local_node.friendly_name), schedule)
+                manager.last_digest_hash = manager.get_digest()[1]
+                managers[local_node.port_number] = manager
+            due = [(manager.schedule.next_round_time, port) for port, manager in managers.items()]
+            heapq.heapify(due)
+            counts = {'rounds': 0, 'digests': 0}
+
+            def run_until(end: float, done: Callable[[], bool]) -> float:
+                while due and due[0][0] <= end and not done():
+                    now, port = heapq.heappop(due)
+                    manager = managers[port]
+                    if now != manager.schedule.next_round_time:
+                        continue
+                    manager.gossip_once(now)
+                    counts['rounds'] += 1
+                    heapq.heappush(due, (manager.schedule.complete_round(node_count, now), port))
+                    # Only the node that gossiped and the nodes it reached have messages to deliver
+                    senders = [manager]
+                    while senders:
+                        sender = senders.pop()
+                        for hive_message in sender.outbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE):
+                            if hive_message.message.command == 'gossip_digest' and hive_message.message.versions is None:
+                                counts['digests'] += 1
+                            recipient = managers[int(hive_message.message.recipient.port_number)]
+                            next_round_time = recipient.schedule.next_round_time
+                            recipient.handle_message(hive_message, now)
+                            if recipient.schedule.next_round_time != next_round_time:
+                                heapq.heappush(due, (recipient.schedule.next_round_time, int(recipient.hive_node_manager.local_node.port_number)))
+                            senders.append(recipient)
+                return now if due else end
+
+            # A restarted node starts its schedule afresh, with its first round due immediately
+            restarted = local_nodes[-1]
+            restarted.incarnation += 1
+            restarted_schedule = managers[restarted.port_number].schedule
+            restarted_schedule.interval, restarted_schedule.rounds_since_change, restarted_schedule.next_round_time = restarted_schedule.min_interval, 0, 0.0
+            heapq.heappush(due, (0.0, restarted.port_number))
+            key = ('10.0.0.1', restarted.port_number)
+            converged_at = run_until(args.duration, lambda: all(manager.hive_node_manager.snapshot.node_index[key].incarnation == restarted.incarnation
+                                                                for manager in managers.values()))
+            rounds = counts['rounds'] / node_count
+
+            # Let the schedules back off, then count the digests of a stable minute
+            stable_from = run_until(converged_at + 10 * restarted_schedule.max_interval, lambda: False)
+            counts.update(digests=0)
+            run_until(stable_from + 60, lambda: False)
+            print(f"{node_count:>5} nodes  {name:<17} converged after {converged_at:>6.1f}s  {rounds:>5.1f} rounds per node  "
+                  f"stable {counts['digests'] / node_count:>4.1f} digests per node per minute")
+
+
+def benchmark_config(args: argparse.Namespace) -> None:
+    """
+    Simulates the config protocol on clusters of each requested size in-process, one round at a time, delivering
+    messages between the nodes' outbound queues directly. Every node starts with only its own section of
+    -services services. Reports the rounds and bytes until every node holds every section, the bytes per node per
+    round and config file writes once in sync, and the bytes per node per round of the full-config messages the
+    digests replace.
+    """
+    import tempfile
+    from filelock import FileLock
+    from config_digest_message import ConfigDigestMessage
+    from config_protocol_command_manager import ConfigProtocolCommandManager
+    from monitor_service import ServiceMonitor
+
+    quiet_logger()
+    previous_directory = os.getcwd()
+    for node_count in args.nodes:
+        random.seed(node_count)
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                local_nodes = [HiveNode(f"node{index}", '10.0.0.1', 20000 + index, is_local_node=True) for index in range(node_count)]
+                managers = {}
+                counts = {'messages': 0, 'bytes': 0, 'writes': 0}
+                for local_node in local_nodes:
+                    hive_node_manager = HiveNodeManager(local_node)
+                    hive_node_manager.add_nodes([HiveNode(peer.friendly_name, peer.ip_address, peer.port_number) for peer in local_nodes if peer is not local_node])
+                    services = {f"service{index}": ["2024-06-23 17:23:18", "TCP", "20", f"10.1.{index // 256}.{index % 256}", "443", None, "GOOD"]
+                                for index in range(args.services)}
+                    config = {local_node.friendly_name: [[local_node.ip_address, local_node.port_number], services]}
+                    service_monitor = ServiceMonitor(local_node.friendly_name, config, FileLock(f"{local_node.friendly_name}.json.lock"))
+                    save_config = service_monitor.save_config
+
+                    def counted_save_config(save_config=save_config) -> None:
+                        counts['writes'] += 1
+                        save_config()
+
+                    service_monitor.save_config = counted_save_config
+                    managers[local_node.port_number] = ConfigProtocolCommandManager(hive_node_manager, MessageQueue(local_node.friendly_name), service_monitor)
+
+                def config_round() -> None:
+                    for manager in managers.values():
+                        recipient = manager.hive_node_manager.get_random_live_node()
+                        manager.send(ConfigDigestMessage(manager.hive_node_manager.local_node, recipient, manager.get_versions()))
+                    delivered = True
+                    while delivered:
+                        delivered = False
+                        for manager in managers.values():
+                            for hive_message in manager.outbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE):
+                                delivered = True
+                                counts['messages'] += 1
+                                counts['bytes'] += len(hive_message.message.to_json())
+                                managers[int(hive_message.message.recipient.port_number)].handle_message(hive_message)
+
+                rounds = 0
+                while rounds < args.rounds * 10 and any(len(manager.get_versions()) < node_count for manager in managers.values()):
+                    config_round()
+                    rounds += 1
+                sync_bytes = counts['bytes'] / node_count
+
+                counts.update(messages=0, bytes=0, writes=0)
+                for _ in range(args.rounds):
+                    config_round()
+                steady_bytes = counts['bytes'] / node_count / args.rounds
+                full_config = managers[20000].service_monitor.config
+                full_bytes = len(json.dumps({'command': f"config {json.dumps(full_config)}"}))
+                print(f"{node_count:>5} nodes x {args.services} services  in sync after {rounds:>3} rounds ({sync_bytes / 1024:>8.1f} KB per node)  "
+                      f"then {steady_bytes:>7.0f} bytes per node per round, {counts['writes']} config file writes in {args.rounds} rounds  "
+                      f"(full config: {full_bytes / 1024:.1f} KB per node per round)")
+            finally:
+                os.chdir(previous_directory)
+
+
+def benchmark_crdt(args: argparse.Namespace) -> None:
+    """
+    Property test of the LwwMap config CRDT. Each trial makes random writes and removals of a few keys by a few
+    writers, with colliding timestamps, and checks that merging them in random orders, with duplicates, gives the
+    same map; that merging replicas is commutative and associative; that the map holds the latest write of every
+    key; and that two replicas are equal after a single exchange of their entries. Also measures merge throughput.
+    """
+    from lww_map import LwwMap
+
+    def random_writes(trial_random: random.Random) -> list:
+        writes = []
+        for _ in range(trial_random.randint(1, args.operations)):
+            value = None if trial_random.random() < 0.3 else [trial_random.randint(0, 3), trial_random.choice(['TCP', 'UDP', 'HTTP'])]
+            writes.append((f"service{trial_random.randrange(8)}", (trial_random.randrange(20), f"node{trial_random.randrange(3)}", value)))
+        return writes
+
+    def merged(writes) -> LwwMap:
+        lww_map = LwwMap()
+        for key, entry in writes:
+            lww_map.merge({key: entry})
+        return lww_map
+
+    failures = {'order': 0, 'commutative': 0, 'associative': 0, 'latest': 0, 'exchange': 0}
+    for trial in range(args.trials):
+        trial_random = random.Random(trial)
+        writes = random_writes(trial_random)
+        expected = merged(writes).to_dict()
+
+        shuffled = writes + trial_random.sample(writes, len(writes) // 2)
+        trial_random.shuffle(shuffled)
+        if merged(shuffled).to_dict() != expected:
+            failures['order'] += 1
+
+        parts = [[write for index, write in enumerate(writes) if index % 3 == part] for part in range(3)]
+        a, b, c = (merged(part).to_dict() for part in parts)
+        ab, ba = LwwMap(a), LwwMap(b)
+        ab.merge(b)
+        ba.merge(a)
+        if ab.to_dict() != ba.to_dict():
+            failures['commutative'] += 1
+        ab_c, a_bc, bc = LwwMap(ab.to_dict()), LwwMap(a), LwwMap(b)
+        ab_c.merge(c)
+        bc.merge(c)
+        a_bc.merge(bc.to_dict())
+        if ab_c.to_dict() != a_bc.to_dict() or ab_c.to_dict() != expected:
+            failures['associative'] += 1
+
+        for key in {key for key, _ in writes}:
+            latest = max((entry for write_key, entry in writes if write_key == key),
+                         key=lambda entry: (entry[0], entry[1], json.dumps(entry[2], sort_keys=True)))
+            if expected[key] != list(latest) or (latest[2] is None) != (key not in merged(writes).get_values()):
+                failures['latest'] += 1
+                break
+
+        left, right = merged(parts[0] + parts[1]), merged(parts[1] + parts[2])
+        left_entries = left.to_dict()
+        left.merge(right.to_dict())
+        right.merge(left_entries)
+        if left.to_dict() != right.to_dict() or left.to_dict() != expected:
+            failures['exchange'] += 1
+
+    entries = {f"service{index}": [index, 'node0', ['TCP', 443]] for index in range(10000)}
+    newer = {key: [entry[0] + 1, 'node1', entry[2]] for key, entry in entries.items()}
+    start = time.perf_counter()
+    lww_map = LwwMap(entries)
+    lww_map.merge(newer)
+    lww_map.merge(newer)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.trials} trials  " + "  ".join(f"{name} failures {count}" for name, count in failures.items()))
+    print(f"merge throughput {3 * len(entries) / elapsed:>10.0f} entries/s")
+    print("PASS" if not any(failures.values()) else "FAIL")
+
+
+def benchmark_merkle(args: argparse.Namespace) -> None:
+    """
+    Compares the cost of resyncing two config replicas in 'digest' and 'merkle' sync mode. Both replicas hold a
+    catalog of 20 sections of -services services; the second has missed the latest writes of D of them, for each
+    D in -nodes. Delivers messages between the replicas until neither sends any more, and reports the messages
+    and bytes it took and whether the replicas ended up equal.
+    """
+    import tempfile
+    from filelock import FileLock
+    from config_digest_message import ConfigDigestMessage
+    from config_tree_message import ConfigTreeMessage
+    from config_protocol_command_manager import ConfigProtocolCommandManager
+    from monitor_service import ServiceMonitor
+
+    quiet_logger()
+    section_names = [f"node{index}" for index in range(20)]
+    catalog = {section_name: {f"service{index}": [1000, section_name, ["TCP", "20", f"10.1.{index // 256}.{index % 256}", "443", "GOOD"]]
+                              for index in range(args.services)} for section_name in section_names}
+    previous_directory = os.getcwd()
+    for difference in args.nodes:
+        random.seed(difference)
+        stale = random.sample([(section_name, key) for section_name in section_names for key in catalog[section_name]], min(difference, 20 * args.services))
+        for sync_mode in ('digest', 'merkle'):
+            with tempfile.TemporaryDirectory() as directory:
+                os.chdir(directory)
+                try:
+                    local_nodes = [HiveNode(name, '10.0.0.1', 20000 + index, is_local_node=True) for index, name in enumerate(('replica0', 'replica1'))]
+                    managers = {}
+                    for local_node, peer in zip(local_nodes, reversed(local_nodes)):
+                        hive_node_manager = HiveNodeManager(local_node)
+                        hive_node_manager.add_nodes([HiveNode(peer.friendly_name, peer.ip_address, peer.port_number)])
+                        service_monitor = ServiceMonitor(local_node.friendly_name, {}, FileLock(f"{local_node.friendly_name}.json.lock"))
+                        managers[local_node.port_number] = ConfigProtocolCommandManager(hive_node_manager, MessageQueue(local_node.friendly_name), service_monitor, sync_mode)
+                    current, behind = managers[20000], managers[20001]
+                    updated = {section_name: dict(entries) for section_name, entries in catalog.items()}
+                    for section_name, key in stale:
+                        updated[section_name][key] = [2000, section_name, updated[section_name][key][2][:-1] + ["BAD"]]
+                    with current.lock:
+                        current.merge_sections({section_name: [None, entries] for section_name, entries in updated.items()})
+                    with behind.lock:
+                        behind.merge_sections({section_name: [None, entries] for section_name, entries in catalog.items()})
+
+                    counts = {'messages': 0, 'bytes': 0}
+                    start = time.perf_counter()
+                    for sender, recipient in ((behind, current), (current, behind)):
+                        recipient_node = recipient.hive_node_manager.local_node
+                        if sync_mode == 'merkle':
+                            sender.send(ConfigTreeMessage(sender.hive_node_manager.local_node, recipient_node, {'': format(sender.get_root_hash(), 'x')}))
+                        else:
+                            sender.send(ConfigDigestMessage(sender.hive_node_manager.local_node, recipient_node, sender.get_versions()))
+                        delivered = True
+                        while delivered:
+                            delivered = False
+                            for manager in managers.values():
+                                for hive_message in manager.outbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE):
+                                    delivered = True
+                                    counts['messages'] += 1
+                                    counts['bytes'] += len(hive_message.message.to_json())
+                                    managers[int(hive_message.message.recipient.port_number)].handle_message(hive_message)
+                    elapsed = time.perf_counter() - start
+                    in_sync = all(current.sections[section_name].to_dict() == behind.sections[section_name].to_dict() for section_name in section_names)
+                    print(f"{20 * args.services} entries, {len(stale):>5} differing  {sync_mode:<6}  {counts['messages']:>3} messages  "
+                          f"{counts['bytes'] / 1024:>9.1f} KB  {elapsed * 1000:>7.1f} ms  {'PASS' if in_sync else 'FAIL'}")
+                finally:
+                    os.chdir(previous_directory)
+
+
+def benchmark_config_payload(args: argparse.Namespace) -> None:
+    """
+    Measures the encode and decode time and the size of a config message carrying -services services spread over
+    10 sections: as JSON in the command, parsed twice on receipt, and in the payload field, uncompressed and
+    compressed. Checks that every form decodes to the sections sent, and that a compressed payload expanding beyond
+    a frame is refused.
+    """
+    import base64
+    import zlib
+    from config_message import ConfigMessage
+
+    quiet_logger()
+    sender, recipient = HiveNode('sender', '10.0.0.1', 20000), HiveNode('recipient', '10.0.0.2', 20001)
+    sections = {f"node{section}": [['10.0.0.1', 20000 + section],
+                                   {f"service{index}": [1718000000000 + index, f"node{section}",
+                                                        ["2024-06-23 17:23:18", "TCP", "20", f"10.1.{index // 256}.{index % 256}", "443", None, "GOOD"]]
+                                    for index in range(section, args.services, 10)}]
+                for section in range(10)}
+    versions = {section_name: 1718000000000 + args.services for section_name in sections}
+
+    def command_encode() -> bytes:
+        message = ConfigMessage(sender, recipient, {}, versions)
+        return json.dumps({**message.to_dict(), 'command': f"config {json.dumps(sections)}"}).encode()
+
+    def command_decode(frame: bytes) -> dict:
+        return json.loads(json.loads(frame.decode())['command'][7:])
+
+    def payload_encode(threshold: int) -> Callable[[], bytes]:
+        def encode() -> bytes:
+            message = ConfigMessage(sender, recipient, sections, versions)
+            message.encoded_payload = ConfigMessage.encode_payload(sections, threshold)
+            return message.to_json().encode()
+        return encode
+
+    def payload_decode(frame: bytes) -> dict:
+        return ConfigMessage.decode_payload(json.loads(frame.decode()))
+
+    forms = [('json in command', command_encode, command_decode),
+             ('payload', payload_encode(sys.maxsize), payload_decode),
+             ('payload, zlib', payload_encode(AppSettings.CONFIG_COMPRESSION_THRESHOLD_IN_BYTES), payload_decode)]
+    repeats = max(args.rounds, 1)
+    for name, encode, decode in forms:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            frame = encode()
+        encode_time = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            decoded = decode(frame)
+        decode_time = (time.perf_counter() - start) / repeats
+        print(f"{args.services} services  {name:<16} {len(frame) / 1024:>8.1f} KB  encode {encode_time * 1000:>7.2f} ms  "
+              f"decode {decode_time * 1000:>7.2f} ms  {'PASS' if decoded == sections else 'FAIL'}")
+
+    # A payload that fits in a frame but decompresses to far more than a frame must be refused, not expanded
+    bomb = {**ConfigMessage(sender, recipient, {}, versions).to_dict(), 'payload_encoding': 'zlib',
+            'payload': base64.b64encode(zlib.compress(b' ' * (64 * AppSettings.MAX_FRAME_SIZE_IN_BYTES), 9)).decode()}
+    start = time.perf_counter()
+    try:
+        ConfigMessage.decode_payload(bomb)
+        refused = False
+    except ValueError:
+        refused = True
+    print(f"{len(bomb['payload']) / 1024:.1f} KB payload of {64 * AppSettings.MAX_FRAME_SIZE_IN_BYTES / 2 ** 20:.0f} MB decompressed: "
+          f"{'refused' if refused else 'expanded'} in {(time.perf_counter() - start) * 1000:.2f} ms  {'PASS' if refused else 'FAIL'}")
+
+
+def benchmark_config_store(args: argparse.Namespace) -> None:
+    """
+    Compares rewriting the config file of -services services on every change, as the receiver and service monitor
+    used to, with marking it dirty for a ConfigStore. -concurrency threads make changes for -duration seconds
+    (capped at 10) while a reader keeps parsing the file. Reports the changes made, the file writes and the reads
+    that found the file missing or partly written, which must be none with the ConfigStore.
+    """
+    import tempfile
+    from filelock import FileLock
+    from config_store import ConfigStore
+
+    quiet_logger()
+    duration = min(args.duration, 10.0)
+    previous_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            for name in ('rewrite', 'config store'):
+                config = {'local': [['10.0.0.1', 20000], {f"service{index}": ["2024-06-23 17:23:18", "TCP", "20", f"10.1.{index // 256}.{index % 256}", "443", None, "GOOD"]
+                                                          for index in range(args.services)}]}
+                lock = FileLock('local.json.lock')
+                config_store = ConfigStore('local.json', config, 'local', lock, flush_interval=0.2)
+                config_store.mark_dirty()
+                config_store.flush()
+                config_store.write_count = 0
+                counts = {'changes': 0, 'writes': 0, 'reads': 0, 'torn reads': 0}
+                stop = threading.Event()
+
+                def rewrite() -> None:
+                    with lock.acquire(timeout=5):
+                        if os.path.exists('local.json'):
+                            os.remove('local.json')
+                        with open('local.json', 'w') as file:
+                            json.dump(config, file, indent=4)
+                    counts['writes'] += 1
+
+                def change() -> None:
+                    change_random = random.Random()
+                    while not stop.is_set():
+                        config['local'][1][f"service{change_random.randrange(args.services)}"][0] = time.strftime(AppSettings.TIMESTAMP_FORMAT)
+                        counts['changes'] += 1
+                        if name == 'rewrite':
+                            rewrite()
+                        else:
+                            config_store.mark_dirty()
+                            time.sleep(0)
+
+                def read() -> None:
+                    while not stop.is_set():
+                        counts['reads'] += 1
+                        try:
+                            with open('local.json', 'r') as file:
+                                json.load(file)
+                        except (OSError, ValueError):
+                            counts['torn reads'] += 1
+
+                threads = [threading.Thread(target=change) for _ in range(args.concurrency)] + [threading.Thread(target=read)]
+                if name == 'config store':
+                    threading.Thread(target=config_store.run, daemon=True).start()
+                for thread in threads:
+                    thread.start()
+                time.sleep(duration)
+                stop.set()
+                for thread in threads:
+                    thread.join()
+                config_store.flush()
+                writes = counts['writes'] + config_store.write_count
+                print(f"{name:<12} {counts['changes']:>8} changes  {writes:>6} file writes  {counts['reads']:>6} reads  "
+                      f"{counts['torn reads']:>5} torn reads")
+                if name == 'config store':
+                    print("PASS" if counts['torn reads'] == 0 and writes <= duration / 0.2 + 2 else "FAIL")
+        finally:
+            os.chdir(previous_directory)
+
+
+def start_check_servers(port: int) -> list:
+    """
+    Starts the local stand-in servers of the check benchmarks: a TCP server on the port that accepts and closes
+    every connection, and a hanging server on the next port that accepts connections but never answers.
+    Returns their listening sockets.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', port))
+    listener.listen(1024)
+
+    def accept_and_close() -> None:
+        while True:
+            connection, _ = listener.accept()
+            connection.close()
+
+    threading.Thread(target=accept_and_close, daemon=True).start()
+    hanging = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    hanging.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    hanging.bind(('127.0.0.1', port + 1))
+    # Never accepted, connections complete in the backlog and then wait for an answer that never comes
+    hanging.listen(1024)
+    return [listener, hanging]
+
+
+def benchmark_checks(args: argparse.Namespace) -> None:
+    """
+    Runs service checks against local stand-in servers: TCP checks of a server that accepts every connection, and
+    one in twenty HTTP checks of a server that never answers, with a 1 second deadline. Compares checking 100
+    services one after another with the CheckExecutor, then schedules -services services every 10 seconds for
+    -duration seconds (capped at 30) and reports the check rate, deadline overruns and how late checks started.
+    """
+    import heapq
+    from check_executor import CheckExecutor
+    from network_monitoring_examples import check_tcp_port, check_server_http
+
+    quiet_logger()
+    servers = start_check_servers(args.port)
+    timeouts = {'TCP': 1.0, 'HTTP': 1.0}
+
+    def get_service(index: int) -> tuple:
+        if index % 20 == 19:
+            return f"service{index}", 'HTTP', check_server_http, (f"http://127.0.0.1:{args.port + 1}/",)
+        return f"service{index}", 'TCP', check_tcp_port, ('127.0.0.1', args.port)
+
+    batch = [get_service(index) for index in range(100)]
+    start = time.perf_counter()
+    for _, check_type, check, check_args in batch:
+        check(*check_args, timeout=timeouts[check_type])
+    sequential_time = time.perf_counter() - start
+
+    check_executor = CheckExecutor(timeouts=timeouts)
+    start = time.perf_counter()
+    now = time.time()
+    for name, check_type, check, check_args in batch:
+        check_executor.submit(name, check_type, check, check_args, now)
+    results = []
+    while len(results) < len(batch):
+        results.extend(check_executor.get_results(timeout=5.0))
+    executor_time = time.perf_counter() - start
+    print(f"100 checks, 5 hanging  one after another {sequential_time:>6.2f}s  check executor {executor_time:>6.2f}s")
+
+    check_executor.get_stats(reset=True)
+    duration = min(args.duration, 30.0)
+    frequency = 10.0
+    start_time = time.time()
+    services = {}
+    due_heap = []
+    for index in range(args.services):
+        service = get_service(index)
+        services[service[0]] = service
+        # Spread the first checks over the first interval
+        heapq.heappush(due_heap, (start_time + frequency * index / args.services, service[0]))
+    while time.time() < start_time + duration:
+        now = time.time()
+        while due_heap and due_heap[0][0] <= now:
+            due_time, name = heapq.heappop(due_heap)
+            _, check_type, check, check_args = services[name]
+            check_executor.submit(name, check_type, check, check_args, due_time)
+            heapq.heappush(due_heap, (due_time + frequency, name))
+        check_executor.get_results()
+        time.sleep(max(min(due_heap[0][0] - time.time(), 0.05), 0))
+    stats = check_executor.get_stats()
+    print(f"{args.services} services every {frequency:.0f}s for {duration:.0f}s  {stats['completed']} checks ({stats['per_minute']:.0f}/min)  "
+          f"{stats['overruns']} past their deadline  started late by p50 {stats['lateness_p50'] * 1000:.1f} ms  "
+          f"p99 {stats['lateness_p99'] * 1000:.1f} ms  max {stats['lateness_max'] * 1000:.1f} ms")
+    check_executor.shutdown()
+    for server in servers:
+        server.close()
+    print("PASS" if stats['per_minute'] >= 1000 and stats['lateness_p99'] < 1.0 and stats['overruns'] == 0 else "FAIL")
+
+
+def run_check_servers(args: argparse.Namespace) -> None:
+    """
+    Child process side of the async_checks benchmark: serves the stand-in servers of the checks on one event loop,
+    from -port up: a TCP server closing every connection, an HTTP server answering 200 OK, a UDP echo server, a DNS
+    server answering every A query with 127.0.0.1 and an NTP server answering with the current time. All but the
+    TCP server answer -latency seconds late, standing in for the round trip to a remote server.
+    """
+    import asyncio
+    import struct
+    import dns.message
+    import dns.rrset
+
+    class EchoProtocol(asyncio.DatagramProtocol):
+        def __init__(self, answer: Callable[[bytes], bytes]):
+            self.answer = answer
+
+        def connection_made(self, transport) -> None:
+            self.transport = transport
+
+        def datagram_received(self, data: bytes, addr) -> None:
+            asyncio.get_running_loop().call_later(args.latency, self.transport.sendto, self.answer(data), addr)
+
+    def answer_dns(data: bytes) -> bytes:
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        response.answer.append(dns.rrset.from_text(query.question[0].name, 60, 'IN', 'A', '127.0.0.1'))
+        return response.to_wire()
+
+    def answer_ntp(data: bytes) -> bytes:
+        now = time.time() + 2208988800
+        # LI 0, version 3, mode 4 (server), stratum 1, with the transmit timestamp set
+        return b'\x1c\x01' + bytes(38) + struct.pack('!II', int(now), int((now % 1) * 2 ** 32))
+
+    async def close_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.close()
+
+    async def answer_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while (await reader.readline()).strip():
+                pass
+            await asyncio.sleep(args.latency)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nOK")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def serve() -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.start_server(close_connection, '127.0.0.1', args.port, backlog=4096)
+        await asyncio.start_server(answer_http, '127.0.0.1', args.port + 1, backlog=4096)
+        for offset, answer in ((2, lambda data: data or b'.'), (3, answer_dns), (4, answer_ntp)):
+            # Several sockets share each port, so a burst of datagrams does not overflow a single receive buffer
+            for _ in range(8):
+                transport, _ = await loop.create_datagram_endpoint(lambda answer=answer: EchoProtocol(answer),
+                                                                   local_addr=('127.0.0.1', args.port + offset), reuse_port=True)
+                transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        print('ready', flush=True)
+        await loop.run_in_executor(None, sys.stdin.readline)
+
+    asyncio.run(serve())
+
+
+def benchmark_async_checks(args: argparse.Namespace) -> None:
+    """
+    Runs -services checks, an equal mix of TCP, HTTP, UDP, DNS and NTP checks of local stand-in servers in a child
+    process, all due at once, on the threaded CheckExecutor and on the AsyncCheckExecutor. Reports the checks per
+    second, the most checks in flight at once, the threads used and how many checks found their server up. The
+    blocking UDP check reports a port that answers as closed, so it finds the UDP stand-in down.
+    """
+    import resource
+    from check_executor import CheckExecutor
+    from async_check_executor import AsyncCheckExecutor
+    from network_monitoring_examples import check_tcp_port, check_server_http, check_udp_port, check_dns_server_status, check_ntp_server
+
+    quiet_logger()
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'check_servers', '-port', str(args.port), '-latency', str(args.latency)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()
+    checks = [
+        ('TCP', check_tcp_port, ('127.0.0.1', args.port)),
+        ('HTTP', check_server_http, (f"http://127.0.0.1:{args.port + 1}/",)),
+        ('UDP', check_udp_port, ('127.0.0.1', args.port + 2)),
+        ('DNS', check_dns_server_status, ('127.0.0.1', 'service.example', 'A', args.port + 3)),
+        ('NTP', check_ntp_server, ('127.0.0.1', args.port + 4)),
+    ]
+    # Keep the probes in flight within the open file limit
+    rates = {}
+    type_limits = {check_type: max(min(AppSettings.ASYNC_CHECK_TYPE_CONCURRENCY[check_type], (hard_limit - 1000) // len(checks)), 1)
+                   for check_type, _, _ in checks}
+    timeouts = {check_type: 5.0 for check_type, _, _ in checks}
+    try:
+        for name, check_executor in (('threaded', CheckExecutor(timeouts=timeouts)),
+                                     ('asyncio', AsyncCheckExecutor(type_limits, timeouts))):
+            peak = {'in_flight': 0, 'threads': threading.active_count()}
+            start = time.perf_counter()
+            now = time.time()
+            for index in range(args.services):
+                check_type, check, check_args = checks[index % len(checks)]
+                check_executor.submit(f"service{index}", check_type, check, check_args, now)
+            results = []
+            while len(results) < args.services:
+                results.extend(check_executor.get_results(timeout=0.01))
+                with check_executor.lock:
+                    peak['in_flight'] = max(peak['in_flight'], len(check_executor.in_flight) - sum(len(waiting) for waiting in check_executor.waiting.values()))
+                peak['threads'] = max(peak['threads'], threading.active_count())
+            elapsed = time.perf_counter() - start
+            check_executor.shutdown()
+            up = sum(1 for result in results if result.is_up)
+            print(f"{name:<9} {args.services} checks in {elapsed:>6.2f}s  {args.services / elapsed:>8.0f} checks/s  "
+                  f"{peak['in_flight']:>6} in flight at most  {peak['threads']:>3} threads  {up} up")
+            rates[name] = args.services / elapsed
+        print("PASS" if rates['asyncio'] > rates['threaded'] and up == args.services else "FAIL")
+    finally:
+        server.stdin.write('\n')
+        server.stdin.flush()
+        server.wait()
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft_limit, hard_limit))
+
+
+def benchmark_scheduler(args: argparse.Namespace) -> None:
+    """
+    Measures the ServiceMonitor scheduler. Times one pass of the scan the monitor loop used to repeat without
+    sleeping over -services services, and the CheckScheduler cost per check for growing numbers of services. Then
+    runs a ServiceMonitor over -services TCP checks of a local stand-in server, first with every check hours away,
+    reporting the CPU time used while idle, then with every service due every 5 seconds for -duration seconds (capped
+    at 20), reporting the check rate and how late checks started.
+    """
+    import datetime
+    import resource
+    import tempfile
+    from filelock import FileLock
+    from check_scheduler import CheckScheduler
+    from check_executor import CheckExecutor
+    from config_store import ConfigStore
+    from results_store import ResultsStore
+    from monitor_service import ServiceMonitor, get_timestamp
+
+    def get_cpu_time() -> float:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+    quiet_logger()
+    timestamp = get_timestamp()
+    rows = {f"service{index}": [timestamp, 'TCP', 3600, '127.0.0.1', args.port] for index in range(args.services)}
+    start = time.perf_counter()
+    for row in rows.values():
+        # One pass of the former monitor loop: parse the last check time and the current time for every service
+        last_check_time = datetime.datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
+        datetime.datetime.strptime(get_timestamp(), "%Y-%m-%d %H:%M:%S") >= last_check_time + datetime.timedelta(seconds=int(row[2]))
+    scan_time = time.perf_counter() - start
+    print(f"scan of {args.services} services  {scan_time * 1000:>8.2f} ms per pass, repeated without sleeping")
+
+    for size in (1000, 10000, 100000):
+        scheduler = CheckScheduler()
+        for index in range(size):
+            scheduler.schedule(f"service{index}", random.random())
+        start = time.perf_counter()
+        now = 0.0
+        checks = 0
+        while checks < 100000:
+            now += 0.001
+            for name, due_time in scheduler.pop_due(now):
+                scheduler.schedule(name, due_time + 1.0)
+                checks += 1
+        print(f"scheduler of {size:>6} services  {(time.perf_counter() - start) / checks * 1e6:>6.2f} us per check")
+
+    servers = start_check_servers(args.port)
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'local.json')
+        config = {'local': [None, rows]}
+        with open(file_name, 'w') as file:
+            json.dump(config, file)
+        lock = FileLock(f"{file_name}.lock")
+        config_store = ConfigStore(file_name, config, 'local', lock)
+        threading.Thread(target=config_store.run, daemon=True).start()
+        check_executor = CheckExecutor(timeouts={'TCP': 1.0})
+        results_store = ResultsStore(os.path.join(directory, 'local.results'))
+        service_monitor = ServiceMonitor('local', config, lock, config_store, check_executor, results_store)
+        threading.Thread(target=service_monitor.monitor_loop, daemon=True).start()
+
+        # Let the monitor schedule the services first
+        time.sleep(2.0)
+        idle_seconds = 5.0
+        cpu_time = get_cpu_time()
+        time.sleep(idle_seconds)
+        idle_cpu = (get_cpu_time() - cpu_time) / idle_seconds
+        print(f"{args.services} services idle  {idle_cpu * 100:>6.2f}% of a core")
+
+        frequency = 5
+        # Due every 5 seconds, their last checks spread over the last interval
+        for index, row in enumerate(rows.values()):
+            row[0] = (datetime.datetime.now() - datetime.timedelta(seconds=frequency * index / args.services)).strftime("%Y-%m-%d %H:%M:%S")
+            row[2] = frequency
+        check_executor.get_stats(reset=True)
+        duration = min(args.duration, 20.0)
+        cpu_time = get_cpu_time()
+        service_monitor.save_config()
+        time.sleep(duration)
+        busy_cpu = (get_cpu_time() - cpu_time) / duration
+        stats = check_executor.get_stats()
+        expected = args.services * duration / frequency
+        print(f"{args.services} services every {frequency}s for {duration:.0f}s  {stats['completed']} checks of {expected:.0f} expected  "
+              f"started late by p50 {stats['lateness_p50'] * 1000:.1f} ms  p99 {stats['lateness_p99'] * 1000:.1f} ms  "
+              f"{busy_cpu * 100:.1f}% of a core")
+        # Stop the monitor scheduling checks, and write the config while its directory still exists
+        rows.clear()
+        service_monitor.save_config()
+        time.sleep(1.5)
+        config_store.flush()
+        results_store.close()
+        check_executor.shutdown()
+    for server in servers:
+        server.close()
+    print("PASS" if idle_cpu < 0.05 and stats['completed'] >= expected * 0.9 and stats['lateness_p99'] < 1.5 else "FAIL")
+
+
+def benchmark_check_plan(args: argparse.Namespace) -> None:
+    """
+    Compiles -services service rows of every type into CheckPlans, checking each plan against the check function and
+    arguments the row-indexing dispatch of the service monitor used to derive, then times preparing a check from the
+    row on every dispatch against reading it from the compiled plan.
+    """
+    import tracemalloc
+    from check_plan import CheckPlan
+    from network_monitoring_examples import check_server_http, check_dns_server_status, check_ntp_server, check_tcp_port, check_server_https, check_udp_port
+
+    def get_check(service: list) -> tuple:
+        # The if/elif dispatch on the row the service monitor used before plans
+        service_type = service[1]
+        if service_type == 'HTTP':
+            return check_server_http, (service[3],)
+        elif service_type == 'HTTPS':
+            return check_server_https, (service[3],)
+        elif service_type == 'NTP':
+            return check_ntp_server, (service[3],)
+        elif service_type == 'DNS':
+            return check_dns_server_status, (service[3], service[4], service[5])
+        elif service_type == 'UDP':
+            return check_udp_port, (service[3], int(service[4]))
+        elif service_type == 'TCP':
+            return check_tcp_port, (service[3], int(service[4]))
+        return None
+
+    rows = {}
+    for index in range(args.services):
+        check_type = ('HTTP', 'HTTPS', 'NTP', 'DNS', 'UDP', 'TCP')[index % 6]
+        target = f"http{'s' if check_type == 'HTTPS' else ''}://service{index}.example/" if check_type.startswith('HTTP') else f"10.0.{index // 256 % 256}.{index % 256}"
+        extra = {'DNS': ['service.example', 'A'], 'UDP': [str(1024 + index % 1000)], 'TCP': [str(1024 + index % 1000)]}.get(check_type, [])
+        rows[f"service{index}"] = ['2024-01-01 00:00:00', check_type, '60', target] + extra
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    plans = {key: CheckPlan.compile(key, row) for key, row in rows.items()}
+    compile_time = time.perf_counter() - start
+    plans_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    mismatches = sum(1 for key, row in rows.items() if get_check(row) != (plans[key].check, plans[key].args)
+                     or plans[key].frequency != int(row[2]))
+    print(f"compiled {args.services} rows in {compile_time * 1000:.1f} ms  {plans_size / args.services:.0f} bytes per plan  {mismatches} mismatches")
+
+    rounds = max(200000 // args.services, 1)
+    config = {'local': [None, rows]}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in rows:
+            service = config['local'][1][key]
+            check = get_check(service)
+            service[1], check[0], check[1], int(service[2])
+    row_time = (time.perf_counter() - start) / (rounds * args.services)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in rows:
+            plan = plans[key]
+            plan.check_type, plan.check, plan.args, plan.frequency
+    plan_time = (time.perf_counter() - start) / (rounds * args.services)
+    print(f"preparing a check  from the row {row_time * 1e9:>6.0f} ns  from the plan {plan_time * 1e9:>6.0f} ns")
+    print("PASS" if mismatches == 0 and plan_time < row_time else "FAIL")
+
+
+def benchmark_results(args: argparse.Namespace) -> None:
+    """
+    Records the results of -services services checked every minute for -duration simulated seconds in a
+    ResultsStore, then reopens it and compares the latest results read back with those recorded. Compares the bytes
+    written to the results log with what writing each result into the config cost before: the config file rewritten
+    every flush interval a result arrived in, and every result a changed config entry to replicate.
+    """
+    import tempfile
+    from check_result import CheckResult
+    from results_store import ResultsStore
+
+    quiet_logger()
+    frequency = 60
+    rows = {f"service{index}": ['2024-01-01 00:00:00', 'TCP', str(frequency), f"10.0.{index // 256 % 256}.{index % 256}", '443', None, 'GOOD']
+            for index in range(args.services)}
+    config_size = len(json.dumps({'local': [['127.0.0.1', 5150], rows]}, indent=4))
+    row_size = len(json.dumps(next(iter(rows.values()))))
+    result_count = int(args.services * args.duration / frequency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results_directory = os.path.join(directory, 'local.results')
+        results_store = ResultsStore(results_directory)
+        recorded = {}
+        start = time.perf_counter()
+        for index in range(result_count):
+            service_name = f"service{index % args.services}"
+            started_time = 1700000000.0 + index * frequency / args.services
+            result = CheckResult(service_name, 'TCP', index % 7 != 0, (index % 7 != 0, f"Port 443 on {rows[service_name][3]} is open."),
+                                 started_time, 0.002, 0.001)
+            results_store.record(result)
+            recorded[service_name] = result
+        results_store.close()
+        record_time = time.perf_counter() - start
+        log_size = sum(os.path.getsize(os.path.join(results_directory, file_name)) for file_name in os.listdir(results_directory))
+
+        start = time.perf_counter()
+        reopened = ResultsStore(results_directory)
+        latest = reopened.get_all_latest()
+        open_time = time.perf_counter() - start
+        reopened.close()
+    mismatches = sum(1 for service_name, result in recorded.items()
+                     if service_name not in latest or (latest[service_name].started_time, latest[service_name].is_up, latest[service_name].response)
+                     != (result.started_time, result.is_up, str(result.response)))
+
+    # Before, a result changed its config row: the config file was rewritten once per flush interval with a result,
+    # and each changed row was a new config entry version to replicate
+    flushes = min(args.duration / AppSettings.CONFIG_FLUSH_INTERVAL_IN_SECONDS, result_count)
+    print(f"{result_count} results of {args.services} services over {args.duration:.0f}s")
+    print(f"  in the config   {flushes * config_size / 1024 / 1024:>9.1f} MB of config file writes  {result_count} replicated entry changes ({result_count * row_size / 1024 / 1024:.1f} MB)")
+    print(f"  results store   {log_size / 1024 / 1024:>9.1f} MB of results log appends      0 replicated entry changes  "
+          f"{record_time / result_count * 1e6:.1f} us per result  reopened in {open_time * 1000:.0f} ms  {mismatches} mismatches")
+    print("PASS" if mismatches == 0 and len(latest) == args.services and log_size < flushes * config_size / 10 else "FAIL")
+
+
+SCENARIOS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    'receiver': benchmark_receiver,
+    'receiver_server': run_receiver_server,
+    'blackhole': benchmark_blackhole,
+    'retry': benchmark_retry,
+    'wal': benchmark_wal,
+    'gossip': benchmark_gossip,
+    'membership': benchmark_membership,
+    'failure_detector': benchmark_failure_detector,
+    'swim': benchmark_swim,
+    'gossip_delta': benchmark_gossip_delta,
+    'gossip_schedule': benchmark_gossip_schedule,
+    'config': benchmark_config,
+    'crdt': benchmark_crdt,
+    'merkle': benchmark_merkle,
+    'config_payload': benchmark_config_payload,
+    'config_store': benchmark_config_store,
+    'checks': benchmark_checks,
+    'check_servers': run_check_servers,
+    'async_checks': benchmark_async_checks,
+    'scheduler': benchmark_scheduler,
+    'check_plan': benchmark_check_plan,
+    'results': benchmark_results,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a Hive network benchmark.')
+    parser.add_argument('scenario', choices=list(SCENARIOS), help='Benchmark to run')
+    parser.add_argument('-mode', type=str, default='threaded', help='Receiver mode for the receiver_server scenario')
+    parser.add_argument('-port', type=int, default=55321, help='Port used by benchmarks that start a receiver')
+    parser.add_argument('-connections', type=int, default=5000, help='Number of connections opened by the receiver benchmark')
+    parser.add_argument('-concurrency', type=int, default=64, help='Number of concurrent client connections or producer threads')
+    parser.add_argument('-peers', type=int, default=3, help='Number of healthy stand-in peers')
+    parser.add_argument('-messages', type=int, default=5000, help='Number of messages enqueued by the wal benchmark')
+    parser.add_argument('-rounds', type=int, default=10, help='Number of heartbeat or gossip rounds')
+    parser.add_argument('-threads', type=int, default=32, help='Number of writer and of reader threads in the membership stress test')
+    parser.add_argument('-operations', type=int, default=200, help='Number of nodes each membership writer adds')
+    parser.add_argument('-cluster_size', type=int, default=100, help='Number of nodes in the simulated failure detector cluster')
+    parser.add_argument('-duration', type=float, default=600.0, help='Simulated seconds of the failure detector benchmark, and the limit of each swim benchmark phase')
+    parser.add_argument('-services', type=int, default=50, help='Number of services in each node config section of the config and merkle benchmarks, in total in the config_payload benchmark')
+    parser.add_argument('-trials', type=int, default=1000, help='Number of random trials of the crdt property test')
+    parser.add_argument('-latency', type=float, default=0.1, help='Seconds the stand-in servers of the async_checks benchmark wait before answering')
+    parser.add_argument('-nodes', type=int, nargs='+', default=[1000, 10000], help='Cluster sizes used by the gossip and swim benchmarks, differing entries in the merkle benchmark')
+    args = parser.parse_args()
+    SCENARIOS[args.scenario](args)
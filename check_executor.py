@@ -0,0 +1,265 @@
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logger import Logger
+from app_settings import AppSettings
+from check_result import CheckResult
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+
+class CheckExecutor:
+    """
+    CheckExecutor runs service checks on a bounded thread pool, so one slow check no longer delays every other one.
+
+    The number of checks of one type running at once is limited per type, so for example a burst of DNS checks
+    cannot take every worker; checks over the limit of their type wait in a per-type queue and are started as
+    checks of that type complete, without holding a worker while they wait. Every check is called with a timeout,
+    its deadline, and a check still running a second past its deadline is counted as an overrun. A service is never
+    checked twice at once.
+
+    Completed checks are collected as CheckResults in a queue, in the order they complete, for the caller to
+    process on its own thread. The executor measures how late each check started after it was due, and how many
+    checks completed, for the caller to report.
+
+    Attributes:
+    ----------
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    pool : ThreadPoolExecutor
+        The worker threads running the checks.
+    type_limits : Dict[str, int]
+        The maximum number of checks of each type running at once, types not listed use default_type_limit.
+    default_type_limit : int
+        The maximum number of checks of an unlisted type running at once.
+    timeouts : Dict[str, float]
+        The deadline of each type of check in seconds, types not listed use timeout.
+    timeout : float
+        The deadline of a check of an unlisted type in seconds.
+    lock : threading.Lock
+        Guards the running counts, the waiting checks, the services in flight and the statistics.
+    running : Dict[str, int]
+        The number of checks of each type running.
+    waiting : Dict[str, Deque[Tuple]]
+        The checks of each type waiting for a free slot of their type.
+    in_flight : Set[str]
+        The names of the services with a check waiting or running.
+    results : queue.SimpleQueue
+        The CheckResults of completed checks not yet collected.
+    on_result : Optional[Callable[[], None]]
+        Called after each result is queued, for a caller waiting on more than the results, or None.
+    completed_count : int
+        The number of checks completed since the statistics were last reset.
+    overrun_count : int
+        The number of checks that ran past their deadline since the statistics were last reset.
+    latenesses : Deque[float]
+        How late the most recent checks started after they were due, in seconds.
+    stats_reset_time : float
+        The monotonic time the statistics were last reset.
+    """
+
+    def __init__(self, max_workers: int = AppSettings.CHECK_MAX_WORKERS,
+                 type_limits: Optional[Dict[str, int]] = None,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 timeout: float = AppSettings.CHECK_TIMEOUT_IN_SECONDS):
+        """
+        Initializes a new instance of CheckExecutor.
+
+        Parameters:
+        ----------
+        max_workers : int, optional
+            The number of worker threads (default is AppSettings.CHECK_MAX_WORKERS).
+        type_limits : Optional[Dict[str, int]], optional
+            The maximum number of checks of each type running at once (default is AppSettings.CHECK_TYPE_CONCURRENCY).
+        timeouts : Optional[Dict[str, float]], optional
+            The deadline of each type of check in seconds (default is AppSettings.CHECK_TYPE_TIMEOUTS_IN_SECONDS).
+        timeout : float, optional
+            The deadline of a check of an unlisted type in seconds (default is AppSettings.CHECK_TIMEOUT_IN_SECONDS).
+        """
+        self.logger: Logger = Logger()
+        self.pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='Check')
+        self.type_limits: Dict[str, int] = type_limits if type_limits is not None else AppSettings.CHECK_TYPE_CONCURRENCY
+        self.default_type_limit: int = max_workers
+        self.timeouts: Dict[str, float] = timeouts if timeouts is not None else AppSettings.CHECK_TYPE_TIMEOUTS_IN_SECONDS
+        self.timeout: float = timeout
+        self.lock: threading.Lock = threading.Lock()
+        self.running: Dict[str, int] = {}
+        self.waiting: Dict[str, Deque[Tuple]] = {}
+        self.in_flight: Set[str] = set()
+        self.results: queue.SimpleQueue = queue.SimpleQueue()
+        self.on_result: Optional[Callable[[], None]] = None
+        self.completed_count: int = 0
+        self.overrun_count: int = 0
+        self.latenesses: Deque[float] = deque(maxlen=AppSettings.CHECK_STATS_WINDOW_SIZE)
+        self.stats_reset_time: float = time.monotonic()
+
+    def submit(self, service_name: str, check_type: str, check: Callable[..., Any], args: Tuple, due_time: float,
+               timeout: Optional[float] = None) -> bool:
+        """
+        Starts a check, or queues it until a check of its type completes if its type is at its limit.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the checked service.
+        check_type : str
+            The type of the check.
+        check : Callable[..., Any]
+            The check function, called with the arguments and a timeout keyword argument.
+        args : Tuple
+            The arguments of the check function.
+        due_time : float
+            The wall clock time the check was due at.
+        timeout : Optional[float], optional
+            The deadline of the check in seconds (default is the deadline of its type).
+
+        Returns:
+        -------
+        bool
+            True if the check was started or queued, False if the service already has a check waiting or running.
+        """
+        request: Tuple = (service_name, check_type, check, args, due_time, self.timeouts.get(check_type, self.timeout) if timeout is None else timeout)
+        with self.lock:
+            if service_name in self.in_flight:
+                return False
+            self.in_flight.add(service_name)
+            if self.running.get(check_type, 0) >= self.type_limits.get(check_type, self.default_type_limit):
+                self.waiting.setdefault(check_type, deque()).append(request)
+                return True
+            self.running[check_type] = self.running.get(check_type, 0) + 1
+        self.start(request)
+        return True
+
+    def start(self, request: Tuple) -> None:
+        """
+        Starts a check that has a slot of its type.
+
+        Parameters:
+        ----------
+        request : Tuple
+            The (service_name, check_type, check, args, due_time, timeout) of the check.
+        """
+        self.pool.submit(self.run_check, request)
+
+    def run_check(self, request: Tuple) -> None:
+        """
+        Runs a check on a worker thread.
+
+        Parameters:
+        ----------
+        request : Tuple
+            The (service_name, check_type, check, args, due_time, timeout) of the check.
+        """
+        check, args, timeout = request[2], request[3], request[5]
+        started_time: float = time.time()
+        start: float = time.monotonic()
+        try:
+            response: Any = check(*args, timeout=timeout)
+        except Exception as e:
+            response = (False, f"Check failed: {e}")
+        self.complete(request, response, started_time, time.monotonic() - start)
+
+    def complete(self, request: Tuple, response: Any, started_time: float, duration: float) -> None:
+        """
+        Queues the result of a completed check, updates the statistics, and starts the next waiting check of its type.
+
+        Parameters:
+        ----------
+        request : Tuple
+            The (service_name, check_type, check, args, due_time, timeout) of the check.
+        response : Any
+            The response of the check function, a tuple starting with whether the service is up.
+        started_time : float
+            The wall clock time the check started at.
+        duration : float
+            The number of seconds the check ran for.
+        """
+        service_name, check_type, _, _, due_time, timeout = request
+        is_up: bool = bool(response[0])
+        lateness: float = max(started_time - due_time, 0.0)
+
+        next_request: Optional[Tuple] = None
+        with self.lock:
+            self.in_flight.discard(service_name)
+            self.completed_count += 1
+            self.latenesses.append(lateness)
+            # Checks that found nothing wait out their whole timeout, so allow them a second to return
+            if duration > timeout + 1.0:
+                self.overrun_count += 1
+            waiting: Optional[Deque[Tuple]] = self.waiting.get(check_type)
+            if waiting:
+                next_request = waiting.popleft()
+            else:
+                self.running[check_type] -= 1
+        self.results.put(CheckResult(service_name, check_type, is_up, response, started_time, duration, lateness))
+        if self.on_result is not None:
+            self.on_result()
+
+        if next_request is not None:
+            # The slot of this check passes to the next waiting check of its type
+            self.start(next_request)
+
+    def get_results(self, timeout: float = 0.0) -> List[CheckResult]:
+        """
+        Returns the results of the checks completed since the last call, waiting up to timeout seconds for one if none has.
+
+        Parameters:
+        ----------
+        timeout : float, optional
+            The number of seconds to wait for a result (default is 0, not waiting).
+
+        Returns:
+        -------
+        List[CheckResult]
+            The results, in the order the checks completed.
+        """
+        results: List[CheckResult] = []
+        try:
+            results.append(self.results.get(timeout=timeout) if timeout > 0 else self.results.get_nowait())
+            while True:
+                results.append(self.results.get_nowait())
+        except queue.Empty:
+            pass
+        return results
+
+    def get_stats(self, reset: bool = False) -> Dict[str, float]:
+        """
+        Returns the checks completed per minute, the deadline overruns and the schedule lateness percentiles.
+
+        Parameters:
+        ----------
+        reset : bool, optional
+            Whether to start new statistics after returning these (default is False).
+
+        Returns:
+        -------
+        Dict[str, float]
+            completed, per_minute, overruns, waiting, and the lateness_p50, lateness_p99 and lateness_max in seconds.
+        """
+        with self.lock:
+            latenesses: List[float] = sorted(self.latenesses)
+            elapsed: float = max(time.monotonic() - self.stats_reset_time, 1e-9)
+            stats: Dict[str, float] = {
+                'completed': self.completed_count,
+                'per_minute': self.completed_count * 60 / elapsed,
+                'overruns': self.overrun_count,
+                'waiting': sum(len(waiting) for waiting in self.waiting.values()),
+                'lateness_p50': latenesses[len(latenesses) // 2] if latenesses else 0.0,
+                'lateness_p99': latenesses[min(len(latenesses) * 99 // 100, len(latenesses) - 1)] if latenesses else 0.0,
+                'lateness_max': latenesses[-1] if latenesses else 0.0,
+            }
+            if reset:
+                self.completed_count = 0
+                self.overrun_count = 0
+                self.latenesses.clear()
+                self.stats_reset_time = time.monotonic()
+        return stats
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker threads once the running checks complete, dropping the waiting ones.
+        """
+        with self.lock:
+            self.waiting.clear()
+        self.pool.shutdown(wait=False)
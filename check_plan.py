@@ -0,0 +1,102 @@
+from check_registry import CHECK_IMPLEMENTATIONS, CheckImplementation
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class CheckPlan:
+    """
+    CheckPlan is a service row of the config compiled for checking: its frequency and port parsed, and the check
+    function of its type bound with its arguments, so the service monitor checks a service without reading the
+    config row again. A plan is compiled when the service is loaded or changed.
+
+    Attributes:
+    ----------
+    service_name : str
+        The name of the service.
+    check_type : str
+        The type of the check, a key of CHECK_IMPLEMENTATIONS.
+    frequency : float
+        The number of seconds between two checks.
+    target : str
+        The URL or host name of the service.
+    port : Optional[int]
+        The port of TCP and UDP services, None for the other types.
+    check : Callable[..., Any]
+        The check function of the type.
+    args : Tuple
+        The arguments of the check function.
+    definition : Tuple
+        The service row the plan was compiled from, without its last check time, to notice changed services.
+    """
+
+    __slots__ = ('service_name', 'check_type', 'frequency', 'target', 'port', 'check', 'args', 'definition')
+
+    def __init__(self, service_name: str, check_type: str, frequency: float, target: str, port: Optional[int],
+                 check: Callable[..., Any], args: Tuple, definition: Tuple):
+        """
+        Initializes a new instance of CheckPlan.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the service.
+        check_type : str
+            The type of the check.
+        frequency : float
+            The number of seconds between two checks.
+        target : str
+            The URL or host name of the service.
+        port : Optional[int]
+            The port of TCP and UDP services, None for the other types.
+        check : Callable[..., Any]
+            The check function of the type.
+        args : Tuple
+            The arguments of the check function.
+        definition : Tuple
+            The service row the plan was compiled from, without its last check time.
+        """
+        self.service_name: str = service_name
+        self.check_type: str = check_type
+        self.frequency: float = frequency
+        self.target: str = target
+        self.port: Optional[int] = port
+        self.check: Callable[..., Any] = check
+        self.args: Tuple = args
+        self.definition: Tuple = definition
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the plan.
+        """
+        return f"CheckPlan({self.service_name}, {self.check_type} {self.target}{f':{self.port}' if self.port is not None else ''} every {self.frequency:g}s)"
+
+    @staticmethod
+    def compile(service_name: str, row: List) -> 'CheckPlan':
+        """
+        Compiles a service row of the config into a plan.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the service.
+        row : List
+            The service row, [last check time, type, frequency, target, ...].
+
+        Returns:
+        -------
+        CheckPlan
+            The plan. Raises ValueError if the type is unknown or the row is malformed.
+        """
+        try:
+            check_type: str = row[1]
+            implementation: Optional[CheckImplementation] = CHECK_IMPLEMENTATIONS.get(check_type)
+            if implementation is None:
+                raise ValueError(f"unknown service type {check_type!r}")
+            frequency: float = float(row[2])
+            if frequency <= 0:
+                raise ValueError(f"frequency {row[2]!r} is not positive")
+            target: str = row[3]
+            port: Optional[int] = int(row[4]) if implementation.has_port else None
+            args: Tuple = implementation.get_args(target, port, row)
+        except (IndexError, TypeError) as e:
+            raise ValueError(f"malformed service row: {e}") from e
+        return CheckPlan(service_name, check_type, frequency, target, port, implementation.check, args, tuple(row[1:]))
@@ -0,0 +1,62 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from network_monitoring_examples import check_server_http, check_server_https, check_ntp_server, check_dns_server_status, check_tcp_port, check_udp_port
+from async_network_checks import async_check_server_http, async_check_server_https, async_check_ntp_server, async_check_dns_server_status, async_check_tcp_port, async_check_udp_port
+
+
+class CheckImplementation:
+    """
+    CheckImplementation is how one type of service check is run: its blocking check function, the asyncio variant
+    of it, and how the arguments of both are taken from a service row of the config.
+
+    Attributes:
+    ----------
+    check : Callable[..., Any]
+        The blocking check function, called with the arguments and a timeout keyword argument.
+    async_check : Optional[Callable[..., Any]]
+        The asyncio variant of the check function, taking the same arguments, or None if there is none.
+    get_args : Callable[[str, Optional[int], List], Tuple]
+        Returns the arguments of the check function from the target, the port and the service row.
+    has_port : bool
+        Whether the service row holds a port after the target.
+    """
+
+    __slots__ = ('check', 'async_check', 'get_args', 'has_port')
+
+    def __init__(self, check: Callable[..., Any], async_check: Optional[Callable[..., Any]],
+                 get_args: Callable[[str, Optional[int], List], Tuple], has_port: bool = False):
+        """
+        Initializes a new instance of CheckImplementation.
+
+        Parameters:
+        ----------
+        check : Callable[..., Any]
+            The blocking check function, called with the arguments and a timeout keyword argument.
+        async_check : Optional[Callable[..., Any]]
+            The asyncio variant of the check function, taking the same arguments, or None if there is none.
+        get_args : Callable[[str, Optional[int], List], Tuple]
+            Returns the arguments of the check function from the target, the port and the service row.
+        has_port : bool, optional
+            Whether the service row holds a port after the target (default is False).
+        """
+        self.check: Callable[..., Any] = check
+        self.async_check: Optional[Callable[..., Any]] = async_check
+        self.get_args: Callable[[str, Optional[int], List], Tuple] = get_args
+        self.has_port: bool = has_port
+
+
+# The implementation of each service type. A service row is [last check time, type, frequency, target, ...]:
+# the URL or host name of the service, followed by the port of TCP and UDP services, or the query name and record
+# type of DNS services.
+CHECK_IMPLEMENTATIONS: Dict[str, CheckImplementation] = {
+    'HTTP': CheckImplementation(check_server_http, async_check_server_http, lambda target, port, row: (target,)),
+    'HTTPS': CheckImplementation(check_server_https, async_check_server_https, lambda target, port, row: (target,)),
+    'NTP': CheckImplementation(check_ntp_server, async_check_ntp_server, lambda target, port, row: (target,)),
+    'DNS': CheckImplementation(check_dns_server_status, async_check_dns_server_status, lambda target, port, row: (target, row[4], row[5])),
+    'UDP': CheckImplementation(check_udp_port, async_check_udp_port, lambda target, port, row: (target, port), has_port=True),
+    'TCP': CheckImplementation(check_tcp_port, async_check_tcp_port, lambda target, port, row: (target, port), has_port=True),
+}
+
+# The asyncio variant of each blocking check function
+ASYNC_CHECKS: Dict[Callable[..., Any], Callable[..., Any]] = {implementation.check: implementation.async_check
+                                                              for implementation in CHECK_IMPLEMENTATIONS.values()
+                                                              if implementation.async_check is not None}
@@ -0,0 +1,53 @@
+from typing import Any
+
+
+class CheckResult:
+    """
+    CheckResult is the outcome of one run of a service check.
+
+    Attributes:
+    ----------
+    service_name : str
+        The name of the checked service.
+    check_type : str
+        The type of the check, such as 'HTTP' or 'TCP'.
+    is_up : bool
+        Whether the service passed the check.
+    response : Any
+        The full response of the check function, or the error it failed with.
+    started_time : float
+        The wall clock time the check started at.
+    duration : float
+        The number of seconds the check ran for.
+    lateness : float
+        The number of seconds the check started after it was due.
+    """
+
+    def __init__(self, service_name: str, check_type: str, is_up: bool, response: Any, started_time: float, duration: float, lateness: float):
+        """
+        Initializes a new instance of CheckResult.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the checked service.
+        check_type : str
+            The type of the check.
+        is_up : bool
+            Whether the service passed the check.
+        response : Any
+            The full response of the check function, or the error it failed with.
+        started_time : float
+            The wall clock time the check started at.
+        duration : float
+            The number of seconds the check ran for.
+        lateness : float
+            The number of seconds the check started after it was due.
+        """
+        self.service_name: str = service_name
+        self.check_type: str = check_type
+        self.is_up: bool = is_up
+        self.response: Any = response
+        self.started_time: float = started_time
+        self.duration: float = duration
+        self.lateness: float = lateness
@@ -0,0 +1,115 @@
+import heapq
+import itertools
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class CheckScheduler:
+    """
+    CheckScheduler orders the services to check by when their next check is due, in a min-heap keyed by monotonic
+    time, so finding the due services costs O(log n) per service due instead of a scan of every service.
+
+    Rescheduling or removing a service leaves its previous heap entry in place; entries that are no longer the current
+    entry of their service are skipped when they reach the top of the heap, and the heap is rebuilt once most of its
+    entries are stale.
+
+    Attributes:
+    ----------
+    heap : List[Tuple[float, int, str]]
+        The (due time, sequence number, service name) entries, the earliest due first.
+    entries : Dict[str, Tuple[float, int]]
+        The (due time, sequence number) of the current heap entry of each scheduled service.
+    sequence : Iterator[int]
+        Numbers the heap entries, so entries due at the same time are ordered by when they were scheduled.
+    """
+
+    def __init__(self):
+        """
+        Initializes a new instance of CheckScheduler with no service scheduled.
+        """
+        self.heap: List[Tuple[float, int, str]] = []
+        self.entries: Dict[str, Tuple[float, int]] = {}
+        self.sequence: Iterator[int] = itertools.count()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of scheduled services.
+        """
+        return len(self.entries)
+
+    def __contains__(self, service_name: str) -> bool:
+        """
+        Returns whether a service is scheduled.
+        """
+        return service_name in self.entries
+
+    def schedule(self, service_name: str, due_time: float) -> None:
+        """
+        Schedules the next check of a service, replacing the one scheduled before.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the service.
+        due_time : float
+            The monotonic time the check is due at.
+        """
+        sequence_number: int = next(self.sequence)
+        self.entries[service_name] = (due_time, sequence_number)
+        heapq.heappush(self.heap, (due_time, sequence_number, service_name))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.compact()
+
+    def remove(self, service_name: str) -> None:
+        """
+        Stops scheduling checks of a service.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the service.
+        """
+        self.entries.pop(service_name, None)
+
+    def get_next_due_time(self) -> Optional[float]:
+        """
+        Returns the monotonic time the earliest check is due at, or None if no service is scheduled.
+        """
+        self.drop_stale_entries()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: float) -> List[Tuple[str, float]]:
+        """
+        Removes the services whose check is due from the schedule, for the caller to check and schedule again.
+
+        Parameters:
+        ----------
+        now : float
+            The current monotonic time.
+
+        Returns:
+        -------
+        List[Tuple[str, float]]
+            The (service name, due time) of each due service, the earliest due first.
+        """
+        due: List[Tuple[str, float]] = []
+        while True:
+            self.drop_stale_entries()
+            if not self.heap or self.heap[0][0] > now:
+                return due
+            due_time, _, service_name = heapq.heappop(self.heap)
+            del self.entries[service_name]
+            due.append((service_name, due_time))
+
+    def drop_stale_entries(self) -> None:
+        """
+        Pops the entries at the top of the heap left behind by rescheduled or removed services.
+        """
+        while self.heap and self.entries.get(self.heap[0][2]) != self.heap[0][:2]:
+            heapq.heappop(self.heap)
+
+    def compact(self) -> None:
+        """
+        Rebuilds the heap from the current due times, dropping every stale entry.
+        """
+        self.heap = [(due_time, sequence_number, service_name) for service_name, (due_time, sequence_number) in self.entries.items()]
+        heapq.heapify(self.heap)
@@ -5,6 +5,7 @@ from message_queue import MessageQueue
 from connect_message import ConnectMessage
 from gossip_protocol_command_manager import GossipProtocolCommandManager
 from heartbeat_protocol_command_manager import HeartbeatProtocolCommandManager
+from swim_protocol_command_manager import SwimProtocolCommandManager
 from prompt_toolkit import PromptSession
 from prompt_toolkit.completion import WordCompleter
 from prompt_toolkit.patch_stdout import patch_stdout
@@ -59,6 +60,8 @@ class CliCommandProcessor:
             'disable_gossip_protocol': 'Usage: disable_gossip_protocol - Disable the gossip protocol',
             'enable_heartbeat_protocol': 'Usage: enable_heartbeat_protocol - Enable the heartbeat protocol',
             'disable_heartbeat_protocol': 'Usage: disable_heartbeat_protocol - Disable the heartbeat protocol',
+            'enable_swim_protocol': 'Usage: enable_swim_protocol - Enable the SWIM membership protocol',
+            'disable_swim_protocol': 'Usage: disable_swim_protocol - Disable the SWIM membership protocol',
             'exit': 'Usage: exit - Shut down the node and exit application',
             'quit': 'Usage: quit - Shut down the node and exit application',
             'help': 'Usage: help - List all available commands',
@@ -72,6 +75,8 @@ class CliCommandProcessor:
             'disable_gossip_protocol': self.disable_gossip_protocol,
             'enable_heartbeat_protocol': self.enable_heartbeat_protocol,
             'disable_heartbeat_protocol': self.disable_heartbeat_protocol,
+            'enable_swim_protocol': self.enable_swim_protocol,
+            'disable_swim_protocol': self.disable_swim_protocol,
             'exit': self.process_command,
             'quit': self.process_command,
             'help': self.list_commands,
@@ -115,6 +120,10 @@ class CliCommandProcessor:
                     self.enable_heartbeat_protocol()
                 elif parts[0] == 'disable_heartbeat_protocol':
                     self.disable_heartbeat_protocol()
+                elif parts[0] == 'enable_swim_protocol':
+                    self.enable_swim_protocol()
+                elif parts[0] == 'disable_swim_protocol':
+                    self.disable_swim_protocol()
                 elif parts[0] == 'connect':
                     if len(parts) < 3:
                         self.logger.info("CliCommandProcessor", self.commands_help['connect'])
@@ -238,3 +247,15 @@ class CliCommandProcessor:
         Disables the heartbeat protocol by setting the appropriate flag in the HeartbeatProtocolCommandManager.
         """
         HeartbeatProtocolCommandManager.enable = False
+
+    def enable_swim_protocol(self) -> None:
+        """
+        Enables the SWIM protocol by setting the appropriate flag in the SwimProtocolCommandManager.
+        """
+        SwimProtocolCommandManager.enable = True
+
+    def disable_swim_protocol(self) -> None:
+        """
+        Disables the SWIM protocol by setting the appropriate flag in the SwimProtocolCommandManager.
+        """
+        SwimProtocolCommandManager.enable = False
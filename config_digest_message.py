@@ -0,0 +1,48 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict
+
+
+class ConfigDigestMessage(BaseMessage):
+    """
+    ConfigDigestMessage carries the version of every config section the sender holds, so the recipient can
+    request the sections it holds an older version of.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    versions : Dict[str, int]
+        The version of every config section the sender holds, by node name.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, versions: Dict[str, int]):
+        """
+        Initializes a new instance of ConfigDigestMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        versions : Dict[str, int]
+            The version of every config section the sender holds, by node name.
+        """
+        super().__init__(sender, recipient, 'config_digest')
+        self.versions: Dict[str, int] = versions
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the ConfigDigestMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the ConfigDigestMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'versions': self.versions})
+        return base_dict
@@ -0,0 +1,59 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict, List
+
+
+class ConfigLeavesMessage(BaseMessage):
+    """
+    ConfigLeavesMessage carries the config map entries of the Merkle tree leaf buckets that differ between the
+    sender and the recipient. The recipient merges them and, unless the message is itself a reply, answers with
+    the entries of those buckets the sender is missing or holds an older write of.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    sections : Dict[str, List]
+        The [address, entries] of each section with entries in the buckets, entries by service name.
+    buckets : List[str]
+        The prefixes of the leaf buckets compared.
+    is_reply : bool
+        Whether the message answers another ConfigLeavesMessage.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, sections: Dict[str, List], buckets: List[str], is_reply: bool = False):
+        """
+        Initializes a new instance of ConfigLeavesMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        sections : Dict[str, List]
+            The [address, entries] of each section with entries in the buckets.
+        buckets : List[str]
+            The prefixes of the leaf buckets compared.
+        is_reply : bool, optional
+            Whether the message answers another ConfigLeavesMessage (default is False).
+        """
+        super().__init__(sender, recipient, 'config_leaves')
+        self.sections: Dict[str, List] = sections
+        self.buckets: List[str] = buckets
+        self.is_reply: bool = is_reply
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the ConfigLeavesMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the ConfigLeavesMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'sections': self.sections, 'buckets': self.buckets, 'is_reply': self.is_reply})
+        return base_dict
@@ -1,11 +1,18 @@
+import json
+import zlib
+import base64
 from base_message import BaseMessage
 from hive_node import HiveNode
-from typing import Dict
+from app_settings import AppSettings
+from typing import Dict, Optional, Tuple, Union
 
 
 class ConfigMessage(BaseMessage):
     """
-    HeartbeatMessage represents a message for the heartbeat protocol in the Hive network.
+    ConfigMessage carries config sections in the Hive network. The sections travel in the 'payload' field of the
+    message, as a JSON object embedded in the message itself, or, once their JSON is larger than
+    AppSettings.CONFIG_COMPRESSION_THRESHOLD_IN_BYTES, as the base64 of their zlib compressed JSON, with
+    'payload_encoding' telling the two apart. The command is always just 'config'.
 
     Attributes:
     ----------
@@ -13,11 +20,17 @@ class ConfigMessage(BaseMessage):
         The sender node of the message.
     recipient : HiveNode
         The recipient node of the message.
+    sections : Dict
+        The carried sections by node name.
+    versions : Optional[Dict[str, int]]
+        The version of each carried section by node name, or None for the full, unversioned config sent by older nodes.
+    encoded_payload : Optional[Tuple[str, Union[Dict, str]]]
+        The payload encoding and payload, computed when the message is first serialised.
     """
 
-    def __init__(self, sender: HiveNode, recipient: HiveNode, command):
+    def __init__(self, sender: HiveNode, recipient: HiveNode, sections: Dict, versions: Optional[Dict[str, int]] = None):
         """
-        Initializes a new instance of HeartbeatMessage.
+        Initializes a new instance of ConfigMessage.
 
         Parameters:
         ----------
@@ -25,17 +38,85 @@ class ConfigMessage(BaseMessage):
             The sender node of the message.
         recipient : HiveNode
             The recipient node of the message.
+        sections : Dict
+            The carried sections by node name.
+        versions : Optional[Dict[str, int]], optional
+            The version of each carried section by node name (default is None).
         """
-        super().__init__(sender, recipient, command)
+        super().__init__(sender, recipient, 'config')
+        self.sections: Dict = sections
+        self.versions: Optional[Dict[str, int]] = versions
+        self.encoded_payload: Optional[Tuple[str, Union[Dict, str]]] = None
 
-    def to_dict(self) -> Dict[str, str]:
+    def to_dict(self) -> Dict:
         """
-        Converts the HeartbeatMessage instance to a dictionary representation.
+        Converts the ConfigMessage instance to a dictionary representation.
 
         Returns:
         -------
-        Dict[str, str]
-            A dictionary representing the HeartbeatMessage instance.
+        Dict
+            A dictionary representing the ConfigMessage instance.
         """
-        base_dict: Dict[str, str] = super().to_dict()
+        if self.encoded_payload is None:
+            self.encoded_payload = self.encode_payload(self.sections)
+        payload_encoding, payload = self.encoded_payload
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'payload_encoding': payload_encoding, 'payload': payload})
+        if self.versions is not None:
+            base_dict.update({'versions': self.versions})
         return base_dict
+
+    @staticmethod
+    def encode_payload(sections: Dict, threshold: int = AppSettings.CONFIG_COMPRESSION_THRESHOLD_IN_BYTES) -> Tuple[str, Union[Dict, str]]:
+        """
+        Returns the payload encoding and payload of sections.
+
+        Parameters:
+        ----------
+        sections : Dict
+            The sections by node name.
+        threshold : int, optional
+            The JSON size in bytes above which the sections are compressed (default is AppSettings.CONFIG_COMPRESSION_THRESHOLD_IN_BYTES).
+
+        Returns:
+        -------
+        Tuple[str, Union[Dict, str]]
+            ('json', the sections) or ('zlib', the base64 of the compressed JSON of the sections).
+        """
+        sections_json: bytes = json.dumps(sections, separators=(',', ':')).encode()
+        if len(sections_json) <= threshold:
+            return 'json', sections
+        return 'zlib', base64.b64encode(zlib.compress(sections_json, AppSettings.CONFIG_COMPRESSION_LEVEL)).decode('ascii')
+
+    @staticmethod
+    def decode_payload(data_dict: Dict) -> Dict:
+        """
+        Returns the sections of a received config message dictionary, raising ValueError if its payload cannot be
+        decoded or decompresses to more than AppSettings.MAX_FRAME_SIZE_IN_BYTES. Messages of older nodes, without a payload, carry the sections as JSON after 'config ' in the command.
+
+        Parameters:
+        ----------
+        data_dict : Dict
+            The dictionary of the received message.
+
+        Returns:
+        -------
+        Dict
+            The sections by node name.
+        """
+        if 'payload' not in data_dict:
+            return json.loads(data_dict['command'][7:])
+        payload_encoding: str = data_dict.get('payload_encoding', 'json')
+        if payload_encoding == 'json':
+            return data_dict['payload']
+        if payload_encoding == 'zlib':
+            try:
+                # Bound the decompressed size, so a small payload cannot expand without limit
+                decompressor = zlib.decompressobj()
+                data: bytes = decompressor.decompress(base64.b64decode(data_dict['payload']), AppSettings.MAX_FRAME_SIZE_IN_BYTES)
+            except zlib.error as e:
+                raise ValueError(f"Corrupt config payload: {e}")
+            if decompressor.unconsumed_tail:
+                raise ValueError(f"Config payload expands beyond {AppSettings.MAX_FRAME_SIZE_IN_BYTES} bytes")
+            return json.loads(data)
+        raise ValueError(f"Unknown config payload encoding: {payload_encoding}")
@@ -1,50 +1,496 @@
+import copy
 import time
 import json
+import threading
 from logger import Logger
 from hive_message import HiveMessage
 from message_queue import MessageQueue
 from app_settings import AppSettings
+from base_message import BaseMessage
 from config_message import ConfigMessage
+from config_digest_message import ConfigDigestMessage
+from config_request_message import ConfigRequestMessage
+from config_tree_message import ConfigTreeMessage
+from config_leaves_message import ConfigLeavesMessage
+from lww_map import LwwMap
+from merkle_tree import MerkleTree
+from hive_node import HiveNode
 from hive_node_manager import HiveNodeManager
 from monitor_service import ServiceMonitor
+from typing import Dict, List, Optional, Tuple
 
 
 class ConfigProtocolCommandManager:
+    """
+    ConfigProtocolCommandManager propagates the config of every node through the Hive network.
+
+    Each node owns the section of the config under its own name. The services of every section are held in a
+    last-writer-wins map CRDT (LwwMap), stamped from a hybrid logical clock: whenever the local node's services
+    change, the changed services are written, and the removed ones tombstoned, at the larger of the wall clock in
+    milliseconds and one past the highest timestamp seen. The version of a section is its highest timestamp.
+
+    Instead of sending the whole config every round, the manager sends a 'config_digest' with the version of every
+    section it holds to a random live node. The peer answers with a 'config_request' for the sections it holds an
+    older version of, and only those are sent back in a 'config' message carrying their map entries. Received
+    entries are merged, never copied over, so duplicated, reordered or concurrent messages cannot roll a section
+    back, and a single exchange brings a section up to date.
+
+    For large catalogs the manager can instead sync through a MerkleTree over the map entries of all sections,
+    keyed by (node name, service name). In 'merkle' mode it sends a 'config_tree' with its root hash; a peer whose
+    root differs answers with the hashes of its children, and the two descend alternately, one level per message,
+    into the sub-trees that differ only. At the leaf buckets the entries of the differing buckets are exchanged in
+    a 'config_leaves' message and its reply, so the cost of a resync grows with the number of differing entries
+    rather than with the size of the sections holding them.
+
+    Entries of the local section newer than the local ones, left over from an earlier run of the node on a clock
+    that was ahead, are superseded by writing the current value (or a tombstone) of their services again.
+
+    Attributes:
+    ----------
+    enable : bool
+        A class-level flag to enable or disable the config protocol.
+    COMMANDS : Tuple[str, ...]
+        The names of the commands handled by handle_message.
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    hive_node_manager : HiveNodeManager
+        Manages the nodes in the Hive network.
+    outbound_message_queue : MessageQueue
+        A queue for outbound messages.
+    service_monitor : ServiceMonitor
+        Holds the config, the name of the local section and the config lock, held while the config is read or
+        changed since the receiver, the service monitor and the config store use it from their own threads.
+    lock : threading.Lock
+        Serialises changes of the clock and the section versions. Taken before the config lock, never while holding it.
+    clock : int
+        The hybrid logical clock, the highest timestamp written or seen.
+    sections : Dict[str, LwwMap]
+        The services of every section held, by node name.
+    local_section_json : Optional[str]
+        The JSON of the local section when it was last written to its map, to notice local changes.
+    sync_mode : str
+        Either 'digest' to send section versions, or 'merkle' to send the Merkle tree root hash each round.
+    tree : MerkleTree
+        The Merkle tree over the map entries of every section held, kept up to date with every write.
+    """
 
     enable: bool = True
+    COMMANDS: Tuple[str, ...] = ('config_digest', 'config_request', 'config', 'config_tree', 'config_leaves')
 
-    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue, service_monitor):
-        
+    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue, service_monitor,
+                 sync_mode: str = AppSettings.CONFIG_SYNC_MODE):
+        """
+        Initializes a new instance of ConfigProtocolCommandManager.
+
+        Parameters:
+        ----------
+        hive_node_manager : HiveNodeManager
+            Manages the nodes in the Hive network.
+        outbound_message_queue : MessageQueue
+            A queue for outbound messages.
+        service_monitor : ServiceMonitor
+            Holds the config and the name of the local section.
+        sync_mode : str, optional
+            Either 'digest' or 'merkle' (default is AppSettings.CONFIG_SYNC_MODE).
+        """
         self.logger: Logger = Logger()
         self.hive_node_manager: HiveNodeManager = hive_node_manager
         self.outbound_message_queue: MessageQueue = outbound_message_queue
         self.service_monitor: ServiceMonitor = service_monitor
+        self.lock: threading.Lock = threading.Lock()
+        self.clock: int = 0
+        self.sections: Dict[str, LwwMap] = {}
+        self.local_section_json: Optional[str] = None
+        self.sync_mode: str = sync_mode
+        self.tree: MerkleTree = MerkleTree()
 
         self.logger.debug("ConfigProtocolCommandManager", "ConfigProtocolCommandManager initialized...")
 
     def run(self) -> None:
         """
-        Starts the config protocol by periodically sending config messages to random nodes in the network.
+        Starts the config protocol by periodically sending the section versions, or the Merkle tree root hash, to
+        random nodes in the network.
         """
         while True:
             if ConfigProtocolCommandManager.enable:
                 self.logger.debug("ConfigProtocolCommandManager", "Running...")
-                random_remote_node = self.hive_node_manager.get_random_live_node()
-                
-                if random_remote_node:
-                    self.logger.info("ConfigProtocolCommandManager", f"Sending config to {random_remote_node.friendly_name}...")
-                    config = json.dumps(self.service_monitor.config)
-                    command_str = f"config {config}"
-                    config_message = ConfigMessage(
-                        sender=self.hive_node_manager.local_node,
-                        recipient=random_remote_node,
-                        command=command_str
-                    )
-                    new_hive_message = HiveMessage(config_message)
-                    self.outbound_message_queue.enqueue(new_hive_message)
+                random_remote_node: Optional[HiveNode] = self.hive_node_manager.get_random_live_node()
+
+                if random_remote_node and self.sync_mode == 'merkle':
+                    self.logger.debug("ConfigProtocolCommandManager", f"Sending config tree root to {random_remote_node.friendly_name}...")
+                    self.send(ConfigTreeMessage(self.hive_node_manager.local_node, random_remote_node, {'': format(self.get_root_hash(), 'x')}))
+                elif random_remote_node:
+                    self.logger.debug("ConfigProtocolCommandManager", f"Sending config digest to {random_remote_node.friendly_name}...")
+                    self.send(ConfigDigestMessage(self.hive_node_manager.local_node, random_remote_node, self.get_versions()))
 
             time.sleep(AppSettings.HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS)
 
+    def handle_message(self, hive_message: HiveMessage) -> None:
+        """
+        Handles a received 'config_digest', 'config_request', versioned 'config', 'config_tree' or 'config_leaves' message.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The received message.
+        """
+        message = hive_message.message
+        command_name: str = message.command.split(' ', 1)[0]
+        if command_name == 'config_digest':
+            self.handle_digest(message)
+        elif command_name == 'config_request':
+            self.handle_request(message)
+        elif command_name == 'config':
+            self.handle_sections(message)
+        elif command_name == 'config_tree':
+            self.handle_tree(message)
+        elif command_name == 'config_leaves':
+            self.handle_leaves(message)
+
+    def handle_digest(self, message: ConfigDigestMessage) -> None:
+        """
+        Requests the sections the peer holds a newer version of, including the local one.
+
+        Parameters:
+        ----------
+        message : ConfigDigestMessage
+            The received digest.
+        """
+        self.stamp_local_section()
+        requested: List[str] = []
+        with self.lock:
+            for section_name, version in message.versions.items():
+                version = int(version)
+                self.clock = max(self.clock, version)
+                if version > self.get_section(section_name).version:
+                    requested.append(section_name)
+
+        if requested:
+            self.logger.info("ConfigProtocolCommandManager", f"Requesting config of {', '.join(requested)} from {message.sender.friendly_name}...")
+            self.send(ConfigRequestMessage(self.hive_node_manager.local_node, message.sender, requested))
+
+    def handle_request(self, message: ConfigRequestMessage) -> None:
+        """
+        Sends the address and map entries of the requested sections, with their versions.
+
+        Parameters:
+        ----------
+        message : ConfigRequestMessage
+            The received request.
+        """
+        self.stamp_local_section()
+        config: Dict = self.service_monitor.config
+        sections: Dict[str, List] = {}
+        versions: Dict[str, int] = {}
+        with self.lock, self.service_monitor.lock:
+            for section_name in message.section_names:
+                section: Optional[LwwMap] = self.sections.get(section_name)
+                if section is None or not section.entries:
+                    continue
+                address = config[section_name][0] if config.get(section_name) else None
+                sections[section_name] = [address, section.to_dict()]
+                versions[section_name] = section.version
+
+        if sections:
+            self.logger.info("ConfigProtocolCommandManager", f"Sending config of {', '.join(sections)} to {message.sender.friendly_name}...")
+            self.send(ConfigMessage(self.hive_node_manager.local_node, message.sender, sections, versions))
+
+    def handle_sections(self, message: ConfigMessage) -> None:
+        """
+        Merges the received map entries into the sections held, and saves the config if any service changed.
+        Newer entries of the local section are superseded instead of merged.
+
+        Parameters:
+        ----------
+        message : ConfigMessage
+            The received sections.
+        """
+        sections: Dict[str, List] = message.sections
+        with self.lock:
+            changed: bool = self.merge_sections(sections)
+
+        if changed:
+            self.service_monitor.save_config()
+        self.logger.info("ConfigProtocolCommandManager", f"Config of {', '.join(sections)} received from {message.sender.friendly_name}")
+
+    def handle_tree(self, message: ConfigTreeMessage) -> None:
+        """
+        Compares the received Merkle tree node hashes with the local ones. The entries of differing leaf buckets
+        are sent in a 'config_leaves' message, and the hashes of the children of the other differing nodes in a
+        'config_tree' message, for the peer to compare one level further down.
+
+        Parameters:
+        ----------
+        message : ConfigTreeMessage
+            The received tree node hashes.
+        """
+        self.stamp_local_section()
+        children: Dict[str, str] = {}
+        buckets: List[str] = []
+        with self.lock:
+            self.load_sections()
+            for prefix, node_hash in message.node_hashes.items():
+                if self.tree.get_hash(prefix) == int(node_hash, 16):
+                    continue
+                if self.tree.is_leaf(prefix):
+                    buckets.append(prefix)
+                else:
+                    children.update({child: format(child_hash, 'x') for child, child_hash in self.tree.get_children(prefix).items()})
+            sections: Dict[str, List] = self.get_bucket_sections(buckets, {})
+
+        if buckets:
+            self.logger.info("ConfigProtocolCommandManager", f"Sending config of {len(buckets)} differing buckets to {message.sender.friendly_name}...")
+            self.send(ConfigLeavesMessage(self.hive_node_manager.local_node, message.sender, sections, buckets))
+        if children:
+            self.logger.debug("ConfigProtocolCommandManager", f"Sending {len(children)} config tree hashes to {message.sender.friendly_name}...")
+            self.send(ConfigTreeMessage(self.hive_node_manager.local_node, message.sender, children))
+
+    def handle_leaves(self, message: ConfigLeavesMessage) -> None:
+        """
+        Merges the received entries of differing leaf buckets, and saves the config if any service changed. Unless
+        the message is a reply, answers with the entries of those buckets the peer is missing or holds an older write of.
+
+        Parameters:
+        ----------
+        message : ConfigLeavesMessage
+            The received bucket entries.
+        """
+        self.stamp_local_section()
+        with self.lock:
+            changed: bool = self.merge_sections(message.sections)
+            received: Dict[Tuple[str, str], List] = {(section_name, key): entry for section_name, (address, entries) in message.sections.items()
+                                                     for key, entry in entries.items()}
+            sections: Dict[str, List] = {} if message.is_reply else self.get_bucket_sections(message.buckets, received)
+
+        if changed:
+            self.service_monitor.save_config()
+        if sections:
+            self.logger.info("ConfigProtocolCommandManager", f"Sending config of {len(message.buckets)} differing buckets to {message.sender.friendly_name}...")
+            self.send(ConfigLeavesMessage(self.hive_node_manager.local_node, message.sender, sections, message.buckets, is_reply=True))
+
+    def merge_sections(self, sections: Dict[str, List]) -> bool:
+        """
+        Merges received map entries into the sections held and updates the config of the changed sections.
+        Newer entries of the local section are superseded instead of merged. Must be called holding the lock, the
+        config lock is taken here.
+
+        Parameters:
+        ----------
+        sections : Dict[str, List]
+            The [address, entries] of every received section, entries by service name.
+
+        Returns:
+        -------
+        bool
+            True if any service of the config changed, False otherwise.
+        """
+        local_name: str = self.service_monitor.local_name
+        config: Dict = self.service_monitor.config
+        changed: bool = False
+        with self.service_monitor.lock:
+            for section_name, (address, entries) in sections.items():
+                for entry in entries.values():
+                    self.clock = max(self.clock, int(entry[0]))
+                section: LwwMap = self.get_section(section_name)
+                if section_name == local_name:
+                    self.supersede_local_entries(section, entries)
+                    continue
+                merged: List[str] = section.merge(entries)
+                if merged:
+                    self.update_tree(section_name, section, merged)
+                    current = config.get(section_name)
+                    config[section_name] = [address if address is not None else (current[0] if current else None), section.get_values()]
+                    changed = True
+        return changed
+
+    def get_bucket_sections(self, buckets: List[str], received: Dict[Tuple[str, str], List]) -> Dict[str, List]:
+        """
+        Returns the local entries of the leaf buckets that differ from the received ones, grouped by section.
+        Must be called holding the lock.
+
+        Parameters:
+        ----------
+        buckets : List[str]
+            The prefixes of the leaf buckets.
+        received : Dict[Tuple[str, str], List]
+            The entries the peer sent for the buckets, by (section name, service name).
+
+        Returns:
+        -------
+        Dict[str, List]
+            The [address, entries] of every section with differing entries in the buckets, entries by service name.
+        """
+        config: Dict = self.service_monitor.config
+        sections: Dict[str, List] = {}
+        with self.service_monitor.lock:
+            for bucket_prefix in buckets:
+                for section_name, key in self.tree.get_keys(bucket_prefix):
+                    entry: List = list(self.sections[section_name].entries[key])
+                    if received.get((section_name, key)) == entry:
+                        continue
+                    if section_name not in sections:
+                        sections[section_name] = [config[section_name][0] if config.get(section_name) else None, {}]
+                    sections[section_name][1][key] = entry
+        return sections
+
+    def supersede_local_entries(self, section: LwwMap, entries: Dict[str, List]) -> None:
+        """
+        Writes the current value, or a tombstone, of every local service whose received entry is newer than the
+        local one. Must be called holding the lock.
+
+        Parameters:
+        ----------
+        section : LwwMap
+            The map of the local section.
+        entries : Dict[str, List]
+            The received [timestamp, writer, value] entries of the local section.
+        """
+        stale: List[str] = [key for key, entry in entries.items() if section.is_newer(key, entry)]
+        if not stale:
+            return
+        timestamp: int = self.tick()
+        local_name: str = self.service_monitor.local_name
+        for key in stale:
+            current = section.entries.get(key)
+            if current is None or current[2] is None:
+                section.remove(key, timestamp, local_name)
+            else:
+                section.set(key, current[2], timestamp, local_name)
+        self.update_tree(local_name, section, stale)
+        self.logger.info("ConfigProtocolCommandManager", f"Superseded {len(stale)} entries of the local config left from an earlier run...")
+
+    def get_section(self, section_name: str) -> LwwMap:
+        """
+        Returns the map of a section, creating it if needed. The services of a remote section known only from the
+        config file are written at timestamp 0, so any entry received for them wins. Must be called holding the lock.
+
+        Parameters:
+        ----------
+        section_name : str
+            The node name of the section.
+
+        Returns:
+        -------
+        LwwMap
+            The map of the section.
+        """
+        section: Optional[LwwMap] = self.sections.get(section_name)
+        if section is None:
+            with self.service_monitor.lock:
+                stored = self.service_monitor.config.get(section_name)
+                if section_name != self.service_monitor.local_name and stored and len(stored) > 1:
+                    section = LwwMap.from_values(stored[1])
+                else:
+                    section = LwwMap()
+            if section.entries:
+                self.update_tree(section_name, section, list(section.entries))
+            self.sections[section_name] = section
+        return section
+
+    def load_sections(self) -> None:
+        """
+        Creates the map of every section of the config not held yet. Must be called holding the lock.
+        """
+        with self.service_monitor.lock:
+            section_names: List[str] = list(self.service_monitor.config)
+        for section_name in section_names:
+            self.get_section(section_name)
+
+    def update_tree(self, section_name: str, section: LwwMap, keys: List[str]) -> None:
+        """
+        Updates the Merkle tree with the latest writes of keys of a section. Must be called holding the lock.
+
+        Parameters:
+        ----------
+        section_name : str
+            The node name of the section.
+        section : LwwMap
+            The map of the section.
+        keys : List[str]
+            The keys written.
+        """
+        for key in keys:
+            self.tree.update((section_name, key), list(section.entries[key]))
+
+    def get_root_hash(self) -> int:
+        """
+        Returns the root hash of the Merkle tree, writing the local changes to the local section first.
+
+        Returns:
+        -------
+        int
+            The root hash of the Merkle tree.
+        """
+        self.stamp_local_section()
+        with self.lock:
+            self.load_sections()
+            return self.tree.get_hash('')
+
+    def get_versions(self) -> Dict[str, int]:
+        """
+        Returns the version of every section held, writing the local changes to the local section first.
+
+        Returns:
+        -------
+        Dict[str, int]
+            The version of every section held, by node name.
+        """
+        self.stamp_local_section()
+        with self.lock:
+            self.load_sections()
+            return {section_name: section.version for section_name, section in self.sections.items() if section.version > 0}
+
+    def stamp_local_section(self) -> None:
+        """
+        Writes the local services that changed since the local section was last stamped to its map, and tombstones
+        the removed ones, all at the next clock value. The local section is serialised and copied holding the config lock.
+        """
+        local_name: str = self.service_monitor.local_name
+        with self.lock:
+            section: LwwMap = self.get_section(local_name)
+            with self.service_monitor.lock:
+                local_section = self.service_monitor.config.get(local_name)
+                section_json: str = json.dumps(local_section, sort_keys=True)
+                if section_json == self.local_section_json:
+                    return
+                self.local_section_json = section_json
+                services: Dict = local_section[1] if local_section and len(local_section) > 1 else {}
+                values: Dict = section.get_values()
+                # Copy the changed rows, the config may change once the config lock is released
+                changed: Dict = {key: copy.deepcopy(value) for key, value in services.items() if values.get(key) != value}
+                removed: List[str] = [key for key in values if key not in services]
+            if not changed and not removed:
+                return
+            timestamp: int = self.tick()
+            for key, value in changed.items():
+                section.set(key, value, timestamp, local_name)
+            for key in removed:
+                section.remove(key, timestamp, local_name)
+            self.update_tree(local_name, section, list(changed) + removed)
+
+    def tick(self) -> int:
+        """
+        Advances the clock for a new write to the local section. Must be called holding the lock.
+
+        Returns:
+        -------
+        int
+            The new timestamp, the larger of the wall clock in milliseconds and one past the highest timestamp seen.
+        """
+        self.clock = max(self.clock + 1, int(time.time() * 1000))
+        return self.clock
+
+    def send(self, message: BaseMessage) -> None:
+        """
+        Enqueues a config protocol message in the outbound message queue.
+
+        Parameters:
+        ----------
+        message : BaseMessage
+            The message to send.
+        """
+        self.outbound_message_queue.enqueue(HiveMessage(message))
+
     def enable_config_protocol(self) -> None:
         """
         Enables the config protocol by setting the appropriate flag.
@@ -0,0 +1,47 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict, List
+
+
+class ConfigRequestMessage(BaseMessage):
+    """
+    ConfigRequestMessage asks the recipient for the config sections it holds a newer version of.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    section_names : List[str]
+        The node names of the requested config sections.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, section_names: List[str]):
+        """
+        Initializes a new instance of ConfigRequestMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        section_names : List[str]
+            The node names of the requested config sections.
+        """
+        super().__init__(sender, recipient, 'config_request')
+        self.section_names: List[str] = section_names
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the ConfigRequestMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the ConfigRequestMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'section_names': self.section_names})
+        return base_dict
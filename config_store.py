@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import threading
+from logger import Logger
+from app_settings import AppSettings
+from typing import Callable, Dict, Optional, Tuple
+
+
+class ConfigStore:
+    """
+    ConfigStore is the single writer of the config file of the local node. Components that change the config mark
+    it dirty instead of writing it themselves; a background thread writes the whole config at most once per flush
+    interval, however many changes were made in between, so disk writes follow the flush interval rather than the
+    number of received messages.
+
+    Writes are atomic: the config is written and fsync'd to a temporary file next to the config file, which then
+    replaces it with a rename, so a reader, or a restart after a crash, sees either the previous or the new config
+    and never a partly written one. Writes hold the config file lock.
+
+    The local section can still be edited by hand in the config file. Before every write, and whenever
+    adopt_external_changes is called, a config file changed since the store last wrote it is read back, and a
+    local section edited there replaces the local section in memory.
+
+    Attributes:
+    ----------
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    file_name : str
+        The path of the config file.
+    config : Dict
+        The config, shared with the components changing it.
+    local_name : str
+        The name of the local section of the config.
+    lock : FileLock
+        The config file lock, held while the file is read or replaced.
+    flush_interval : float
+        The minimum number of seconds between two writes.
+    condition : threading.Condition
+        Guards the dirty flag and wakes the flush thread when the config is marked dirty.
+    dirty : bool
+        Whether the config changed since it was last written.
+    last_flush : float
+        The monotonic time of the latest write.
+    file_signature : Optional[Tuple[int, int, int]]
+        The (inode, size, modification time) of the config file as last written or read, to notice edits.
+    local_section_json : Optional[str]
+        The JSON of the local section as last written or read, to tell edited local sections apart.
+    write_count : int
+        The number of times the config file was written.
+    on_external_change : Optional[Callable[[], None]]
+        Called after a local section edited in the config file is adopted, or None.
+    """
+
+    def __init__(self, file_name: str, config: Dict, local_name: str, lock,
+                 flush_interval: float = AppSettings.CONFIG_FLUSH_INTERVAL_IN_SECONDS):
+        """
+        Initializes a new instance of ConfigStore for a config loaded from the file, or a new config.
+
+        Parameters:
+        ----------
+        file_name : str
+            The path of the config file.
+        config : Dict
+            The config, shared with the components changing it.
+        local_name : str
+            The name of the local section of the config.
+        lock : FileLock
+            The config file lock.
+        flush_interval : float, optional
+            The minimum number of seconds between two writes (default is AppSettings.CONFIG_FLUSH_INTERVAL_IN_SECONDS).
+        """
+        self.logger: Logger = Logger()
+        self.file_name: str = file_name
+        self.config: Dict = config
+        self.local_name: str = local_name
+        self.lock = lock
+        self.flush_interval: float = flush_interval
+        self.condition: threading.Condition = threading.Condition()
+        self.dirty: bool = False
+        self.last_flush: float = 0.0
+        self.file_signature: Optional[Tuple[int, int, int]] = self.get_file_signature()
+        self.local_section_json: Optional[str] = json.dumps(config.get(local_name), sort_keys=True)
+        self.write_count: int = 0
+        self.on_external_change: Optional[Callable[[], None]] = None
+
+    def run(self) -> None:
+        """
+        Writes the config whenever it has been marked dirty, at most once per flush interval.
+        """
+        while True:
+            with self.condition:
+                while not self.dirty:
+                    self.condition.wait()
+            # Let the changes of the rest of the interval collect before writing them together
+            delay: float = self.last_flush + self.flush_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.flush()
+
+    def mark_dirty(self) -> None:
+        """
+        Records that the config changed, for the flush thread to write it.
+        """
+        with self.condition:
+            if not self.dirty:
+                self.dirty = True
+                self.condition.notify()
+
+    def flush(self) -> bool:
+        """
+        Writes the config to the config file now if it is dirty, first adopting a local section edited in the file.
+
+        Returns:
+        -------
+        bool
+            True if the config file was written, False otherwise.
+        """
+        with self.condition:
+            if not self.dirty:
+                return False
+            self.dirty = False
+
+        try:
+            with self.lock.acquire(timeout=5):
+                self.read_external_changes()
+                config_json: str = json.dumps(self.config, indent=4)
+                local_section_json: str = json.dumps(self.config.get(self.local_name), sort_keys=True)
+                temporary_file_name: str = f"{self.file_name}.tmp"
+                with open(temporary_file_name, 'w') as file:
+                    file.write(config_json)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temporary_file_name, self.file_name)
+                self.file_signature = self.get_file_signature()
+                self.local_section_json = local_section_json
+        except (OSError, RuntimeError) as e:
+            # RuntimeError: the config changed while it was serialised, write it again next interval
+            self.logger.warning("ConfigStore", f"Failed to write {self.file_name}, retrying: {e}")
+            self.mark_dirty()
+            return False
+        finally:
+            self.last_flush = time.monotonic()
+
+        self.write_count += 1
+        self.logger.debug("ConfigStore", f"Wrote {self.file_name}")
+        return True
+
+    def adopt_external_changes(self) -> bool:
+        """
+        Replaces the local section in memory with the one in the config file if it was edited there since the store
+        last wrote or read the file. Only the file's metadata is read while it is unchanged.
+
+        Returns:
+        -------
+        bool
+            True if an edited local section was adopted, False otherwise.
+        """
+        if self.get_file_signature() == self.file_signature:
+            return False
+        try:
+            with self.lock.acquire(timeout=1):
+                return self.read_external_changes()
+        except (OSError, ValueError):
+            return False
+
+    def read_external_changes(self) -> bool:
+        """
+        Adopts a local section edited in the config file since the store last wrote or read it. Must be called
+        holding the config file lock.
+
+        Returns:
+        -------
+        bool
+            True if an edited local section was adopted, False otherwise.
+        """
+        file_signature: Optional[Tuple[int, int, int]] = self.get_file_signature()
+        if file_signature is None or file_signature == self.file_signature:
+            return False
+        self.file_signature = file_signature
+        try:
+            with open(self.file_name, 'r') as file:
+                stored_config: Dict = json.load(file)
+        except ValueError as e:
+            self.logger.warning("ConfigStore", f"Ignoring unreadable {self.file_name}: {e}")
+            return False
+
+        local_section = stored_config.get(self.local_name)
+        local_section_json: str = json.dumps(local_section, sort_keys=True)
+        if local_section is None or local_section_json == self.local_section_json:
+            return False
+        self.local_section_json = local_section_json
+        self.config[self.local_name] = local_section
+        self.logger.info("ConfigStore", f"Local config edited in {self.file_name}, adopting it")
+        if self.on_external_change is not None:
+            self.on_external_change()
+        return True
+
+    def get_file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Returns the (inode, size, modification time) of the config file, or None if it does not exist.
+        """
+        try:
+            stat_result: os.stat_result = os.stat(self.file_name)
+        except OSError:
+            return None
+        return stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
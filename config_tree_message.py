@@ -0,0 +1,48 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict
+
+
+class ConfigTreeMessage(BaseMessage):
+    """
+    ConfigTreeMessage carries hashes of nodes of the sender's config Merkle tree, for the recipient to compare
+    against its own tree during anti-entropy.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    node_hashes : Dict[str, str]
+        The hex hash of each tree node, by the prefix naming it.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, node_hashes: Dict[str, str]):
+        """
+        Initializes a new instance of ConfigTreeMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        node_hashes : Dict[str, str]
+            The hex hash of each tree node, by the prefix naming it.
+        """
+        super().__init__(sender, recipient, 'config_tree')
+        self.node_hashes: Dict[str, str] = node_hashes
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the ConfigTreeMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the ConfigTreeMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'node_hashes': self.node_hashes})
+        return base_dict
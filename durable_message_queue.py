@@ -0,0 +1,263 @@
+import json
+from typing import Dict, List, Optional, Set
+from hive_node import HiveNode
+from hive_message import HiveMessage
+from base_message import BaseMessage
+from ack_message import AckMessage
+from connect_message import ConnectMessage
+from heartbeat_message import HeartbeatMessage
+from gossip_message import GossipMessage
+from gossip_digest_message import GossipDigestMessage
+from gossip_delta_message import GossipDeltaMessage
+from config_message import ConfigMessage
+from config_digest_message import ConfigDigestMessage
+from config_request_message import ConfigRequestMessage
+from config_tree_message import ConfigTreeMessage
+from config_leaves_message import ConfigLeavesMessage
+from swim_message import SwimMessage
+from message_queue import MessageQueue
+from write_ahead_log import WriteAheadLog
+from app_settings import AppSettings
+
+
+class DurableMessageQueue(MessageQueue):
+    """
+    DurableMessageQueue is a MessageQueue whose messages survive a restart. Every enqueued message, including
+    its send attempt count, is written to a WriteAheadLog keyed by its message id, and is only removed from the
+    log once the consumer marks it complete (delivered or given up on) or a newer message replaces it.
+    On startup the undelivered messages are replayed into the queue. Replay runs before any peer is known, so the
+    recipient of a replayed message is looked up in the node manager again each time the message is dequeued,
+    until the node manager knows it and failures can be counted against it.
+
+    Attributes:
+    ----------
+    wal : WriteAheadLog
+        The write-ahead log holding every undelivered message.
+    hive_node_manager : Optional[HiveNodeManager]
+        The node manager the replayed messages were resolved with, or None before replay.
+    unresolved_message_ids : Set[str]
+        The ids of the replayed messages whose recipient the node manager did not know yet.
+    """
+
+    def __init__(self, queue_name: str, directory: str, priority_lanes: Optional[Dict[str, int]] = None,
+                 group_commit_interval: float = AppSettings.WAL_GROUP_COMMIT_INTERVAL_IN_SECONDS):
+        """
+        Initializes a new instance of DurableMessageQueue.
+
+        Parameters:
+        ----------
+        queue_name : str
+            The name of the queue.
+        directory : str
+            The directory holding the write-ahead log segments.
+        priority_lanes : Optional[Dict[str, int]], optional
+            The lane names and weights in priority order (default is AppSettings.MESSAGE_PRIORITY_LANES).
+        group_commit_interval : float, optional
+            The number of seconds log appends are collected before they are committed together, or 0 to fsync every append.
+        """
+        super().__init__(queue_name, priority_lanes)
+        self.wal: WriteAheadLog = WriteAheadLog(directory, group_commit_interval=group_commit_interval)
+        self.hive_node_manager = None
+        self.unresolved_message_ids: Set[str] = set()
+
+    def enqueue(self, hive_message: HiveMessage, not_before: float = 0.0) -> None:
+        """
+        Logs a message and adds it to the queue. With AppSettings.WAL_SYNC_COMMIT the message is on disk before this returns.
+        The not-before time is not logged, so a message replayed after a restart is due at once.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message to be added to the queue.
+        not_before : float, optional
+            The monotonic time before which the message is not dequeued (default is 0, at once).
+        """
+        record: Dict = {
+            'message_id': hive_message.message_id,
+            'send_attempt_count': hive_message.send_attempt_count,
+            'created_timestamp': hive_message.created_timestamp,
+            'message': hive_message.message.to_dict(),
+        }
+        self.wal.put(hive_message.message_id, json.dumps(record).encode(), wait_for_commit=AppSettings.WAL_SYNC_COMMIT)
+        super().enqueue(hive_message, not_before)
+
+    def message_discarded(self, hive_message: HiveMessage) -> None:
+        """
+        Removes a message replaced by a newer one from the log.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message that was dropped.
+        """
+        self.complete(hive_message)
+        super().message_discarded(hive_message)
+
+    def complete(self, hive_message: HiveMessage) -> None:
+        """
+        Removes a dequeued message from the log once it has been delivered or given up on.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The finished message.
+        """
+        self.unresolved_message_ids.discard(hive_message.message_id)
+        self.wal.delete(hive_message.message_id)
+
+    def dequeue(self, timeout: Optional[float] = 0) -> Optional[HiveMessage]:
+        """
+        Removes and returns the next HiveMessage from the queue, with the recipient of a replayed message resolved.
+
+        Parameters:
+        ----------
+        timeout : Optional[float], optional
+            The number of seconds to wait for a message. 0 (the default) returns immediately and None waits indefinitely.
+
+        Returns:
+        -------
+        Optional[HiveMessage]
+            The next message in the queue, or None if the queue is still empty after the timeout.
+        """
+        hive_message: Optional[HiveMessage] = super().dequeue(timeout)
+        if hive_message is not None and self.unresolved_message_ids:
+            self.resolve_recipients([hive_message])
+        return hive_message
+
+    def dequeue_many(self, max_n: int, timeout: Optional[float] = 0) -> List[HiveMessage]:
+        """
+        Removes and returns up to max_n HiveMessages from the queue, with the recipients of replayed messages resolved.
+
+        Parameters:
+        ----------
+        max_n : int
+            The maximum number of messages to return.
+        timeout : Optional[float], optional
+            The number of seconds to wait for a message. 0 (the default) returns immediately and None waits indefinitely.
+
+        Returns:
+        -------
+        List[HiveMessage]
+            The messages removed from the queue in dequeue order, empty if the queue is still empty after the timeout.
+        """
+        hive_messages: List[HiveMessage] = super().dequeue_many(max_n, timeout)
+        if self.unresolved_message_ids:
+            self.resolve_recipients(hive_messages)
+        return hive_messages
+
+    def resolve_recipients(self, hive_messages: List[HiveMessage]) -> None:
+        """
+        Links the replayed messages whose recipient the node manager now knows to its HiveNode.
+
+        Parameters:
+        ----------
+        hive_messages : List[HiveMessage]
+            The dequeued messages.
+        """
+        for hive_message in hive_messages:
+            if hive_message.message_id not in self.unresolved_message_ids:
+                continue
+            recipient: HiveNode = hive_message.message.recipient
+            node: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(recipient.ip_address, int(recipient.port_number))
+            if node is not None:
+                hive_message.message.recipient = node
+                self.unresolved_message_ids.discard(hive_message.message_id)
+
+    def replay(self, hive_node_manager) -> int:
+        """
+        Adds every undelivered message in the log back to the queue, in the order they were first enqueued.
+        Recipients known to the node manager are linked to their HiveNode so failures are counted against it,
+        the others are looked up again when their message is dequeued.
+
+        Parameters:
+        ----------
+        hive_node_manager : HiveNodeManager
+            The node manager used to resolve the sender and recipient of each message.
+
+        Returns:
+        -------
+        int
+            The number of messages replayed.
+        """
+        self.hive_node_manager = hive_node_manager
+        replayed: int = 0
+        for message_id, payload in self.wal.get_live_records().items():
+            try:
+                record: Dict = json.loads(payload.decode())
+                message: Optional[BaseMessage] = self.decode_message(record['message'], hive_node_manager)
+            except (ValueError, KeyError) as e:
+                self.logger.warning("DurableMessageQueue", f"Skipping unreadable message {message_id} in {self.queue_name} queue: {e}")
+                message = None
+            if message is None:
+                self.wal.delete(message_id)
+                continue
+
+            hive_message: HiveMessage = HiveMessage(message)
+            hive_message.message_id = message_id
+            hive_message.send_attempt_count = record['send_attempt_count']
+            hive_message.created_timestamp = record['created_timestamp']
+            recipient: HiveNode = message.recipient
+            if hive_node_manager.get_node_by_ip_address_and_port(recipient.ip_address, int(recipient.port_number)) is None:
+                self.unresolved_message_ids.add(message_id)
+            # Already in the log, so skip DurableMessageQueue.enqueue
+            super().enqueue(hive_message)
+            replayed += 1
+
+        self.logger.info("DurableMessageQueue", f"Replayed {replayed} undelivered messages into {self.queue_name} queue")
+        return replayed
+
+    def decode_message(self, data_dict: Dict, hive_node_manager) -> Optional[BaseMessage]:
+        """
+        Rebuilds a message from its dictionary representation.
+
+        Parameters:
+        ----------
+        data_dict : Dict
+            The dictionary produced by the message's to_dict.
+        hive_node_manager : HiveNodeManager
+            The node manager used to resolve the sender and recipient.
+
+        Returns:
+        -------
+        Optional[BaseMessage]
+            The message, or None if its command is unknown.
+        """
+        sender: HiveNode = self.resolve_node(hive_node_manager, data_dict['source_friendly_name'], data_dict['source_ip_address'], data_dict['source_port'])
+        recipient: HiveNode = self.resolve_node(hive_node_manager, data_dict['destination_friendly_name'], data_dict['destination_ip_address'], data_dict['destination_port'])
+        command: str = data_dict['command']
+
+        if command == 'connect':
+            return ConnectMessage(sender, recipient, data_dict.get('message', 'Hello'))
+        elif command == 'heartbeat':
+            return HeartbeatMessage(sender, recipient)
+        elif command == 'gossip':
+            return GossipMessage(sender, recipient, data_dict['nodes'])
+        elif command == 'gossip_digest':
+            return GossipDigestMessage(sender, recipient, data_dict['digest_hash'], data_dict.get('versions'))
+        elif command == 'gossip_delta':
+            return GossipDeltaMessage(sender, recipient, data_dict['nodes'], data_dict.get('requested', []))
+        elif command in ('ping', 'ping_req', 'ping_ack'):
+            return SwimMessage(sender, recipient, command, int(data_dict['sequence_number']), data_dict.get('updates', []), data_dict.get('target'))
+        elif command == 'ack_message':
+            return AckMessage(sender, recipient)
+        elif command == 'config_digest':
+            return ConfigDigestMessage(sender, recipient, data_dict['versions'])
+        elif command == 'config_request':
+            return ConfigRequestMessage(sender, recipient, data_dict['section_names'])
+        elif command == 'config_tree':
+            return ConfigTreeMessage(sender, recipient, data_dict['node_hashes'])
+        elif command == 'config_leaves':
+            return ConfigLeavesMessage(sender, recipient, data_dict['sections'], data_dict['buckets'], bool(data_dict.get('is_reply')))
+        elif command.split(' ', 1)[0] == 'config':
+            return ConfigMessage(sender, recipient, ConfigMessage.decode_payload(data_dict), data_dict.get('versions'))
+
+        self.logger.warning("DurableMessageQueue", f"Unknown command in {self.queue_name} queue log: {command}")
+        return None
+
+    @staticmethod
+    def resolve_node(hive_node_manager, friendly_name: str, ip_address: str, port_number: int) -> HiveNode:
+        """
+        Returns the known node at the address, or a new HiveNode if the node manager does not know it.
+        """
+        node: Optional[HiveNode] = hive_node_manager.get_node_by_ip_address_and_port(ip_address, int(port_number))
+        return node if node is not None else HiveNode(friendly_name, ip_address, int(port_number))
@@ -0,0 +1,53 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict, List, Optional
+
+
+class GossipDeltaMessage(BaseMessage):
+    """
+    GossipDeltaMessage carries the membership entries a peer is missing or holds a stale version of, found by
+    comparing digests, together with the entries the sender wants back from the peer.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    nodes : Dict[str, Dict]
+        The entries by 'ip_address:port_number', each with friendly_name, ip_address, port_number and version.
+    requested : List[str]
+        The 'ip_address:port_number' of the entries the sender wants the recipient to send back.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, nodes: Dict[str, Dict], requested: Optional[List[str]] = None):
+        """
+        Initializes a new instance of GossipDeltaMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        nodes : Dict[str, Dict]
+            The entries by 'ip_address:port_number'.
+        requested : Optional[List[str]], optional
+            The entries the sender wants back (default is None, meaning none).
+        """
+        super().__init__(sender, recipient, 'gossip_delta')
+        self.nodes: Dict[str, Dict] = nodes
+        self.requested: List[str] = requested if requested is not None else []
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the GossipDeltaMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the GossipDeltaMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'nodes': self.nodes, 'requested': self.requested})
+        return base_dict
@@ -0,0 +1,54 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict, Optional
+
+
+class GossipDigestMessage(BaseMessage):
+    """
+    GossipDigestMessage opens a delta gossip exchange in the Hive network. The first digest of an exchange only
+    carries a hash of the sender's membership versions; a recipient whose hash differs answers with a digest
+    carrying the versions themselves, so the two nodes can work out which entries are missing or stale.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    digest_hash : str
+        The hash of the sender's membership versions.
+    versions : Optional[Dict[str, int]]
+        The version of every node the sender knows by 'ip_address:port_number', or None for a hash-only digest.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, digest_hash: str, versions: Optional[Dict[str, int]] = None):
+        """
+        Initializes a new instance of GossipDigestMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        digest_hash : str
+            The hash of the sender's membership versions.
+        versions : Optional[Dict[str, int]], optional
+            The version of every node the sender knows, or None for a hash-only digest (default is None).
+        """
+        super().__init__(sender, recipient, 'gossip_digest')
+        self.digest_hash: str = digest_hash
+        self.versions: Optional[Dict[str, int]] = versions
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the GossipDigestMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the GossipDigestMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'digest_hash': self.digest_hash, 'versions': self.versions})
+        return base_dict
@@ -1,32 +1,61 @@
-import time
+import hashlib
 from logger import Logger
 from hive_message import HiveMessage
 from message_queue import MessageQueue
-from app_settings import AppSettings
-from gossip_message import GossipMessage
+from base_message import BaseMessage
+from gossip_digest_message import GossipDigestMessage
+from gossip_delta_message import GossipDeltaMessage
+from gossip_schedule import GossipSchedule
+from hive_node import HiveNode
 from hive_node_manager import HiveNodeManager
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 
 class GossipProtocolCommandManager:
     """
     GossipProtocolCommandManager manages the gossip protocol for the Hive network.
 
+    Every node in the membership table carries a version, its incarnation number, which only the node itself
+    raises (each run of a node starts from a new one). Instead of sending its whole node list every round, the
+    manager runs a delta push-pull exchange with a random live node:
+
+    1. It sends a 'gossip_digest' holding only a hash of its (node, version) pairs. A peer with the same hash is
+       already in sync and the exchange ends there.
+    2. A peer whose hash differs answers with a 'gossip_digest' holding its versions.
+    3. The manager answers with a 'gossip_delta' holding the entries the peer is missing or has an older
+       version of, and asking for the entries it is missing or has an older version of itself.
+    4. The peer applies the entries and sends the requested ones back in a final 'gossip_delta'.
+
+    Each round opens an exchange with GossipSchedule.fanout peers. The rounds follow a GossipSchedule: fast while
+    the local digest changes or peers turn out to be out of sync, backing off to
+    AppSettings.GOSSIP_PROTOCOL_FREQUENCY_IN_SECONDS once the cluster has had time to converge.
+
     Attributes:
     ----------
     enable : bool
         A class-level flag to enable or disable the gossip protocol.
+    COMMANDS : Tuple[str, ...]
+        The commands of the delta gossip exchange handled by handle_message.
     logger : Logger
         An instance of the Logger class for logging messages.
     hive_node_manager : HiveNodeManager
         Manages the nodes in the Hive network.
     outbound_message_queue : MessageQueue
         A queue for outbound messages.
+    schedule : GossipSchedule
+        Decides the fan-out and when the next round runs.
+    last_digest_hash : Optional[str]
+        The hash of the local digest at the previous round, to notice local changes.
+    applied_version_count : int
+        The number of node versions raised by received deltas, part of the key of the cached digest.
+    digest_cache : Optional[Tuple[Tuple[int, int, int], Dict[str, int], str]]
+        The key, versions and hash of the last computed digest, reused until the membership table or a version changes.
     """
 
     enable: bool = True
+    COMMANDS: Tuple[str, ...] = ('gossip_digest', 'gossip_delta')
 
-    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue):
+    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue, schedule: Optional[GossipSchedule] = None):
         """
         Initializes a new instance of GossipProtocolCommandManager.
 
@@ -36,41 +65,235 @@ class GossipProtocolCommandManager:
             Manages the nodes in the Hive network.
         outbound_message_queue : MessageQueue
             A queue for outbound messages.
+        schedule : Optional[GossipSchedule], optional
+            The schedule of the gossip rounds (default is a GossipSchedule with the AppSettings intervals and fan-out).
         """
         self.logger: Logger = Logger()
         self.hive_node_manager: HiveNodeManager = hive_node_manager
         self.outbound_message_queue: MessageQueue = outbound_message_queue
+        self.schedule: GossipSchedule = schedule if schedule is not None else GossipSchedule()
+        self.last_digest_hash: Optional[str] = None
+        self.applied_version_count: int = 0
+        self.digest_cache: Optional[Tuple[Tuple[int, int, int], Dict[str, int], str]] = None
 
         self.logger.debug("GossipProtocolCommandManager", "GossipProtocolCommandManager initialized...")
 
     def run(self) -> None:
         """
-        Starts the gossip protocol by periodically sending gossip messages to random nodes in the network.
+        Starts the gossip protocol by opening gossip exchanges with random nodes in the network on every round of the schedule.
         """
         while True:
             if GossipProtocolCommandManager.enable:
                 self.logger.debug("GossipProtocolCommandManager", "Running...")
+                self.gossip_once()
 
-                # Pick a random node
-                random_node = self.hive_node_manager.get_random_live_node()
-
-                if random_node:
-                    nodes_info: Dict[str, Dict[str, str]] = {
-                        node.friendly_name: {'ip_address': node.ip_address, 'port_number': str(node.port_number)}
-                        for node in self.hive_node_manager.get_all_live_nodes()
-                    }
-
-                    gossip_message: GossipMessage = GossipMessage(
-                        sender=self.hive_node_manager.local_node,
-                        recipient=random_node,
-                        nodes=nodes_info
-                    )
-                    new_hive_message: HiveMessage = HiveMessage(gossip_message)
-                    self.outbound_message_queue.enqueue(new_hive_message)
-                else:
-                    self.logger.debug("GossipProtocolCommandManager", "No live nodes found...")
-
-            time.sleep(AppSettings.GOSSIP_PROTOCOL_FREQUENCY_IN_SECONDS)
+            self.schedule.complete_round(len(self.hive_node_manager.live_nodes) + 1)
+            self.schedule.wait()
+
+    def gossip_once(self, now: Optional[float] = None) -> None:
+        """
+        Opens gossip exchanges by sending a hash-only digest to as many random live nodes as the fan-out.
+        A digest that changed since the previous round counts as a change for the schedule.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic time of the round (default is the current time).
+        """
+        _, digest_hash = self.get_digest()
+        if digest_hash != self.last_digest_hash:
+            if self.last_digest_hash is not None:
+                self.schedule.record_change(now)
+            self.last_digest_hash = digest_hash
+
+        random_nodes: List[HiveNode] = self.hive_node_manager.get_random_live_nodes(self.schedule.fanout)
+        if not random_nodes:
+            self.logger.debug("GossipProtocolCommandManager", "No live nodes found...")
+            return
+
+        for random_node in random_nodes:
+            self.send(GossipDigestMessage(self.hive_node_manager.local_node, random_node, digest_hash))
+
+    def handle_message(self, hive_message: HiveMessage, now: Optional[float] = None) -> None:
+        """
+        Handles a received 'gossip_digest' or 'gossip_delta' message.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The received message.
+        now : Optional[float], optional
+            The monotonic time the message is handled at (default is the current time).
+        """
+        message = hive_message.message
+        if message.command == 'gossip_digest':
+            self.handle_digest(message, now)
+        elif message.command == 'gossip_delta':
+            self.handle_delta(message, now)
+
+    def handle_digest(self, message: GossipDigestMessage, now: Optional[float] = None) -> None:
+        """
+        Answers a hash-only digest that does not match with the local versions, and a digest carrying versions
+        with the delta of entries the peer needs and the list of entries it should send back. A digest that does
+        not match counts as a change for the schedule.
+
+        Parameters:
+        ----------
+        message : GossipDigestMessage
+            The received digest.
+        now : Optional[float], optional
+            The monotonic time the digest is handled at (default is the current time).
+        """
+        versions, digest_hash = self.get_digest()
+        if message.versions is None:
+            if digest_hash == message.digest_hash:
+                self.logger.debug("GossipProtocolCommandManager", f"In sync with {message.sender.friendly_name}...")
+                return
+            self.schedule.record_change(now)
+            self.send(GossipDigestMessage(self.hive_node_manager.local_node, message.sender, digest_hash, versions))
+            return
+
+        newer: List[str] = [key for key, version in versions.items() if message.versions.get(key, -1) < version]
+        requested: List[str] = [key for key, version in message.versions.items() if versions.get(key, -1) < int(version)]
+        if newer or requested:
+            self.send(GossipDeltaMessage(self.hive_node_manager.local_node, message.sender, self.get_entries(newer), requested))
+
+    def handle_delta(self, message: GossipDeltaMessage, now: Optional[float] = None) -> None:
+        """
+        Applies the entries of a delta and sends back the entries it requests. Received entries count as a change for the schedule.
+
+        Parameters:
+        ----------
+        message : GossipDeltaMessage
+            The received delta.
+        now : Optional[float], optional
+            The monotonic time the delta is handled at (default is the current time).
+        """
+        if message.nodes:
+            self.apply_entries(message.nodes)
+            self.schedule.record_change(now)
+        if message.requested:
+            entries: Dict[str, Dict] = self.get_entries(message.requested)
+            if entries:
+                self.send(GossipDeltaMessage(self.hive_node_manager.local_node, message.sender, entries))
+
+        self.logger.info("GossipProtocolCommandManager", f"Handled gossip delta of {len(message.nodes)} nodes from {message.sender.friendly_name}")
+
+    def apply_entries(self, entries: Dict[str, Dict]) -> None:
+        """
+        Adds the unknown nodes of a delta in one new version of the membership table, and updates the known nodes
+        whose version in the delta is newer. A newer version means the node has been restarted, so it is marked 'Live'.
+        A version of the local node at or above its own, left over from an earlier run, is superseded by raising it.
+
+        Parameters:
+        ----------
+        entries : Dict[str, Dict]
+            The entries by 'ip_address:port_number', each with friendly_name, ip_address, port_number and version.
+        """
+        new_nodes: List[HiveNode] = []
+        for entry in entries.values():
+            port_number: int = int(entry['port_number'])
+            version: int = int(entry['version'])
+            node: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(entry['ip_address'], port_number)
+            if node is None:
+                new_node: HiveNode = HiveNode(entry['friendly_name'], entry['ip_address'], port_number)
+                new_node.incarnation = version
+                new_nodes.append(new_node)
+            elif node.is_local_node:
+                if version >= node.incarnation:
+                    node.incarnation = version + 1
+                    self.applied_version_count += 1
+            elif version > node.incarnation:
+                node.incarnation = version
+                self.applied_version_count += 1
+                node.friendly_name = entry['friendly_name']
+                node.node_is_alive()
+        if new_nodes:
+            self.hive_node_manager.add_nodes(new_nodes)
+
+    def get_digest(self) -> Tuple[Dict[str, int], str]:
+        """
+        Returns the versions of the known nodes and their hash, computed again only when the membership table,
+        the local node's version or a version raised by a received delta has changed since the last call.
+
+        Returns:
+        -------
+        Tuple[Dict[str, int], str]
+            The version of every known node by 'ip_address:port_number', which must not be changed, and its hash.
+        """
+        cache_key: Tuple[int, int, int] = (self.hive_node_manager.snapshot.version, self.hive_node_manager.local_node.incarnation, self.applied_version_count)
+        digest_cache = self.digest_cache
+        if digest_cache is None or digest_cache[0] != cache_key:
+            versions: Dict[str, int] = self.get_versions()
+            digest_cache = (cache_key, versions, self.get_digest_hash(versions))
+            self.digest_cache = digest_cache
+        return digest_cache[1], digest_cache[2]
+
+    def get_versions(self) -> Dict[str, int]:
+        """
+        Returns the version of every known node, live or dead, by 'ip_address:port_number'. Whether a node is live
+        is each node's own observation, so it is not part of the exchanged state.
+
+        Returns:
+        -------
+        Dict[str, int]
+            The version of every known node.
+        """
+        return {f"{node.ip_address}:{node.port_number}": node.incarnation for node in self.hive_node_manager.hive_nodes}
+
+    def get_entries(self, keys: List[str]) -> Dict[str, Dict]:
+        """
+        Returns the delta entries of the known nodes among the keys.
+
+        Parameters:
+        ----------
+        keys : List[str]
+            The 'ip_address:port_number' of the entries.
+
+        Returns:
+        -------
+        Dict[str, Dict]
+            The entries by 'ip_address:port_number', each with friendly_name, ip_address, port_number and version.
+        """
+        entries: Dict[str, Dict] = {}
+        for key in keys:
+            ip_address, _, port_number = key.rpartition(':')
+            node: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(ip_address, int(port_number))
+            if node is not None:
+                entries[key] = {'friendly_name': node.friendly_name, 'ip_address': node.ip_address,
+                                'port_number': int(node.port_number), 'version': node.incarnation}
+        return entries
+
+    @staticmethod
+    def get_digest_hash(versions: Dict[str, int]) -> str:
+        """
+        Returns a hash of the versions that is the same on every node holding the same versions.
+
+        Parameters:
+        ----------
+        versions : Dict[str, int]
+            The version of every known node by 'ip_address:port_number'.
+
+        Returns:
+        -------
+        str
+            The hex digest of the sorted (node, version) pairs.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for key in sorted(versions):
+            digest.update(f"{key}={versions[key]};".encode())
+        return digest.hexdigest()
+
+    def send(self, message: BaseMessage) -> None:
+        """
+        Enqueues a gossip message in the outbound message queue.
+
+        Parameters:
+        ----------
+        message : BaseMessage
+            The message to send.
+        """
+        self.outbound_message_queue.enqueue(HiveMessage(message))
 
     def enable_gossip_protocol(self) -> None:
         """
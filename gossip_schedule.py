@@ -0,0 +1,133 @@
+import math
+import time
+import threading
+from typing import Optional
+from app_settings import AppSettings
+
+
+class GossipSchedule:
+    """
+    GossipSchedule decides when the next gossip round runs. While membership is changing rounds run every
+    min_interval; once no change has been seen for as many rounds as a change needs to reach the whole cluster,
+    the interval doubles every round until it reaches max_interval. Any new change drops it back to min_interval
+    and wakes a waiting gossip loop, much like the Trickle algorithm (RFC 6206).
+
+    A change reaches every node of a cluster of n nodes in about log(n) / log(fanout + 1) push-pull rounds,
+    so larger clusters and smaller fan-outs stay at the fast interval for longer.
+
+    Attributes:
+    ----------
+    min_interval : float
+        The number of seconds between rounds while membership is changing.
+    max_interval : float
+        The number of seconds between rounds while membership is stable.
+    fanout : int
+        The number of random peers gossiped with per round.
+    interval : float
+        The current number of seconds between rounds.
+    rounds_since_change : int
+        The number of rounds completed since the last change.
+    next_round_time : float
+        The monotonic time at which the next round is due.
+    lock : threading.Lock
+        Serialises updates of the schedule from the gossip loop and the message handlers.
+    changed : threading.Event
+        Set when a change moves the next round forward, to wake the waiting gossip loop.
+    """
+
+    def __init__(self,
+                 min_interval: float = AppSettings.GOSSIP_MIN_INTERVAL_IN_SECONDS,
+                 max_interval: float = AppSettings.GOSSIP_PROTOCOL_FREQUENCY_IN_SECONDS,
+                 fanout: int = AppSettings.GOSSIP_FANOUT):
+        """
+        Initializes a new instance of GossipSchedule. The first round is due immediately, at the fast interval.
+
+        Parameters:
+        ----------
+        min_interval : float, optional
+            The number of seconds between rounds while membership is changing.
+        max_interval : float, optional
+            The number of seconds between rounds while membership is stable.
+        fanout : int, optional
+            The number of random peers gossiped with per round.
+        """
+        self.min_interval: float = min_interval
+        self.max_interval: float = max(max_interval, min_interval)
+        self.fanout: int = max(fanout, 1)
+        self.interval: float = min_interval
+        self.rounds_since_change: int = 0
+        self.next_round_time: float = 0.0
+        self.lock: threading.Lock = threading.Lock()
+        self.changed: threading.Event = threading.Event()
+
+    def get_convergence_rounds(self, cluster_size: int) -> int:
+        """
+        Returns the number of rounds a change is expected to need to reach every node of the cluster.
+
+        Parameters:
+        ----------
+        cluster_size : int
+            The number of nodes in the cluster, including the local node.
+
+        Returns:
+        -------
+        int
+            The expected number of rounds, at least 1.
+        """
+        if cluster_size <= 2:
+            return 1
+        return math.ceil(math.log(cluster_size) / math.log(self.fanout + 1))
+
+    def record_change(self, now: Optional[float] = None) -> None:
+        """
+        Drops the interval back to min_interval after a membership change and moves the next round forward if it
+        was due later.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic time of the change (default is the current time).
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.interval = self.min_interval
+            self.rounds_since_change = 0
+            if now + self.min_interval < self.next_round_time:
+                self.next_round_time = now + self.min_interval
+                self.changed.set()
+
+    def complete_round(self, cluster_size: int, now: Optional[float] = None) -> float:
+        """
+        Schedules the round after the one just completed, backing the interval off once the last change should
+        have reached the whole cluster.
+
+        Parameters:
+        ----------
+        cluster_size : int
+            The number of nodes in the cluster, including the local node.
+        now : Optional[float], optional
+            The monotonic time the round completed (default is the current time).
+
+        Returns:
+        -------
+        float
+            The monotonic time at which the next round is due.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.rounds_since_change += 1
+            if self.rounds_since_change > self.get_convergence_rounds(cluster_size):
+                self.interval = min(self.interval * 2, self.max_interval)
+            self.next_round_time = now + self.interval
+            return self.next_round_time
+
+    def wait(self) -> None:
+        """
+        Blocks until the next round is due, waking early when a change moves it forward.
+        """
+        while True:
+            remaining: float = self.next_round_time - time.monotonic()
+            if remaining <= 0:
+                return
+            self.changed.wait(remaining)
+            self.changed.clear()
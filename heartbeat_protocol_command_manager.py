@@ -44,24 +44,32 @@ class HeartbeatProtocolCommandManager:
 
     def run(self) -> None:
         """
-        Starts the heartbeat protocol by periodically sending heartbeat messages to random nodes in the network.
+        Starts the heartbeat protocol by periodically sending a heartbeat message to every live node in the network.
+        The interval stays fixed, since the phi accrual failure detectors of the receiving nodes expect heartbeats
+        at a steady rate.
         """
         while True:
             if HeartbeatProtocolCommandManager.enable:
                 self.logger.debug("HeartbeatProtocolCommandManager", "Running...")
-                random_remote_node = self.hive_node_manager.get_random_live_node()
-
-                if random_remote_node:
-                    self.logger.info("HeartbeatProtocolCommandManager", f"Sending heartbeat to {random_remote_node.friendly_name}...")
-                    heartbeat_message = HeartbeatMessage(
-                        sender=self.hive_node_manager.local_node,
-                        recipient=random_remote_node
-                    )
-                    new_hive_message = HiveMessage(heartbeat_message)
-                    self.outbound_message_queue.enqueue(new_hive_message)
+                self.send_heartbeats()
 
             time.sleep(AppSettings.HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS)
 
+    def send_heartbeats(self) -> None:
+        """
+        Queues a heartbeat message to every live node, suspect nodes included. Every peer then hears from this node
+        once per interval, so the gaps between its heartbeats stay regular, and a suspect node that is only slow is
+        cleared by the next heartbeat that reaches it instead of being left out and suspected for longer.
+        """
+        for remote_node in self.hive_node_manager.live_nodes:
+            self.logger.info("HeartbeatProtocolCommandManager", f"Sending heartbeat to {remote_node.friendly_name}...")
+            heartbeat_message = HeartbeatMessage(
+                sender=self.hive_node_manager.local_node,
+                recipient=remote_node
+            )
+            new_hive_message = HiveMessage(heartbeat_message)
+            self.outbound_message_queue.enqueue(new_hive_message)
+
     def enable_heartbeat_protocol(self) -> None:
         """
         Enables the heartbeat protocol by setting the appropriate flag.
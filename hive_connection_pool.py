@@ -0,0 +1,186 @@
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from logger import Logger
+from app_settings import AppSettings
+
+
+class HiveConnectionPool:
+    """
+    HiveConnectionPool keeps TCP connections to peers open between messages so each message does not pay
+    for a new handshake. Idle connections are keyed by (ip_address, port_number), checked for liveness before
+    they are reused, closed after an idle timeout and capped per peer and in total.
+
+    Attributes:
+    ----------
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    max_idle_connections_per_peer : int
+        The maximum number of idle connections kept for a single peer.
+    max_idle_connections : int
+        The maximum number of idle connections kept across all peers.
+    idle_timeout : float
+        The number of seconds an idle connection is kept before it is closed.
+    idle_connections : Dict[Tuple[str, int], Deque[Tuple[socket.socket, float]]]
+        The idle connections per peer address, with the monotonic time they were released.
+    idle_connection_count : int
+        The total number of idle connections in the pool.
+    lock : threading.Lock
+        Guards idle_connections and idle_connection_count.
+    """
+
+    def __init__(self,
+                 max_idle_connections_per_peer: int = AppSettings.SENDER_MAX_IDLE_CONNECTIONS_PER_PEER,
+                 max_idle_connections: int = AppSettings.SENDER_MAX_IDLE_CONNECTIONS,
+                 idle_timeout: float = AppSettings.SENDER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS):
+        """
+        Initializes a new instance of HiveConnectionPool.
+
+        Parameters:
+        ----------
+        max_idle_connections_per_peer : int, optional
+            The maximum number of idle connections kept for a single peer.
+        max_idle_connections : int, optional
+            The maximum number of idle connections kept across all peers.
+        idle_timeout : float, optional
+            The number of seconds an idle connection is kept before it is closed.
+        """
+        self.logger: Logger = Logger()
+        self.max_idle_connections_per_peer: int = max_idle_connections_per_peer
+        self.max_idle_connections: int = max_idle_connections
+        self.idle_timeout: float = idle_timeout
+        self.idle_connections: Dict[Tuple[str, int], Deque[Tuple[socket.socket, float]]] = {}
+        self.idle_connection_count: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def acquire(self, address: Tuple[str, int], connect_timeout: Optional[float] = None) -> Tuple[socket.socket, bool]:
+        """
+        Returns a connection to the peer, reusing a live idle connection when one is available.
+
+        Parameters:
+        ----------
+        address : Tuple[str, int]
+            The (ip_address, port_number) of the peer.
+        connect_timeout : Optional[float], optional
+            The number of seconds to wait when a new connection has to be opened (default is no timeout).
+
+        Returns:
+        -------
+        Tuple[socket.socket, bool]
+            The connected socket, and True if it was reused from the pool or False if it was newly opened.
+        """
+        while True:
+            with self.lock:
+                connections = self.idle_connections.get(address)
+                if not connections:
+                    break
+                connection, released_at = connections.pop()
+                self.idle_connection_count -= 1
+                if not connections:
+                    del self.idle_connections[address]
+
+            if time.monotonic() - released_at < self.idle_timeout and self.is_connection_alive(connection):
+                self.logger.debug("HiveConnectionPool", f"Reusing connection to {address[0]}:{address[1]}")
+                return connection, True
+            self.logger.debug("HiveConnectionPool", f"Evicting dead or expired connection to {address[0]}:{address[1]}")
+            self.discard(connection)
+
+        self.logger.debug("HiveConnectionPool", f"Opening connection to {address[0]}:{address[1]}")
+        return socket.create_connection(address, timeout=connect_timeout), False
+
+    def release(self, address: Tuple[str, int], connection: socket.socket) -> None:
+        """
+        Returns a healthy connection to the pool, or closes it if the pool is full.
+
+        Parameters:
+        ----------
+        address : Tuple[str, int]
+            The (ip_address, port_number) of the peer.
+        connection : socket.socket
+            The connection to return.
+        """
+        with self.lock:
+            connections = self.idle_connections.setdefault(address, deque())
+            if len(connections) < self.max_idle_connections_per_peer and self.idle_connection_count < self.max_idle_connections:
+                connections.append((connection, time.monotonic()))
+                self.idle_connection_count += 1
+                return
+            if not connections:
+                del self.idle_connections[address]
+        self.discard(connection)
+
+    def discard(self, connection: socket.socket) -> None:
+        """
+        Closes a connection that must not be reused.
+
+        Parameters:
+        ----------
+        connection : socket.socket
+            The connection to close.
+        """
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+    def evict_expired_connections(self) -> None:
+        """
+        Closes every idle connection that has exceeded the idle timeout.
+        """
+        expired = []
+        now = time.monotonic()
+        with self.lock:
+            for address in list(self.idle_connections):
+                connections = self.idle_connections[address]
+                while connections and now - connections[0][1] >= self.idle_timeout:
+                    expired.append(connections.popleft()[0])
+                    self.idle_connection_count -= 1
+                if not connections:
+                    del self.idle_connections[address]
+        for connection in expired:
+            self.discard(connection)
+
+    def close_all(self) -> None:
+        """
+        Closes every idle connection in the pool.
+        """
+        with self.lock:
+            connections = [connection for idle in self.idle_connections.values() for connection, _ in idle]
+            self.idle_connections = {}
+            self.idle_connection_count = 0
+        for connection in connections:
+            self.discard(connection)
+
+    @staticmethod
+    def is_connection_alive(connection: socket.socket) -> bool:
+        """
+        Checks whether an idle connection is still usable. An idle connection should have nothing to read,
+        so a readable socket means the peer closed it (or sent unexpected data) and it must be evicted.
+
+        Parameters:
+        ----------
+        connection : socket.socket
+            The idle connection to check.
+
+        Returns:
+        -------
+        bool
+            True if the connection can be reused, False otherwise.
+        """
+        timeout = connection.gettimeout()
+        try:
+            connection.setblocking(False)
+            data = connection.recv(1, socket.MSG_PEEK)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            try:
+                connection.settimeout(timeout)
+            except OSError:
+                pass
+        # Readable: either the peer closed the connection (b'') or sent data nobody asked for
+        return False
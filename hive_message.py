@@ -1,4 +1,6 @@
 import json
+import time
+import uuid
 from base_message import BaseMessage
 from typing import Dict
 
@@ -14,6 +16,10 @@ class HiveMessage:
         The actual message content to be sent between nodes.
     send_attempt_count : int
         The number of attempts made to send this message.
+    created_timestamp : float
+        The time at which the message was created, used to decide which of two queued messages is newer.
+    message_id : str
+        A unique identifier of the message, kept across send attempts.
     """
 
     def __init__(self, message: BaseMessage):
@@ -27,6 +33,8 @@ class HiveMessage:
         """
         self.message: BaseMessage = message
         self.send_attempt_count: int = 0
+        self.created_timestamp: float = time.time()
+        self.message_id: str = uuid.uuid4().hex
 
     def get_json_message_as_dict(self) -> Dict:
         """
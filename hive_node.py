@@ -1,6 +1,7 @@
 import datetime
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from app_settings import AppSettings
+from phi_accrual_failure_detector import PhiAccrualFailureDetector
 
 
 class HiveNode:
@@ -24,6 +25,13 @@ class HiveNode:
         The number of consecutive failed connection attempts to this node.
     is_local_node : bool
         Indicates whether this node is the local node.
+    status_listeners : List[Callable[[HiveNode], None]]
+        Called with the node whenever its status changes between 'Live' and 'Dead'.
+    incarnation : int
+        The incarnation number of the node, used as its version by delta gossip and the SWIM protocol. Only the node
+        itself raises it: at startup, and in the SWIM protocol to refute a suspicion.
+    failure_detector : Optional[PhiAccrualFailureDetector]
+        Tracks the heartbeat arrivals of the node, created when its first heartbeat arrives.
     """
 
     headers = {
@@ -57,26 +65,103 @@ class HiveNode:
         self.status: str = "Live"
         self.failed_connection_count: int = 0
         self.is_local_node: bool = is_local_node
+        self.status_listeners: List[Callable[['HiveNode'], None]] = []
+        self.incarnation: int = 0
+        self.failure_detector: Optional[PhiAccrualFailureDetector] = None
 
-    def set_last_heartbeat_timestamp(self) -> None:
+    def set_last_heartbeat_timestamp(self, now: Optional[float] = None) -> None:
         """
-        Sets the last heartbeat timestamp to the current time and resets the failed connection count.
+        Sets the last heartbeat timestamp to the current time, records the heartbeat with the failure detector
+        and resets the failed connection count.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic arrival time of the heartbeat (default is the current time).
         """
         self.last_heartbeat_timestamp = datetime.datetime.now()
+        if self.failure_detector is None:
+            self.failure_detector = PhiAccrualFailureDetector()
+        self.failure_detector.heartbeat(now)
         self.failed_connection_count = 0
         self.node_is_alive()
 
+    def get_phi(self) -> float:
+        """
+        Returns the phi accrual suspicion level of the node, 0 if no heartbeat has arrived from it yet.
+
+        Returns:
+        -------
+        float
+            The suspicion level phi.
+        """
+        return self.failure_detector.phi() if self.failure_detector else 0.0
+
+    def is_suspect(self, now: Optional[float] = None) -> bool:
+        """
+        Returns whether the node's heartbeats are late enough that it is suspected to have failed.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic time to evaluate the suspicion at (default is the current time).
+
+        Returns:
+        -------
+        bool
+            True if the suspicion level has reached AppSettings.PHI_SUSPICION_THRESHOLD, False otherwise.
+        """
+        return self.failure_detector is not None and self.failure_detector.is_suspect(now=now)
+
     def node_is_dead(self) -> None:
         """
-        Sets the node status to 'Dead'.
+        Sets the node status to 'Dead', notifying the status listeners if it was 'Live'.
         """
-        self.status = "Dead"
+        self.set_status("Dead")
 
     def node_is_alive(self) -> None:
         """
-        Sets the node status to 'Live'.
+        Sets the node status to 'Live', notifying the status listeners if it was 'Dead'.
+        """
+        self.set_status("Live")
+
+    def set_status(self, status: str) -> None:
+        """
+        Sets the node status and notifies the status listeners if it changed.
+
+        Parameters:
+        ----------
+        status : str
+            The new status, either 'Live' or 'Dead'.
+        """
+        if self.status == status:
+            return
+        self.status = status
+        for listener in self.status_listeners:
+            listener(self)
+
+    def add_status_listener(self, listener: Callable[['HiveNode'], None]) -> None:
+        """
+        Registers a callback that is called with the node whenever its status changes.
+
+        Parameters:
+        ----------
+        listener : Callable[[HiveNode], None]
+            The callback to register.
+        """
+        self.status_listeners.append(listener)
+
+    def remove_status_listener(self, listener: Callable[['HiveNode'], None]) -> None:
+        """
+        Unregisters a callback added with add_status_listener, if it is registered.
+
+        Parameters:
+        ----------
+        listener : Callable[[HiveNode], None]
+            The callback to unregister.
         """
-        self.status = "Live"
+        if listener in self.status_listeners:
+            self.status_listeners.remove(listener)
 
     def increase_failed_connection_count(self) -> None:
         """
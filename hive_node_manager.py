@@ -1,7 +1,9 @@
 import random
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from logger import Logger
 from hive_node import HiveNode
+from membership_snapshot import MembershipSnapshot
 from app_settings import AppSettings
 
 
@@ -10,12 +12,19 @@ class HiveNodeManager:
     HiveNodeManager is responsible for managing the list of nodes in the network.
     It provides methods to add, remove, and list nodes, as well as to get random live nodes.
 
+    The membership table is published as immutable MembershipSnapshot versions. Readers take the current snapshot
+    and iterate or index it without locking, while writers serialise on a lock, build the next version from the
+    current one and publish it with a single reference assignment. Lookups and random peer selection are constant
+    time; each change copies the table, so batches of new nodes should be added together with add_nodes.
+
     Attributes:
     ----------
     logger : Logger
         An instance of the Logger class for logging messages.
-    hive_nodes : List[HiveNode]
-        The list of nodes in the network.
+    snapshot : MembershipSnapshot
+        The current version of the membership table.
+    write_lock : threading.Lock
+        Serialises the writers publishing new versions of the membership table.
     local_node : HiveNode
         The local node instance managed by this manager.
     """
@@ -30,12 +39,27 @@ class HiveNodeManager:
             The local node instance managed by this manager.
         """
         self.logger: Logger = Logger()
-        self.hive_nodes: List[HiveNode] = []
+        self.snapshot: MembershipSnapshot = MembershipSnapshot(0, (), {}, (), {})
+        self.write_lock: threading.Lock = threading.Lock()
         self.local_node: HiveNode = local_node
         self.add_node(local_node)
 
         self.logger.debug("HiveNodeManager", "HiveNodeManager initialized...")
 
+    @property
+    def hive_nodes(self) -> Tuple[HiveNode, ...]:
+        """
+        The nodes in the network, from the current snapshot of the membership table.
+        """
+        return self.snapshot.nodes
+
+    @property
+    def live_nodes(self) -> Tuple[HiveNode, ...]:
+        """
+        The live nodes in the network excluding the local node, from the current snapshot of the membership table.
+        """
+        return self.snapshot.live_nodes
+
     def add_node(self, new_node: HiveNode) -> None:
         """
         Adds a new node to the list of nodes. If the node already exists, it updates the node's friendly name.
@@ -45,15 +69,37 @@ class HiveNodeManager:
         new_node : HiveNode
             The node to be added to the list.
         """
-        existing_node: Optional[HiveNode] = self.get_node_by_ip_address_and_port(new_node.ip_address, new_node.port_number)
+        self.add_nodes([new_node])
 
-        if existing_node:
-            self.logger.info("HiveNodeManager", f"Node {new_node.friendly_name} already exists in the node list...")
-            self.logger.debug("HiveNodeManager", f"Updating node {existing_node.ip_address}:{existing_node.port_number} from {existing_node.friendly_name} to {new_node.friendly_name}...")
-            existing_node.friendly_name = new_node.friendly_name
-        else:
-            self.logger.info("HiveNodeManager", f"Node {new_node.friendly_name} does not exist in the node list...")
-            self.hive_nodes.append(new_node)
+    def add_nodes(self, new_nodes: List[HiveNode]) -> None:
+        """
+        Adds new nodes to the list of nodes, publishing a single new version of the membership table.
+        Nodes that already exist have their friendly name updated instead.
+
+        Parameters:
+        ----------
+        new_nodes : List[HiveNode]
+            The nodes to be added to the list.
+        """
+        with self.write_lock:
+            snapshot: MembershipSnapshot = self.snapshot
+            added: Dict[Tuple[str, int], HiveNode] = {}
+            for new_node in new_nodes:
+                node_key: Tuple[str, int] = self.get_node_key(new_node.ip_address, new_node.port_number)
+                existing_node: Optional[HiveNode] = snapshot.node_index.get(node_key) or added.get(node_key)
+
+                if existing_node:
+                    self.logger.info("HiveNodeManager", f"Node {new_node.friendly_name} already exists in the node list...")
+                    self.logger.debug("HiveNodeManager", f"Updating node {existing_node.ip_address}:{existing_node.port_number} from {existing_node.friendly_name} to {new_node.friendly_name}...")
+                    existing_node.friendly_name = new_node.friendly_name
+                else:
+                    self.logger.info("HiveNodeManager", f"Node {new_node.friendly_name} does not exist in the node list...")
+                    added[node_key] = new_node
+
+            if added:
+                for new_node in added.values():
+                    new_node.add_status_listener(self.on_node_status_changed)
+                self.snapshot = snapshot.with_nodes(added.items())
 
     def remove_node(self, node_to_remove: HiveNode) -> None:
         """
@@ -64,45 +110,72 @@ class HiveNodeManager:
         node_to_remove : HiveNode
             The node to be removed from the list.
         """
-        self.hive_nodes = [node for node in self.hive_nodes if not (node.ip_address == node_to_remove.ip_address and node.port_number == node_to_remove.port_number)]
+        node_key: Tuple[str, int] = self.get_node_key(node_to_remove.ip_address, node_to_remove.port_number)
+        with self.write_lock:
+            removed_node: Optional[HiveNode] = self.snapshot.node_index.get(node_key)
+            if removed_node is None:
+                return
+            removed_node.remove_status_listener(self.on_node_status_changed)
+            self.snapshot = self.snapshot.without_node(node_key)
 
     def list_nodes(self) -> None:
         """
         Logs the list of nodes in the network, including their details.
         """
+        hive_nodes: Tuple[HiveNode, ...] = self.hive_nodes
         col_widths = {
-            'friendly_name': max(len(HiveNode.headers['friendly_name']), max(len(node.friendly_name) for node in self.hive_nodes)) + 1, # +1 for * indicating local node
-            'ip_address': max(len(HiveNode.headers['ip_address']), max(len(node.ip_address) for node in self.hive_nodes)),
-            'port': max(len(HiveNode.headers['port']), max(len(str(node.port_number)) for node in self.hive_nodes)),
-            'status': max(len(HiveNode.headers['status']), max(len(node.status) for node in self.hive_nodes)),
-            'last_heartbeat': max(len(HiveNode.headers['last_heartbeat']), max(len(str(node.last_heartbeat_timestamp)) for node in self.hive_nodes)),
-            'Failed Connections': max(len('Failed Connections'), max(len(str(node.failed_connection_count)) for node in self.hive_nodes)),
+            'friendly_name': max(len(HiveNode.headers['friendly_name']), max(len(node.friendly_name) for node in hive_nodes)) + 1, # +1 for * indicating local node
+            'ip_address': max(len(HiveNode.headers['ip_address']), max(len(node.ip_address) for node in hive_nodes)),
+            'port': max(len(HiveNode.headers['port']), max(len(str(node.port_number)) for node in hive_nodes)),
+            'status': max(len(HiveNode.headers['status']), max(len(node.status) for node in hive_nodes)),
+            'last_heartbeat': max(len(HiveNode.headers['last_heartbeat']), max(len(str(node.last_heartbeat_timestamp)) for node in hive_nodes)),
+            'Failed Connections': max(len('Failed Connections'), max(len(str(node.failed_connection_count)) for node in hive_nodes)),
         }
 
         self.logger.info("HiveNodeManager", "-" * AppSettings.LOG_LINE_WIDTH)
         self.logger.info("HiveNodeManager", self.local_node.get_node_list_row_header_as_str(col_widths))
         self.logger.info("HiveNodeManager", self.local_node.get_node_list_row_separator_as_str(col_widths))
 
-        for node in self.hive_nodes:
+        for node in hive_nodes:
             self.logger.info("HiveNodeManager", node.get_node_list_row_as_str(col_widths))
         self.logger.info("HiveNodeManager", "-" * AppSettings.LOG_LINE_WIDTH)
 
     def get_random_live_node(self) -> Optional[HiveNode]:
         """
-        Returns a random live node from the list of nodes, excluding the local node.
+        Returns a random live node from the list of nodes, excluding the local node and suspect nodes.
 
         Returns:
         -------
         Optional[HiveNode]
             A random live node, or None if no live nodes are available.
         """
-        live_nodes: List[HiveNode] = [node for node in self.hive_nodes if node.status == "Live"]
-        live_nodes = [node for node in live_nodes if node != self.local_node]
+        nodes: List[HiveNode] = self.get_random_live_nodes(1)
+        return nodes[0] if nodes else None
+
+    def get_random_live_nodes(self, count: int) -> List[HiveNode]:
+        """
+        Returns up to count distinct random live nodes, excluding the local node and nodes whose phi accrual
+        suspicion level has reached AppSettings.PHI_SUSPICION_THRESHOLD, for the gossip and config fan-out. Heartbeats
+        go to every live node, suspect or not, so a suspect node is cleared once it is heard from again. The live
+        nodes are only scanned for unsuspected nodes if the random sample contained suspect ones.
+
+        Parameters:
+        ----------
+        count : int
+            The number of nodes to pick.
+
+        Returns:
+        -------
+        List[HiveNode]
+            The picked nodes, fewer than count if not enough live nodes are available.
+        """
+        live_nodes: Tuple[HiveNode, ...] = self.live_nodes
+        sample: List[HiveNode] = random.sample(live_nodes, min(count, len(live_nodes)))
+        if not any(node.is_suspect() for node in sample):
+            return sample
 
-        if len(live_nodes) > 0:
-            random_node_index = random.randint(0, len(live_nodes) - 1)
-            return live_nodes[random_node_index]
-        return None
+        candidates: List[HiveNode] = [node for node in live_nodes if not node.is_suspect()]
+        return random.sample(candidates, min(count, len(candidates)))
 
     def get_node_by_ip_address_and_port(self, source_ip_address: str, source_port: int) -> Optional[HiveNode]:
         """
@@ -120,12 +193,7 @@ class HiveNodeManager:
         Optional[HiveNode]
             The node with the specified IP address and port, or None if no such node exists.
         """
-        source_node: HiveNode = HiveNode("temp", source_ip_address, source_port)
-
-        for node in self.hive_nodes:
-            if node == source_node:
-                return node
-        return None
+        return self.snapshot.node_index.get(self.get_node_key(source_ip_address, source_port))
 
     def get_all_live_nodes(self) -> List[HiveNode]:
         """
@@ -136,4 +204,41 @@ class HiveNodeManager:
         List[HiveNode]
             A list of all live nodes.
         """
-        return [node for node in self.hive_nodes if node.status == "Live"]
+        live_nodes: List[HiveNode] = list(self.live_nodes)
+        if self.local_node.status == "Live":
+            live_nodes.insert(0, self.local_node)
+        return live_nodes
+
+    def on_node_status_changed(self, node: HiveNode) -> None:
+        """
+        Adds a remote node to the live nodes when it becomes 'Live' and removes it when it becomes 'Dead'.
+
+        Parameters:
+        ----------
+        node : HiveNode
+            The node whose status changed.
+        """
+        node_key: Tuple[str, int] = self.get_node_key(node.ip_address, node.port_number)
+        with self.write_lock:
+            # Read the status under the lock so the last of several racing transitions is the one published
+            self.snapshot = self.snapshot.with_node_liveness(node_key, node.status == "Live")
+
+    @staticmethod
+    def get_node_key(ip_address: str, port_number: int) -> Tuple[str, int]:
+        """
+        Returns the key of a node in the node index. The port is normalised to an int, since it arrives
+        as a string in some messages.
+
+        Parameters:
+        ----------
+        ip_address : str
+            The IP address of the node.
+        port_number : int
+            The port number of the node.
+
+        Returns:
+        -------
+        Tuple[str, int]
+            The (ip_address, port_number) key of the node.
+        """
+        return ip_address, int(port_number)
@@ -1,8 +1,10 @@
+import asyncio
+import binascii
 import json
 import socket
 import threading
-import os
-from typing import Tuple, Dict
+import zlib
+from typing import Tuple, Dict, List
 from logger import Logger
 from hive_node import HiveNode
 from hive_message import HiveMessage
@@ -10,7 +12,17 @@ from message_queue import MessageQueue
 from ack_message import AckMessage
 from connect_message import ConnectMessage
 from heartbeat_message import HeartbeatMessage
+from swim_message import SwimMessage
+from gossip_digest_message import GossipDigestMessage
+from gossip_delta_message import GossipDeltaMessage
+from config_message import ConfigMessage
+from config_digest_message import ConfigDigestMessage
+from config_request_message import ConfigRequestMessage
+from config_tree_message import ConfigTreeMessage
+from config_leaves_message import ConfigLeavesMessage
 from monitor_service import ServiceMonitor
+from app_settings import AppSettings
+from message_framing import MessageFraming, FrameDecoder, FrameTooLargeError
 
 
 class HiveReceiverService:
@@ -34,9 +46,11 @@ class HiveReceiverService:
         A queue for storing incoming messages.
     outbound_message_queue : MessageQueue
         A queue for storing outgoing messages.
+    receiver_mode : str
+        Either 'threaded' or 'asyncio', selecting how incoming connections are served.
     """
 
-    def __init__(self, name: str, ip_address: str, port: int, hive_node_manager, inbound_message_queue: MessageQueue, outbound_message_queue: MessageQueue, service_monitor, lock):
+    def __init__(self, name: str, ip_address: str, port: int, hive_node_manager, inbound_message_queue: MessageQueue, outbound_message_queue: MessageQueue, service_monitor, lock, receiver_mode: str = AppSettings.RECEIVER_MODE):
         """
         Initializes a new instance of HiveReceiverService.
 
@@ -54,6 +68,9 @@ class HiveReceiverService:
             A queue for storing incoming messages.
         outbound_message_queue : MessageQueue
             A queue for storing outgoing messages.
+        receiver_mode : str, optional
+            'threaded' to handle each connection in its own thread, or 'asyncio' to handle all connections
+            on a single event loop (default is AppSettings.RECEIVER_MODE).
         """
         self.logger: Logger = Logger()
         self.name: str = name
@@ -64,13 +81,19 @@ class HiveReceiverService:
         self.outbound_message_queue: MessageQueue = outbound_message_queue
         self.service_monitor: ServiceMonitor = service_monitor
         self.lock = lock
+        self.receiver_mode: str = receiver_mode
 
         self.logger.debug("HiveReceiverService", "HiveReceiverService initialized...")
 
     def run(self) -> None:
         """
-        Starts the HiveReceiverService, listening for incoming connections and handling them in separate threads.
+        Starts the HiveReceiverService, listening for incoming connections and handling them in separate threads,
+        or on an asyncio event loop when the receiver mode is 'asyncio'.
         """
+        if self.receiver_mode == 'asyncio':
+            asyncio.run(self.run_async())
+            return
+
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
             server_socket.bind((self.ip_address, self.port))
             server_socket.listen()
@@ -81,9 +104,20 @@ class HiveReceiverService:
                 client_thread = threading.Thread(target=self.handle_client, args=(client_socket, client_address), daemon=True)
                 client_thread.start()
 
+    async def run_async(self) -> None:
+        """
+        Starts the HiveReceiverService on an asyncio event loop, handling every connection as a coroutine.
+        """
+        server = await asyncio.start_server(self.handle_client_async, self.ip_address, self.port)
+
+        self.logger.info("HiveReceiverService", "HiveReceiverService is running (asyncio)...")
+        async with server:
+            await server.serve_forever()
+
     def handle_client(self, client_socket: socket.socket, client_address: Tuple[str, int]) -> None:
         """
-        Handles an incoming client connection, reading and processing data from the client.
+        Handles an incoming client connection, reading and processing messages from the client until it closes
+        the connection or the connection has been idle for AppSettings.RECEIVER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS.
 
         Parameters:
         ----------
@@ -93,40 +127,147 @@ class HiveReceiverService:
             The address of the client.
         """
         self.logger.info("HiveReceiverService", f"Connection from {client_address}")
+        frame_decoder = FrameDecoder()
+        client_socket.settimeout(AppSettings.RECEIVER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS)
         with client_socket:
             while True:
-                data = client_socket.recv(1024)
+                try:
+                    frame = frame_decoder.read_frame(client_socket)
+                except FrameTooLargeError as e:
+                    self.logger.error("HiveReceiverService", f"Closing connection from {client_address}: {e}")
+                    break
+                except (socket.timeout, ConnectionError):
+                    break
+                if frame is None:
+                    break
+
+                try:
+                    data_dict, sender_node = self.decode_frame(frame)
+                except (ValueError, KeyError, TypeError) as e:
+                    # Without a sender there is nobody to acknowledge, so drop the connection rather than the handler thread
+                    self.logger.warning("HiveReceiverService", f"Closing connection from {client_address} after an undecodable message: {e!r}")
+                    break
+                try:
+                    client_socket.sendall(self.dispatch_message(data_dict, sender_node))
+                except OSError as e:
+                    self.logger.warning("HiveReceiverService", f"Closing connection from {client_address}, the acknowledgment could not be sent: {e}")
+                    break
+
+    async def handle_client_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handles an incoming client connection on the event loop, reading and processing data from the client.
+
+        Parameters:
+        ----------
+        reader : asyncio.StreamReader
+            The stream to read the client data from.
+        writer : asyncio.StreamWriter
+            The stream to write acknowledgments to.
+        """
+        client_address = writer.get_extra_info('peername')
+        self.logger.info("HiveReceiverService", f"Connection from {client_address}")
+        frame_decoder = FrameDecoder()
+        try:
+            while True:
+                data = await asyncio.wait_for(reader.read(AppSettings.SOCKET_RECEIVE_SIZE_IN_BYTES), AppSettings.RECEIVER_IDLE_CONNECTION_TIMEOUT_IN_SECONDS)
                 if not data:
                     break
 
-                self.logger.debug("HiveReceiverService", f"Data Received: {data.decode()}")
-
-                # Deserialize JSON data to dictionary
-                data_dict: Dict = json.loads(data.decode())
-                command = data_dict.get('command')
-
-                sender_node = HiveNode(
-                    friendly_name=data_dict['source_friendly_name'],
-                    ip_address=data_dict['source_ip_address'],
-                    port_number=int(data_dict['source_port'])
-                )
-
-                if command == 'connect':
-                    self.handle_connect(data_dict, sender_node)
-                elif command == 'ack_message':
-                    self.handle_ack(data_dict, sender_node)
-                elif command == 'heartbeat':
-                    self.handle_heartbeat(data_dict, sender_node)
-                elif command == 'gossip':
-                    self.handle_gossip(data_dict, sender_node)
-                elif len(command) >= 6 and command[:6] == 'config':
-                    self.handle_config(command[7:], sender_node)
+                for frame in frame_decoder.feed(data):
+                    data_dict, sender_node = self.decode_frame(frame)
+                    if data_dict.get('command', '').split(' ', 1)[0] == 'config':
+                        # Config handling decompresses the payload or writes the config file, keep it off the event loop
+                        ack = await asyncio.to_thread(self.dispatch_message, data_dict, sender_node)
+                    else:
+                        ack = self.dispatch_message(data_dict, sender_node)
+                    writer.write(ack)
+                await writer.drain()
+        except FrameTooLargeError as e:
+            self.logger.error("HiveReceiverService", f"Closing connection from {client_address}: {e}")
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning("HiveReceiverService", f"Closing connection from {client_address} after an undecodable message: {e!r}")
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def decode_frame(self, frame: bytes) -> Tuple[Dict, HiveNode]:
+        """
+        Deserializes a received frame into its message dictionary and sender node. Raises ValueError if the frame
+        is not UTF-8 JSON, and KeyError or TypeError if it is not a message with source fields.
+
+        Parameters:
+        ----------
+        frame : bytes
+            The payload of a received frame.
+
+        Returns:
+        -------
+        Tuple[Dict, HiveNode]
+            The message dictionary and the node that sent it.
+        """
+        self.logger.debug("HiveReceiverService", f"Data Received: {frame.decode()}")
+
+        # Deserialize JSON data to dictionary
+        data_dict: Dict = json.loads(frame.decode())
+
+        sender_node = HiveNode(
+            friendly_name=data_dict['source_friendly_name'],
+            ip_address=data_dict['source_ip_address'],
+            port_number=int(data_dict['source_port'])
+        )
+        return data_dict, sender_node
+
+    def dispatch_message(self, data_dict: Dict, sender_node: HiveNode) -> bytes:
+        """
+        Dispatches a received message to the handler for its command and builds the acknowledgment frame. A message
+        whose payload cannot be decoded is logged and dropped, but still acknowledged.
+
+        Parameters:
+        ----------
+        data_dict : Dict
+            The dictionary containing the data from the incoming message.
+        sender_node : HiveNode
+            The node that sent the message.
+
+        Returns:
+        -------
+        bytes
+            The framed acknowledgment to send back to the sender.
+        """
+        command = data_dict.get('command', '')
+        # Older nodes send their unversioned config as JSON in the command, so dispatch on the command name only
+        command_name = command.split(' ', 1)[0]
+
+        try:
+            if command_name == 'connect':
+                self.handle_connect(data_dict, sender_node)
+            elif command_name == 'ack_message':
+                self.handle_ack(data_dict, sender_node)
+            elif command_name == 'heartbeat':
+                self.handle_heartbeat(data_dict, sender_node)
+            elif command_name == 'gossip':
+                self.handle_gossip(data_dict, sender_node)
+            elif command_name in ('gossip_digest', 'gossip_delta'):
+                self.handle_gossip_exchange(data_dict, sender_node)
+            elif command_name in ('ping', 'ping_req', 'ping_ack'):
+                self.handle_swim(data_dict, sender_node)
+            elif command_name in ('config_digest', 'config_request', 'config_tree', 'config_leaves'):
+                self.handle_config_exchange(data_dict, sender_node)
+            elif command_name == 'config':
+                if data_dict.get('versions') is not None:
+                    self.handle_config_exchange(data_dict, sender_node)
                 else:
-                    self.logger.warning("HiveReceiverService", f"Unknown command: {command}")
+                    self.handle_config(ConfigMessage.decode_payload(data_dict), sender_node)
+            else:
+                self.logger.warning("HiveReceiverService", f"Unknown command: {command}")
+        except (ValueError, binascii.Error, zlib.error) as e:
+            # Acknowledge an undecodable message anyway, so the sender drops it instead of resending the same bad payload
+            self.logger.warning("HiveReceiverService", f"Dropping {command_name} from {sender_node.friendly_name}: {e}")
 
-                # Send acknowledgment message
-                ack_message = AckMessage(self.hive_node_manager.local_node, sender_node)
-                client_socket.sendall(ack_message.to_json().encode())
+        # Send acknowledgment message
+        ack_message = AckMessage(self.hive_node_manager.local_node, sender_node)
+        return MessageFraming.encode_frame(ack_message.to_json().encode())
 
     def handle_connect(self, data_dict: Dict, sender_node: HiveNode) -> None:
         """
@@ -175,25 +316,100 @@ class HiveReceiverService:
 
         self.logger.info("HiveReceiverService", f"Handled heartbeat from {sender_node.friendly_name}")
 
-    def handle_config(self, config, sender_node: HiveNode):
-        config_dict = json.loads(config)
-        for key in config_dict:
-            if key != self.name or (key == self.name and config_dict[key] != self.service_monitor.config[key]):
-                self.service_monitor.config[key] = config_dict[key]
+    def handle_swim(self, data_dict: Dict, sender_node: HiveNode) -> None:
+        """
+        Handles an incoming SWIM 'ping', 'ping_req' or 'ping_ack' message, creating a SwimMessage and enqueuing it in the inbound message queue.
 
-        self.logger.info(self.name, f"Config Received from {sender_node.friendly_name}")
+        Parameters:
+        ----------
+        data_dict : Dict
+            The dictionary containing the data from the incoming message.
+        sender_node : HiveNode
+            The node that sent the message.
+        """
+        swim_message = SwimMessage(sender_node, self.hive_node_manager.local_node, data_dict['command'], int(data_dict['sequence_number']),
+                                   data_dict.get('updates', []), data_dict.get('target'))
+        self.inbound_message_queue.enqueue(HiveMessage(swim_message))
+
+        self.logger.debug("HiveReceiverService", f"Handled {data_dict['command']} from {sender_node.friendly_name}")
+
+    def handle_gossip_exchange(self, data_dict: Dict, sender_node: HiveNode) -> None:
+        """
+        Handles an incoming delta gossip 'gossip_digest' or 'gossip_delta' message, creating the message and enqueuing it in the inbound message queue.
+
+        Parameters:
+        ----------
+        data_dict : Dict
+            The dictionary containing the data from the incoming message.
+        sender_node : HiveNode
+            The node that sent the message.
+        """
+        local_node: HiveNode = self.hive_node_manager.local_node
+        if data_dict['command'] == 'gossip_digest':
+            message = GossipDigestMessage(sender_node, local_node, data_dict['digest_hash'], data_dict.get('versions'))
+        else:
+            message = GossipDeltaMessage(sender_node, local_node, data_dict.get('nodes', {}), data_dict.get('requested', []))
+        self.inbound_message_queue.enqueue(HiveMessage(message))
 
-        config_file_name = f"{self.name}.json"
-        with self.lock.acquire(timeout=5):
-            if os.path.exists(config_file_name):
-                os.remove(config_file_name)
-            with open(config_file_name, 'w') as file:
-                json.dump(self.service_monitor.config, file, indent=4)
+        self.logger.debug("HiveReceiverService", f"Handled {data_dict['command']} from {sender_node.friendly_name}")
 
+    def handle_config_exchange(self, data_dict: Dict, sender_node: HiveNode) -> None:
+        """
+        Handles an incoming 'config_digest', 'config_request', 'config_tree', 'config_leaves' or versioned 'config' message, creating the message and enqueuing it in the inbound message queue.
+
+        Parameters:
+        ----------
+        data_dict : Dict
+            The dictionary containing the data from the incoming message.
+        sender_node : HiveNode
+            The node that sent the message.
+        """
+        local_node: HiveNode = self.hive_node_manager.local_node
+        command: str = data_dict['command']
+        if command == 'config_digest':
+            message = ConfigDigestMessage(sender_node, local_node, data_dict['versions'])
+        elif command == 'config_request':
+            message = ConfigRequestMessage(sender_node, local_node, data_dict['section_names'])
+        elif command == 'config_tree':
+            message = ConfigTreeMessage(sender_node, local_node, data_dict['node_hashes'])
+        elif command == 'config_leaves':
+            message = ConfigLeavesMessage(sender_node, local_node, data_dict['sections'], data_dict['buckets'], bool(data_dict.get('is_reply')))
+        else:
+            message = ConfigMessage(sender_node, local_node, ConfigMessage.decode_payload(data_dict), data_dict['versions'])
+        self.inbound_message_queue.enqueue(HiveMessage(message))
+
+        self.logger.debug("HiveReceiverService", f"Handled {command.split(' ', 1)[0]} from {sender_node.friendly_name}")
+
+    def handle_config(self, config_dict: Dict, sender_node: HiveNode) -> None:
+        """
+        Handles an incoming unversioned 'config' message, as sent by older nodes, enqueuing its sections in the
+        inbound message queue as a versioned 'config' message for the config protocol manager to merge. Their
+        services are written at timestamp 0, older than any versioned write, so they only replace services known
+        from the config file or other unversioned messages. The local section is skipped, only the local node writes it.
+
+        Parameters:
+        ----------
+        config_dict : Dict
+            The [address, services] of every received section, by node name.
+        sender_node : HiveNode
+            The node that sent the message.
+        """
+        sections: Dict[str, List] = {}
+        for section_name, section in config_dict.items():
+            if section_name == self.service_monitor.local_name or not isinstance(section, list) or len(section) < 2 or not isinstance(section[1], dict):
+                continue
+            sections[section_name] = [section[0], {key: [0, sender_node.friendly_name, service]
+                                                   for key, service in section[1].items() if service is not None}]
+
+        self.logger.info(self.name, f"Config Received from {sender_node.friendly_name}")
+        if sections:
+            message = ConfigMessage(sender_node, self.hive_node_manager.local_node, sections, {section_name: 0 for section_name in sections})
+            self.inbound_message_queue.enqueue(HiveMessage(message))
 
     def handle_gossip(self, data_dict: Dict, sender_node: HiveNode) -> None:
         """
-        Handles an incoming 'gossip' message, updating the node manager with any new nodes and logging the information.
+        Handles an incoming full 'gossip' message, as sent by nodes without delta gossip, updating the node manager
+        with any new nodes and logging the information.
 
         Parameters:
         ----------
@@ -203,6 +419,7 @@ class HiveReceiverService:
             The node that sent the gossip message.
         """
         nodes = data_dict.get('nodes', {})
+        new_nodes = []
         for node_name, node_info in nodes.items():
             new_node = HiveNode(
                 friendly_name=node_name,
@@ -210,6 +427,8 @@ class HiveReceiverService:
                 port_number=int(node_info['port_number'])
             )
             if new_node != self.hive_node_manager.local_node:
-                self.hive_node_manager.add_node(new_node)
+                new_nodes.append(new_node)
+        # Add the whole gossip as one new version of the membership table
+        self.hive_node_manager.add_nodes(new_nodes)
 
         self.logger.info("HiveReceiverService", f"Handled gossip from {sender_node.friendly_name}")
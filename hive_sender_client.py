@@ -1,15 +1,27 @@
 import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
 from logger import Logger
+from hive_node import HiveNode
 from hive_message import HiveMessage
 from message_queue import MessageQueue
 from app_settings import AppSettings
+from hive_connection_pool import HiveConnectionPool
+from message_framing import MessageFraming, FrameDecoder, FrameTooLargeError
 
 
 class HiveSenderClient:
     """
     HiveSenderClient is responsible for sending messages from the outbound message queue to the appropriate recipient nodes.
-    It continuously checks the outbound queue for messages, sends them over a TCP connection, and handles any connection errors.
+    It continuously checks the outbound queue for messages, sends them over pooled TCP connections, and handles any connection errors.
+    Messages are routed into an independent send lane per destination, and lanes are drained by a bounded pool of
+    worker threads, so a slow or unreachable node only delays the messages addressed to it. Each lane is a
+    MessageQueue, so messages waiting for a slow node are still prioritised and coalesced.
+    Every message taken from the outbound queue is marked complete on it once it is delivered or given up on.
+    A message that fails to send goes back to the outbound queue to be retried after an exponential backoff, and
+    the failures of a peer are counted once per backoff window, so a brief outage does not mark it Dead at once.
 
     Attributes:
     ----------
@@ -19,6 +31,22 @@ class HiveSenderClient:
         The queue for outbound messages.
     inbound_message_queue : MessageQueue
         The queue for inbound messages.
+    connection_pool : HiveConnectionPool
+        The pool of open connections to peers, reused across messages.
+    send_lanes : Dict[Tuple[str, int], MessageQueue]
+        The messages waiting to be sent, per destination (ip_address, port_number).
+    active_lanes : Set[Tuple[str, int]]
+        The destinations whose lane is currently being drained by a worker.
+    failure_windows : Dict[Tuple[str, int], float]
+        The monotonic time until which further failed sends to a destination are not counted against it, for the
+        destinations whose last counted failure is still in its window.
+    on_failed_connection : Optional[Callable[[HiveNode], None]]
+        Called with the recipient of every counted failed send instead of increasing its failed connection count,
+        so the SWIM protocol can suspect the node rather than have it marked Dead directly.
+    lanes_lock : threading.Lock
+        Guards send_lanes, active_lanes and failure_windows.
+    executor : ThreadPoolExecutor
+        The bounded pool of workers draining the send lanes.
     """
 
     def __init__(self, outbound_message_queue: MessageQueue, inbound_message_queue: MessageQueue):
@@ -35,46 +63,199 @@ class HiveSenderClient:
         self.logger: Logger = Logger()
         self.outbound_message_queue: MessageQueue = outbound_message_queue
         self.inbound_message_queue: MessageQueue = inbound_message_queue
+        self.connection_pool: HiveConnectionPool = HiveConnectionPool()
+        self.send_lanes: Dict[Tuple[str, int], MessageQueue] = {}
+        self.active_lanes: Set[Tuple[str, int]] = set()
+        self.failure_windows: Dict[Tuple[str, int], float] = {}
+        self.on_failed_connection: Optional[Callable[[HiveNode], None]] = None
+        self.lanes_lock: threading.Lock = threading.Lock()
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=AppSettings.SENDER_MAX_WORKERS, thread_name_prefix="HiveSenderLane")
 
         self.logger.debug("HiveSenderClient", "HiveSenderClient initialized...")
 
     def run(self) -> None:
         """
         Starts the client loop, which runs indefinitely.
-        It continuously dequeues messages from the outbound message queue and sends them to the recipient nodes.
+        It continuously dequeues messages from the outbound message queue and routes them to the send lane of their recipient.
         """
         while True:
-            message: HiveMessage = self.outbound_message_queue.dequeue()
-            if message:
-                self.send_message(message)
-            time.sleep(AppSettings.QUEUE_SEND_SLEEP_IN_SECONDS)
+            for message in self.outbound_message_queue.dequeue_many(AppSettings.QUEUE_BATCH_SIZE, timeout=AppSettings.QUEUE_WAIT_TIMEOUT_IN_SECONDS):
+                self.dispatch_message(message)
+            self.connection_pool.evict_expired_connections()
 
-    def send_message(self, hive_message: HiveMessage) -> None:
+    def dispatch_message(self, hive_message: HiveMessage) -> None:
         """
-        Sends a message to the recipient node over a TCP connection.
+        Appends a message to the send lane of its recipient and schedules the lane on a worker if it is idle.
 
         Parameters:
         ----------
         hive_message : HiveMessage
             The message to be sent to the recipient node.
         """
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client_socket:
+        try:
+            address: Tuple[str, int] = (hive_message.message.recipient.ip_address, int(hive_message.message.recipient.port_number))
+        except (AttributeError, ValueError):
+            self.logger.error("HiveSenderClient", f"Invalid recipient for message {hive_message.message.to_json()}. Removing message from queue...")
+            self.outbound_message_queue.complete(hive_message)
+            return
+
+        with self.lanes_lock:
+            lane: Optional[MessageQueue] = self.send_lanes.get(address)
+            if lane is None:
+                lane = self.send_lanes[address] = MessageQueue(f"Send lane {address[0]}:{address[1]}", on_message_discarded=self.outbound_message_queue.complete)
+            if lane.size() >= AppSettings.SENDER_MAX_MESSAGES_PER_LANE:
+                self.logger.warning("HiveSenderClient", f"Send lane to {hive_message.message.recipient.friendly_name} is full, dropping message")
+                self.outbound_message_queue.complete(hive_message)
+                return
+            lane.enqueue(hive_message)
+            if address in self.active_lanes:
+                return
+            self.active_lanes.add(address)
+        self.executor.submit(self.drain_lane, address)
+
+    def drain_lane(self, address: Tuple[str, int]) -> None:
+        """
+        Sends the messages waiting in a destination's lane, in lane order. After AppSettings.SENDER_LANE_BATCH_SIZE
+        messages the lane is rescheduled so other lanes get a turn on the worker pool.
+
+        Parameters:
+        ----------
+        address : Tuple[str, int]
+            The (ip_address, port_number) of the destination.
+        """
+        for _ in range(AppSettings.SENDER_LANE_BATCH_SIZE):
+            with self.lanes_lock:
+                hive_message: Optional[HiveMessage] = self.send_lanes[address].dequeue()
+                if hive_message is None:
+                    del self.send_lanes[address]
+                    self.active_lanes.discard(address)
+                    return
             try:
-                client_socket.connect((hive_message.message.recipient.ip_address, int(hive_message.message.recipient.port_number)))
-                self.logger.debug("HiveSenderClient", f"Connected to {hive_message.message.recipient.friendly_name}")
-                client_socket.sendall(hive_message.message.to_json().encode())
-                self.logger.debug("HiveSenderClient", f"Sent: {hive_message.message.to_json()}")
-                data: bytes = client_socket.recv(1024)
-                self.logger.debug("HiveSenderClient", f"Received: {data.decode()}")
-            except ConnectionRefusedError:
-                self.logger.error("HiveSenderClient", f"Connection to {hive_message.message.recipient.friendly_name} failed")
-                hive_message.send_attempt_count += 1
-
-                hive_message.message.recipient.increase_failed_connection_count()
-
-                if hive_message.send_attempt_count >= AppSettings.MAX_SEND_ATTEMPTS:
-                    self.logger.warning("HiveSenderClient", f"Failed to send message to {hive_message.message.recipient.friendly_name} after {AppSettings.MAX_SEND_ATTEMPTS} attempts")
-                else:
-                    self.outbound_message_queue.enqueue(hive_message)
-            except AttributeError:
-                self.logger.error("HiveSenderClient", f"Connection to {hive_message.message.recipient.friendly_name} at {hive_message.message.recipient.ip_address}:{hive_message.message.recipient.port_number} failed. Removing message from queue...")
+                self.send_message(hive_message)
+            except Exception as e:
+                self.logger.error("HiveSenderClient", f"Unexpected error sending to {address[0]}:{address[1]}: {e}")
+        self.executor.submit(self.drain_lane, address)
+
+    def send_message(self, hive_message: HiveMessage) -> None:
+        """
+        Sends a message to the recipient node over a pooled TCP connection.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message to be sent to the recipient node.
+        """
+        try:
+            address: Tuple[str, int] = (hive_message.message.recipient.ip_address, int(hive_message.message.recipient.port_number))
+            frame: bytes = MessageFraming.encode_frame(hive_message.message.to_json().encode())
+            data: bytes = self.exchange_frame(address, frame)
+            self.logger.debug("HiveSenderClient", f"Sent: {hive_message.message.to_json()}")
+            self.logger.debug("HiveSenderClient", f"Received: {data.decode()}")
+            self.outbound_message_queue.complete(hive_message)
+            # Checked before taking the lock, as a destination that has not failed lately has no window to close
+            if address in self.failure_windows:
+                with self.lanes_lock:
+                    self.failure_windows.pop(address, None)
+        except OSError as e:
+            self.logger.error("HiveSenderClient", f"Connection to {hive_message.message.recipient.friendly_name} failed: {e}")
+            hive_message.send_attempt_count += 1
+            retry_delay: float = self.get_retry_delay(hive_message.send_attempt_count)
+
+            self.count_failed_connection(address, hive_message.message.recipient, retry_delay)
+
+            if hive_message.send_attempt_count >= AppSettings.MAX_SEND_ATTEMPTS:
+                self.logger.warning("HiveSenderClient", f"Failed to send message to {hive_message.message.recipient.friendly_name} after {AppSettings.MAX_SEND_ATTEMPTS} attempts")
+                self.outbound_message_queue.complete(hive_message)
+            else:
+                self.outbound_message_queue.enqueue(hive_message, not_before=time.monotonic() + retry_delay)
+        except FrameTooLargeError as e:
+            self.logger.error("HiveSenderClient", f"Message to {hive_message.message.recipient.friendly_name} dropped: {e}")
+            self.outbound_message_queue.complete(hive_message)
+        except AttributeError:
+            self.logger.error("HiveSenderClient", f"Connection to {hive_message.message.recipient.friendly_name} at {hive_message.message.recipient.ip_address}:{hive_message.message.recipient.port_number} failed. Removing message from queue...")
+            self.outbound_message_queue.complete(hive_message)
+
+    @staticmethod
+    def get_retry_delay(send_attempt_count: int) -> float:
+        """
+        Returns the number of seconds to wait before retrying a message that has failed to send.
+
+        Parameters:
+        ----------
+        send_attempt_count : int
+            The number of failed attempts to send the message.
+
+        Returns:
+        -------
+        float
+            AppSettings.SEND_RETRY_BACKOFF_IN_SECONDS, doubled for every failed attempt after the first, at most
+            AppSettings.SEND_RETRY_MAX_BACKOFF_IN_SECONDS.
+        """
+        return min(AppSettings.SEND_RETRY_BACKOFF_IN_SECONDS * 2 ** (send_attempt_count - 1), AppSettings.SEND_RETRY_MAX_BACKOFF_IN_SECONDS)
+
+    def count_failed_connection(self, address: Tuple[str, int], recipient: HiveNode, window: float) -> None:
+        """
+        Counts a failed send against the recipient, unless a failure to the same destination was already counted
+        in the current window, so messages that fail together count once. Expired windows of other destinations
+        are dropped at the same time, and a successful send drops the window of its destination.
+
+        Parameters:
+        ----------
+        address : Tuple[str, int]
+            The (ip_address, port_number) of the destination.
+        recipient : HiveNode
+            The node the message was addressed to.
+        window : float
+            The number of seconds further failures to the destination are not counted for, if this one is.
+        """
+        now: float = time.monotonic()
+        with self.lanes_lock:
+            if now < self.failure_windows.get(address, 0.0):
+                return
+            for expired_address in [other for other, window_end in self.failure_windows.items() if window_end <= now]:
+                del self.failure_windows[expired_address]
+            self.failure_windows[address] = now + window
+        if self.on_failed_connection is not None:
+            self.on_failed_connection(recipient)
+        else:
+            recipient.increase_failed_connection_count()
+
+    def exchange_frame(self, address: Tuple[str, int], frame: bytes) -> bytes:
+        """
+        Sends a frame to the peer and waits for its acknowledgment frame. The connection is taken from the
+        connection pool and returned to it afterwards. Connecting, sending and waiting for the ack are each
+        bounded by their AppSettings timeout. If sending over a pooled connection fails, the frame is sent again
+        over a new connection. Once the frame is sent, a failure is raised instead, as the peer may have received it.
+
+        Parameters:
+        ----------
+        address : Tuple[str, int]
+            The (ip_address, port_number) of the peer.
+        frame : bytes
+            The framed message to send.
+
+        Returns:
+        -------
+        bytes
+            The payload of the acknowledgment frame.
+        """
+        connection, reused = self.connection_pool.acquire(address, AppSettings.SENDER_CONNECT_TIMEOUT_IN_SECONDS)
+        sent: bool = False
+        try:
+            connection.settimeout(AppSettings.SENDER_SEND_TIMEOUT_IN_SECONDS)
+            connection.sendall(frame)
+            sent = True
+            connection.settimeout(AppSettings.SENDER_ACK_TIMEOUT_IN_SECONDS)
+            ack: Optional[bytes] = FrameDecoder().read_frame(connection)
+            if ack is None:
+                raise ConnectionResetError(f"Connection to {address[0]}:{address[1]} closed before the acknowledgment was received")
+        except OSError as e:
+            self.connection_pool.discard(connection)
+            # Only a frame the peer cannot have received is sent again here, so it is never dispatched twice
+            if reused and not sent and not isinstance(e, socket.timeout):
+                self.logger.debug("HiveSenderClient", f"Pooled connection to {address[0]}:{address[1]} was broken, retrying on a new connection")
+                return self.exchange_frame(address, frame)
+            raise
+
+        self.connection_pool.release(address, connection)
+        return ack
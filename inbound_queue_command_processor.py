@@ -1,17 +1,21 @@
-import time
-from typing import Dict
+from typing import Dict, Optional
 from logger import Logger
 from hive_message import HiveMessage
 from message_queue import MessageQueue
 from hive_node import HiveNode
 from hive_node_manager import HiveNodeManager
-from app_settings import AppSettings
+from swim_protocol_command_manager import SwimProtocolCommandManager
+from gossip_protocol_command_manager import GossipProtocolCommandManager
+from config_protocol_command_manager import ConfigProtocolCommandManager
 
 
 class InboundQueueCommandProcessor:
     """
     InboundQueueCommandProcessor processes messages from the inbound message queue.
-    It handles different types of commands such as 'connect', 'heartbeat', and 'gossip'.
+    It handles different types of commands such as 'connect', 'heartbeat', and 'gossip', and passes the delta gossip
+    'gossip_digest' and 'gossip_delta' commands to the gossip protocol manager, the SWIM 'ping', 'ping_req' and
+    'ping_ack' commands to the SWIM protocol manager when they run, and the 'config_digest', 'config_request' and
+    versioned 'config' commands to the config protocol manager.
 
     Attributes:
     ----------
@@ -23,9 +27,18 @@ class InboundQueueCommandProcessor:
         A queue for storing outgoing messages.
     inbound_message_queue : MessageQueue
         A queue for storing incoming messages.
+    swim_protocol_command_manager : Optional[SwimProtocolCommandManager]
+        The SWIM protocol manager, if the SWIM membership protocol is running.
+    gossip_protocol_command_manager : Optional[GossipProtocolCommandManager]
+        The gossip protocol manager, if the gossip membership protocol is running.
+    config_protocol_command_manager : Optional[ConfigProtocolCommandManager]
+        The config protocol manager.
     """
 
-    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue, inbound_message_queue: MessageQueue):
+    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue, inbound_message_queue: MessageQueue,
+                 swim_protocol_command_manager: Optional[SwimProtocolCommandManager] = None,
+                 gossip_protocol_command_manager: Optional[GossipProtocolCommandManager] = None,
+                 config_protocol_command_manager: Optional[ConfigProtocolCommandManager] = None):
         """
         Initializes a new instance of InboundQueueCommandProcessor.
 
@@ -37,11 +50,20 @@ class InboundQueueCommandProcessor:
             A queue for storing outgoing messages.
         inbound_message_queue : MessageQueue
             A queue for storing incoming messages.
+        swim_protocol_command_manager : Optional[SwimProtocolCommandManager], optional
+            The SWIM protocol manager, if the SWIM membership protocol is running (default is None).
+        gossip_protocol_command_manager : Optional[GossipProtocolCommandManager], optional
+            The gossip protocol manager, if the gossip membership protocol is running (default is None).
+        config_protocol_command_manager : Optional[ConfigProtocolCommandManager], optional
+            The config protocol manager (default is None).
         """
         self.logger: Logger = Logger()
         self.hive_node_manager = hive_node_manager
         self.outbound_message_queue = outbound_message_queue
         self.inbound_message_queue = inbound_message_queue
+        self.swim_protocol_command_manager: Optional[SwimProtocolCommandManager] = swim_protocol_command_manager
+        self.gossip_protocol_command_manager: Optional[GossipProtocolCommandManager] = gossip_protocol_command_manager
+        self.config_protocol_command_manager: Optional[ConfigProtocolCommandManager] = config_protocol_command_manager
 
         self.logger.debug("InboundQueueCommandProcessor", "InboundQueueCommandProcessor initialized...")
 
@@ -50,10 +72,9 @@ class InboundQueueCommandProcessor:
         Continuously processes messages from the inbound message queue.
         """
         while True:
-            message = self.inbound_message_queue.dequeue()
+            message = self.inbound_message_queue.dequeue(timeout=None)
             if message:
                 self.process_message(message)
-            time.sleep(AppSettings.QUEUE_SEND_SLEEP_IN_SECONDS)
 
     def process_message(self, hive_message: HiveMessage) -> None:
         """
@@ -68,13 +89,19 @@ class InboundQueueCommandProcessor:
 
         self.logger.debug("InboundQueueCommandProcessor", f"Processing Message: {hive_message.message.to_json()}")
 
-        command: str = hive_message.get_json_message_as_dict()['command']
+        command: str = hive_message.get_json_message_as_dict()['command'].split(' ', 1)[0]
         if command == 'connect':
             self.process_command_connect(hive_message)
         elif command == 'heartbeat':
             self.process_command_heartbeat(hive_message)
         elif command == 'gossip':
             self.process_command_gossip(hive_message)
+        elif command in GossipProtocolCommandManager.COMMANDS and self.gossip_protocol_command_manager:
+            self.gossip_protocol_command_manager.handle_message(hive_message)
+        elif command in SwimProtocolCommandManager.COMMANDS and self.swim_protocol_command_manager:
+            self.swim_protocol_command_manager.handle_message(hive_message)
+        elif command in ConfigProtocolCommandManager.COMMANDS and self.config_protocol_command_manager:
+            self.config_protocol_command_manager.handle_message(hive_message)
         else:
             self.logger.info("InboundQueueCommandProcessor", f"Unknown command in Hive Message: {command}")
 
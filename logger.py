@@ -35,10 +35,18 @@ class Logger:
         "HiveNodeManager": LogLevel.INFO,
         "HiveReceiverService": LogLevel.INFO,
         "HiveSenderClient": LogLevel.INFO,
+        "HiveConnectionPool": LogLevel.INFO,
+        "WriteAheadLog": LogLevel.INFO,
+        "DurableMessageQueue": LogLevel.INFO,
         "CliCommandProcessor": LogLevel.INFO,
         "InboundQueueCommandProcessor": LogLevel.INFO,
         "GossipProtocolCommandManager": LogLevel.INFO,
         "HeartbeatProtocolCommandManager": LogLevel.INFO,
+        "SwimProtocolCommandManager": LogLevel.INFO,
+        "ConfigProtocolCommandManager": LogLevel.INFO,
+        "ConfigStore": LogLevel.INFO,
+        "ServiceMonitor": LogLevel.INFO,
+        "ResultsStore": LogLevel.INFO,
         "AppMain": LogLevel.INFO,
     }
 
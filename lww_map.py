@@ -0,0 +1,162 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class LwwMap:
+    """
+    LwwMap is a last-writer-wins map CRDT. Every key holds the value of its latest write together with the write's
+    timestamp and writer; a removal is a write of a tombstone (None), so it wins over older writes of the key
+    instead of letting them reappear. Writes are ordered by (timestamp, writer), which makes merging two maps
+    commutative, associative and idempotent: replicas that have merged the same writes hold the same map,
+    whatever order and however many times the writes arrived in.
+
+    Attributes:
+    ----------
+    entries : Dict[str, Tuple[int, str, Any]]
+        The (timestamp, writer, value) of the latest write of every key, value None for a removed key.
+    version : int
+        The highest timestamp of any write merged into the map, 0 if it is empty.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Tuple[int, str, Any]]] = None):
+        """
+        Initializes a new instance of LwwMap.
+
+        Parameters:
+        ----------
+        entries : Optional[Dict[str, Tuple[int, str, Any]]], optional
+            The (timestamp, writer, value) of every key (default is None, an empty map).
+        """
+        self.entries: Dict[str, Tuple[int, str, Any]] = {}
+        self.version: int = 0
+        if entries:
+            self.merge(entries)
+
+    @classmethod
+    def from_values(cls, values: Dict[str, Any], timestamp: int = 0, writer: str = '') -> 'LwwMap':
+        """
+        Returns a map holding the values as written at the timestamp by the writer.
+
+        Parameters:
+        ----------
+        values : Dict[str, Any]
+            The values by key.
+        timestamp : int, optional
+            The timestamp of the writes (default is 0, older than any real write).
+        writer : str, optional
+            The writer of the writes (default is '').
+        """
+        return cls({key: (timestamp, writer, value) for key, value in values.items()})
+
+    def set(self, key: str, value: Any, timestamp: int, writer: str) -> None:
+        """
+        Writes a value for a key if the write is newer than the key's latest write.
+
+        Parameters:
+        ----------
+        key : str
+            The key.
+        value : Any
+            The value, which must not be None.
+        timestamp : int
+            The timestamp of the write.
+        writer : str
+            The writer, breaking ties between writes with the same timestamp.
+        """
+        self.merge_entry(key, (timestamp, writer, value))
+
+    def remove(self, key: str, timestamp: int, writer: str) -> None:
+        """
+        Writes a tombstone for a key if the removal is newer than the key's latest write.
+
+        Parameters:
+        ----------
+        key : str
+            The key.
+        timestamp : int
+            The timestamp of the removal.
+        writer : str
+            The writer, breaking ties between writes with the same timestamp.
+        """
+        self.merge_entry(key, (timestamp, writer, None))
+
+    def is_newer(self, key: str, entry: Tuple[int, str, Any]) -> bool:
+        """
+        Returns whether a write is newer than the key's latest write in this map.
+
+        Parameters:
+        ----------
+        key : str
+            The key.
+        entry : Tuple[int, str, Any]
+            The (timestamp, writer, value) of the write.
+        """
+        current: Optional[Tuple[int, str, Any]] = self.entries.get(key)
+        if current is None:
+            return True
+        if (int(entry[0]), entry[1]) != (current[0], current[1]):
+            return (int(entry[0]), entry[1]) > (current[0], current[1])
+        # A writer never writes a key twice with one timestamp, but order such writes anyway so merging stays commutative
+        return entry[2] != current[2] and json.dumps(entry[2], sort_keys=True) > json.dumps(current[2], sort_keys=True)
+
+    def merge_entry(self, key: str, entry: Tuple[int, str, Any]) -> bool:
+        """
+        Merges a single write into the map.
+
+        Parameters:
+        ----------
+        key : str
+            The key.
+        entry : Tuple[int, str, Any]
+            The (timestamp, writer, value) of the write.
+
+        Returns:
+        -------
+        bool
+            True if the write was newer and replaced the key's latest write, False otherwise.
+        """
+        if not self.is_newer(key, entry):
+            return False
+        timestamp: int = int(entry[0])
+        self.entries[key] = (timestamp, entry[1], entry[2])
+        if timestamp > self.version:
+            self.version = timestamp
+        return True
+
+    def merge(self, entries: Dict[str, Tuple[int, str, Any]]) -> List[str]:
+        """
+        Merges the writes of another replica into the map.
+
+        Parameters:
+        ----------
+        entries : Dict[str, Tuple[int, str, Any]]
+            The (timestamp, writer, value) of every key of the other replica, as returned by to_dict.
+
+        Returns:
+        -------
+        List[str]
+            The keys whose latest write was replaced, empty if none was.
+        """
+        return [key for key, entry in entries.items() if self.merge_entry(key, entry)]
+
+    def get_values(self) -> Dict[str, Any]:
+        """
+        Returns the values of the keys that are not removed.
+
+        Returns:
+        -------
+        Dict[str, Any]
+            The values by key.
+        """
+        return {key: entry[2] for key, entry in self.entries.items() if entry[2] is not None}
+
+    def to_dict(self) -> Dict[str, List]:
+        """
+        Returns the writes of every key, including tombstones, in a JSON serialisable form accepted by merge.
+
+        Returns:
+        -------
+        Dict[str, List]
+            The [timestamp, writer, value] of every key.
+        """
+        return {key: list(entry) for key, entry in self.entries.items()}
@@ -0,0 +1,111 @@
+from typing import Dict, Iterable, Tuple
+from hive_node import HiveNode
+
+
+class MembershipSnapshot:
+    """
+    MembershipSnapshot is one immutable version of the membership table of HiveNodeManager. Writers never change
+    a published snapshot; they build a new one from it and publish that instead, so a reader holding a snapshot
+    always sees a consistent node list, index and live-node set without taking a lock.
+
+    Attributes:
+    ----------
+    version : int
+        The version of the membership table, incremented by every published change.
+    nodes : Tuple[HiveNode, ...]
+        The nodes in the network, in the order they were added.
+    node_index : Dict[Tuple[str, int], HiveNode]
+        The nodes in the network by (ip_address, port_number).
+    live_nodes : Tuple[HiveNode, ...]
+        The live nodes in the network, excluding the local node.
+    live_node_index : Dict[Tuple[str, int], HiveNode]
+        The live nodes in the network, excluding the local node, by (ip_address, port_number).
+    """
+
+    def __init__(self, version: int, nodes: Tuple[HiveNode, ...], node_index: Dict[Tuple[str, int], HiveNode],
+                 live_nodes: Tuple[HiveNode, ...], live_node_index: Dict[Tuple[str, int], HiveNode]):
+        """
+        Initializes a new instance of MembershipSnapshot. The snapshot takes ownership of the dictionaries,
+        which must not be changed afterwards; unchanged dictionaries may be shared between versions.
+
+        Parameters:
+        ----------
+        version : int
+            The version of the membership table.
+        nodes : Tuple[HiveNode, ...]
+            The nodes in the network, in the order they were added.
+        node_index : Dict[Tuple[str, int], HiveNode]
+            The nodes in the network by (ip_address, port_number).
+        live_nodes : Tuple[HiveNode, ...]
+            The live nodes in the network, excluding the local node.
+        live_node_index : Dict[Tuple[str, int], HiveNode]
+            The live nodes in the network, excluding the local node, by (ip_address, port_number).
+        """
+        self.version: int = version
+        self.nodes: Tuple[HiveNode, ...] = nodes
+        self.node_index: Dict[Tuple[str, int], HiveNode] = node_index
+        self.live_nodes: Tuple[HiveNode, ...] = live_nodes
+        self.live_node_index: Dict[Tuple[str, int], HiveNode] = live_node_index
+
+    def with_nodes(self, nodes: Iterable[Tuple[Tuple[str, int], HiveNode]]) -> 'MembershipSnapshot':
+        """
+        Returns the next version with the nodes added. Live nodes are added to the live nodes as well.
+
+        Parameters:
+        ----------
+        nodes : Iterable[Tuple[Tuple[str, int], HiveNode]]
+            The (key, node) pairs to add, none of which may already be in the snapshot.
+        """
+        node_index = dict(self.node_index)
+        live_node_index = dict(self.live_node_index)
+        added = []
+        added_live = []
+        for node_key, node in nodes:
+            node_index[node_key] = node
+            added.append(node)
+            if node.status == "Live" and not node.is_local_node:
+                live_node_index[node_key] = node
+                added_live.append(node)
+        return MembershipSnapshot(self.version + 1, self.nodes + tuple(added), node_index, self.live_nodes + tuple(added_live), live_node_index)
+
+    def without_node(self, node_key: Tuple[str, int]) -> 'MembershipSnapshot':
+        """
+        Returns the next version with the node removed.
+
+        Parameters:
+        ----------
+        node_key : Tuple[str, int]
+            The (ip_address, port_number) of the node, which must be in the snapshot.
+        """
+        removed: HiveNode = self.node_index[node_key]
+        node_index = dict(self.node_index)
+        del node_index[node_key]
+        live_node_index = dict(self.live_node_index)
+        live_nodes = self.live_nodes
+        if live_node_index.pop(node_key, None) is not None:
+            live_nodes = tuple([node for node in self.live_nodes if node is not removed])
+        return MembershipSnapshot(self.version + 1, tuple([node for node in self.nodes if node is not removed]), node_index, live_nodes, live_node_index)
+
+    def with_node_liveness(self, node_key: Tuple[str, int], is_live: bool) -> 'MembershipSnapshot':
+        """
+        Returns the next version with the node added to or removed from the live nodes, or this snapshot if nothing changes.
+
+        Parameters:
+        ----------
+        node_key : Tuple[str, int]
+            The (ip_address, port_number) of the node.
+        is_live : bool
+            Whether the node should be in the live nodes.
+        """
+        node = self.node_index.get(node_key)
+        if node is None or node.is_local_node or (node_key in self.live_node_index) == is_live:
+            return self
+
+        live_node_index = dict(self.live_node_index)
+        if is_live:
+            live_node_index[node_key] = node
+            live_nodes = self.live_nodes + (node,)
+        else:
+            del live_node_index[node_key]
+            live_nodes = tuple([live_node for live_node in self.live_nodes if live_node is not node])
+        return MembershipSnapshot(self.version + 1, self.nodes, self.node_index, live_nodes, live_node_index)
@@ -0,0 +1,131 @@
+import json
+import hashlib
+from typing import Any, Dict, List, Tuple
+from app_settings import AppSettings
+
+
+class MerkleTree:
+    """
+    MerkleTree summarises a replicated key-value set so two replicas can find where they differ by comparing
+    hashes from the root down, exchanging only the hashes of sub-trees that differ and, at the bottom, the keys of
+    the buckets that differ. The cost of a comparison grows with the number of differing keys, not with the size
+    of the set.
+
+    Keys are spread over 16^depth leaf buckets by the leading hex digits of their hash; a tree node is named by
+    the hex prefix its keys share, the root by ''. The hash of a node is the XOR of the hashes of the entries below
+    it, so an update only touches the depth + 1 nodes on its path.
+
+    Attributes:
+    ----------
+    depth : int
+        The number of hex digits naming a leaf bucket.
+    buckets : Dict[str, Dict[Any, int]]
+        The entry hash of every key, by leaf bucket.
+    node_hashes : Dict[str, int]
+        The hash of every non-empty tree node, by prefix.
+    """
+
+    HEX_DIGITS: str = '0123456789abcdef'
+
+    def __init__(self, depth: int = AppSettings.CONFIG_MERKLE_DEPTH):
+        """
+        Initializes a new instance of MerkleTree.
+
+        Parameters:
+        ----------
+        depth : int, optional
+            The number of hex digits naming a leaf bucket (default is AppSettings.CONFIG_MERKLE_DEPTH).
+        """
+        self.depth: int = depth
+        self.buckets: Dict[str, Dict[Any, int]] = {}
+        self.node_hashes: Dict[str, int] = {}
+
+    def get_bucket(self, key: Tuple[str, str]) -> str:
+        """
+        Returns the prefix of the leaf bucket holding a key.
+
+        Parameters:
+        ----------
+        key : Tuple[str, str]
+            The key.
+
+        Returns:
+        -------
+        str
+            The prefix of the bucket.
+        """
+        return hashlib.blake2b(json.dumps(key).encode(), digest_size=8).hexdigest()[:self.depth]
+
+    def update(self, key: Tuple[str, str], entry: Any) -> None:
+        """
+        Sets the entry of a key, replacing its previous entry.
+
+        Parameters:
+        ----------
+        key : Tuple[str, str]
+            The key.
+        entry : Any
+            The JSON serialisable entry of the key.
+        """
+        bucket_prefix: str = self.get_bucket(key)
+        bucket: Dict[Any, int] = self.buckets.setdefault(bucket_prefix, {})
+        entry_hash: int = int.from_bytes(hashlib.blake2b(json.dumps([key, entry]).encode(), digest_size=8).digest(), 'big')
+        change: int = bucket.get(key, 0) ^ entry_hash
+        bucket[key] = entry_hash
+        for length in range(self.depth + 1):
+            prefix: str = bucket_prefix[:length]
+            self.node_hashes[prefix] = self.node_hashes.get(prefix, 0) ^ change
+
+    def get_hash(self, prefix: str) -> int:
+        """
+        Returns the hash of a tree node, 0 if no key is below it.
+
+        Parameters:
+        ----------
+        prefix : str
+            The prefix naming the node.
+
+        Returns:
+        -------
+        int
+            The XOR of the hashes of the entries below the node.
+        """
+        return self.node_hashes.get(prefix, 0)
+
+    def get_children(self, prefix: str) -> Dict[str, int]:
+        """
+        Returns the hashes of the 16 children of a tree node above the leaf buckets.
+
+        Parameters:
+        ----------
+        prefix : str
+            The prefix naming the node.
+
+        Returns:
+        -------
+        Dict[str, int]
+            The hash of every child, by prefix.
+        """
+        return {prefix + digit: self.get_hash(prefix + digit) for digit in self.HEX_DIGITS}
+
+    def get_keys(self, bucket_prefix: str) -> List[Any]:
+        """
+        Returns the keys in a leaf bucket.
+
+        Parameters:
+        ----------
+        bucket_prefix : str
+            The prefix naming the bucket.
+
+        Returns:
+        -------
+        List[Any]
+            The keys in the bucket.
+        """
+        return list(self.buckets.get(bucket_prefix, {}))
+
+    def is_leaf(self, prefix: str) -> bool:
+        """
+        Returns whether a prefix names a leaf bucket.
+        """
+        return len(prefix) >= self.depth
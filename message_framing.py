@@ -0,0 +1,136 @@
+import socket
+import struct
+from collections import deque
+from typing import Deque, List, Optional
+from app_settings import AppSettings
+
+
+class FrameTooLargeError(Exception):
+    """
+    FrameTooLargeError is raised when a frame is larger than AppSettings.MAX_FRAME_SIZE_IN_BYTES,
+    either while encoding an outgoing payload or when a peer announces an oversized frame.
+    """
+
+
+class MessageFraming:
+    """
+    MessageFraming implements the length-prefixed wire format used between HiveNodes.
+    Every frame is a 4 byte big-endian unsigned payload length followed by the payload bytes.
+
+    Attributes:
+    ----------
+    HEADER_FORMAT : str
+        The struct format of the frame header.
+    HEADER_SIZE : int
+        The size of the frame header in bytes.
+    """
+
+    HEADER_FORMAT: str = '!I'
+    HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+
+    @staticmethod
+    def encode_frame(payload: bytes, max_frame_size: int = AppSettings.MAX_FRAME_SIZE_IN_BYTES) -> bytes:
+        """
+        Prefixes the payload with its length header.
+
+        Parameters:
+        ----------
+        payload : bytes
+            The payload to be framed.
+        max_frame_size : int, optional
+            The largest payload accepted (default is AppSettings.MAX_FRAME_SIZE_IN_BYTES).
+
+        Returns:
+        -------
+        bytes
+            The framed payload, ready to be written to a socket.
+        """
+        if len(payload) > max_frame_size:
+            raise FrameTooLargeError(f"Frame of {len(payload)} bytes exceeds the maximum frame size of {max_frame_size} bytes")
+        return struct.pack(MessageFraming.HEADER_FORMAT, len(payload)) + payload
+
+
+class FrameDecoder:
+    """
+    FrameDecoder is a streaming decoder for length-prefixed frames. Bytes are fed in as they arrive from a socket,
+    partial frames are buffered until complete and coalesced frames are split apart.
+
+    Attributes:
+    ----------
+    max_frame_size : int
+        The largest payload accepted from a peer.
+    buffer : bytearray
+        The bytes received that do not form a complete frame yet.
+    pending_frames : Deque[bytes]
+        Complete frames that have been decoded but not yet returned by read_frame.
+    """
+
+    def __init__(self, max_frame_size: int = AppSettings.MAX_FRAME_SIZE_IN_BYTES):
+        """
+        Initializes a new instance of FrameDecoder.
+
+        Parameters:
+        ----------
+        max_frame_size : int, optional
+            The largest payload accepted from a peer (default is AppSettings.MAX_FRAME_SIZE_IN_BYTES).
+        """
+        self.max_frame_size: int = max_frame_size
+        self.buffer: bytearray = bytearray()
+        self.pending_frames: Deque[bytes] = deque()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Adds received bytes to the decoder and returns every frame they complete.
+
+        Parameters:
+        ----------
+        data : bytes
+            The bytes received from the peer.
+
+        Returns:
+        -------
+        List[bytes]
+            The payloads of all frames completed by this call, in order.
+        """
+        self.buffer.extend(data)
+        frames: List[bytes] = []
+        offset: int = 0
+
+        while len(self.buffer) - offset >= MessageFraming.HEADER_SIZE:
+            (frame_size,) = struct.unpack_from(MessageFraming.HEADER_FORMAT, self.buffer, offset)
+            if frame_size > self.max_frame_size:
+                raise FrameTooLargeError(f"Peer announced a frame of {frame_size} bytes, the maximum frame size is {self.max_frame_size} bytes")
+
+            frame_end: int = offset + MessageFraming.HEADER_SIZE + frame_size
+            if len(self.buffer) < frame_end:
+                break
+
+            frames.append(bytes(self.buffer[offset + MessageFraming.HEADER_SIZE:frame_end]))
+            offset = frame_end
+
+        if offset:
+            del self.buffer[:offset]
+        return frames
+
+    def read_frame(self, sock: socket.socket, receive_size: int = AppSettings.SOCKET_RECEIVE_SIZE_IN_BYTES) -> Optional[bytes]:
+        """
+        Reads from the socket until a complete frame is available and returns it.
+
+        Parameters:
+        ----------
+        sock : socket.socket
+            The connected socket to read from.
+        receive_size : int, optional
+            The number of bytes requested per recv call (default is AppSettings.SOCKET_RECEIVE_SIZE_IN_BYTES).
+
+        Returns:
+        -------
+        Optional[bytes]
+            The payload of the next frame, or None if the peer closed the connection.
+        """
+        while not self.pending_frames:
+            data: bytes = sock.recv(receive_size)
+            if not data:
+                return None
+            self.pending_frames.extend(self.feed(data))
+        return self.pending_frames.popleft()
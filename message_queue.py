@@ -1,12 +1,129 @@
-from typing import List, Optional
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
 from logger import Logger
 from hive_message import HiveMessage
 from app_settings import AppSettings
 
 
+class QueuedMessage:
+    """
+    QueuedMessage is a HiveMessage waiting in a MessageQueue, together with the time it was enqueued and the time
+    it may be dequeued from.
+
+    Attributes:
+    ----------
+    hive_message : HiveMessage
+        The queued message.
+    enqueued_at : float
+        The monotonic time at which the message was enqueued.
+    coalesce_key : Optional[Tuple[str, str, int, str, int]]
+        The key under which newer messages replace this one, or None if the message is never replaced.
+    not_before : float
+        The monotonic time before which the message is not dequeued, 0 if it may be dequeued at once.
+    """
+
+    def __init__(self, hive_message: HiveMessage, coalesce_key: Optional[Tuple[str, str, int, str, int]] = None, not_before: float = 0.0):
+        """
+        Initializes a new instance of QueuedMessage.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The queued message.
+        coalesce_key : Optional[Tuple[str, str, int, str, int]], optional
+            The key under which newer messages replace this one (default is None).
+        not_before : float, optional
+            The monotonic time before which the message is not dequeued (default is 0, at once).
+        """
+        self.hive_message: HiveMessage = hive_message
+        self.enqueued_at: float = time.monotonic()
+        self.coalesce_key: Optional[Tuple[str, str, int, str, int]] = coalesce_key
+        self.not_before: float = not_before
+
+
+class PriorityLane:
+    """
+    PriorityLane holds the queued messages of one priority class, with the weight that sets its share of
+    dequeues and the statistics reported by MessageQueue.list_messages.
+
+    Attributes:
+    ----------
+    name : str
+        The name of the priority class.
+    weight : int
+        The number of messages this lane may dequeue per weighted round.
+    credit : int
+        The number of messages this lane may still dequeue in the current round.
+    entries : Deque[QueuedMessage]
+        The messages waiting in this lane, oldest first.
+    dequeued_count : int
+        The number of messages dequeued from this lane.
+    total_wait_time : float
+        The summed time in seconds dequeued messages waited in this lane.
+    max_wait_time : float
+        The longest time in seconds a dequeued message waited in this lane.
+    coalesced_count : int
+        The number of queued messages in this lane that were replaced by a newer message.
+    """
+
+    def __init__(self, name: str, weight: int):
+        """
+        Initializes a new instance of PriorityLane.
+
+        Parameters:
+        ----------
+        name : str
+            The name of the priority class.
+        weight : int
+            The number of messages this lane may dequeue per weighted round.
+        """
+        self.name: str = name
+        self.weight: int = weight
+        self.credit: int = weight
+        self.entries: Deque[QueuedMessage] = deque()
+        self.dequeued_count: int = 0
+        self.total_wait_time: float = 0.0
+        self.max_wait_time: float = 0.0
+        self.coalesced_count: int = 0
+
+    def pop(self) -> QueuedMessage:
+        """
+        Removes the oldest entry from the lane and records how long it waited.
+
+        Returns:
+        -------
+        QueuedMessage
+            The oldest entry in the lane.
+        """
+        entry: QueuedMessage = self.entries.popleft()
+        wait_time: float = time.monotonic() - entry.enqueued_at
+        self.dequeued_count += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        return entry
+
+
 class MessageQueue:
     """
-    MessageQueue manages a queue of HiveMessage objects for processing inbound and outbound messages.
+    MessageQueue manages a thread-safe queue of HiveMessage objects for processing inbound and outbound messages.
+    Consumers can block on dequeue and are woken as soon as a message is enqueued.
+
+    Messages are split into priority lanes by command (AppSettings.MESSAGE_PRIORITY_COMMAND_LANES) and dequeued
+    by weighted round robin (AppSettings.MESSAGE_PRIORITY_LANES): in each round a lane may dequeue up to its
+    weight, higher priority lanes first, so heartbeats do not wait behind a backlog of config messages while
+    low priority lanes still make progress.
+
+    Messages whose command is listed in AppSettings.COALESCED_COMMANDS are coalesced: a newer message with the same
+    command, sender and recipient replaces the queued one in place, so periodic snapshots such as gossip and config
+    never pile up and the queue stays bounded by the number of peers rather than by how far behind the consumer is.
+
+    A message can be enqueued with a not-before time, as the sender does to back off before retrying a failed
+    message. It is held apart, in a heap ordered by that time, and only joins its lane once it is due, so it is
+    skipped by dequeues until then without holding up the messages behind it.
 
     Attributes:
     ----------
@@ -14,11 +131,23 @@ class MessageQueue:
         An instance of the Logger class for logging messages.
     queue_name : str
         The name of the queue.
-    queue : List[HiveMessage]
-        A list to store HiveMessage objects.
+    lanes : Dict[str, PriorityLane]
+        The priority lanes, in priority order.
+    message_count : int
+        The number of messages across all lanes.
+    coalesced_messages : Dict[Tuple[str, str, int, str, int], QueuedMessage]
+        The queued entries of coalesced commands, by coalesce key.
+    deferred : List[Tuple[float, int, QueuedMessage]]
+        The (not-before time, sequence number, entry) of the messages that are not due yet, the earliest due first.
+    deferred_sequence : Iterator[int]
+        Numbers the deferred entries, so entries due at the same time keep the order they were enqueued in.
+    on_message_discarded : Optional[Callable[[HiveMessage], None]]
+        Called with every message dropped because a newer message replaced it.
+    condition : threading.Condition
+        Guards the lanes and wakes consumers waiting for messages.
     """
 
-    def __init__(self, queue_name: str):
+    def __init__(self, queue_name: str, priority_lanes: Optional[Dict[str, int]] = None, on_message_discarded: Optional[Callable[[HiveMessage], None]] = None):
         """
         Initializes a new instance of MessageQueue.
 
@@ -26,47 +155,312 @@ class MessageQueue:
         ----------
         queue_name : str
             The name of the queue.
+        priority_lanes : Optional[Dict[str, int]], optional
+            The lane names and weights in priority order (default is AppSettings.MESSAGE_PRIORITY_LANES).
+        on_message_discarded : Optional[Callable[[HiveMessage], None]], optional
+            Called with every message dropped because a newer message replaced it (default is None).
         """
         self.logger: Logger = Logger()
         self.queue_name: str = queue_name
-        self.queue: List[HiveMessage] = []
+        self.lanes: Dict[str, PriorityLane] = {
+            name: PriorityLane(name, weight)
+            for name, weight in (priority_lanes or AppSettings.MESSAGE_PRIORITY_LANES).items()
+        }
+        self.message_count: int = 0
+        self.coalesced_messages: Dict[Tuple[str, str, int, str, int], QueuedMessage] = {}
+        self.deferred: List[Tuple[float, int, QueuedMessage]] = []
+        self.deferred_sequence: Iterator[int] = itertools.count()
+        self.on_message_discarded: Optional[Callable[[HiveMessage], None]] = on_message_discarded
+        self.condition: threading.Condition = threading.Condition()
+
+    def get_lane(self, hive_message: HiveMessage) -> PriorityLane:
+        """
+        Returns the priority lane for a message, based on the first word of its command.
+        Commands without a configured lane go to the lowest priority lane.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message to classify.
+
+        Returns:
+        -------
+        PriorityLane
+            The lane the message belongs to.
+        """
+        command_name: str = hive_message.message.command.split(' ', 1)[0]
+        lane_name: Optional[str] = AppSettings.MESSAGE_PRIORITY_COMMAND_LANES.get(command_name)
+        if lane_name in self.lanes:
+            return self.lanes[lane_name]
+        return next(reversed(self.lanes.values()))
 
-    def enqueue(self, hive_message: HiveMessage) -> None:
+    def get_coalesce_key(self, hive_message: HiveMessage) -> Optional[Tuple[str, str, int, str, int]]:
         """
-        Adds a HiveMessage to the queue.
+        Returns the key under which a message replaces older queued messages, or None if its command is not coalesced.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message to classify.
+
+        Returns:
+        -------
+        Optional[Tuple[str, str, int, str, int]]
+            The (command, sender ip, sender port, recipient ip, recipient port) key, or None.
+        """
+        command_name: str = hive_message.message.command.split(' ', 1)[0]
+        if command_name not in AppSettings.COALESCED_COMMANDS:
+            return None
+        sender = hive_message.message.sender
+        recipient = hive_message.message.recipient
+        return command_name, sender.ip_address, int(sender.port_number), recipient.ip_address, int(recipient.port_number)
+
+    def enqueue(self, hive_message: HiveMessage, not_before: float = 0.0) -> None:
+        """
+        Adds a HiveMessage to its priority lane and wakes a waiting consumer. If a message with the same coalesce
+        key is already queued, the newer of the two takes its place instead. A message with a not-before time in
+        the future is held back until that time.
 
         Parameters:
         ----------
         hive_message : HiveMessage
             The message to be added to the queue.
+        not_before : float, optional
+            The monotonic time before which the message is not dequeued (default is 0, at once).
         """
         self.logger.debug("MessageQueue", f"Adding message to {self.queue_name} queue...")
-        self.queue.append(hive_message)
+        entry: QueuedMessage = QueuedMessage(hive_message, self.get_coalesce_key(hive_message), not_before)
+        with self.condition:
+            if not_before > time.monotonic():
+                heapq.heappush(self.deferred, (not_before, next(self.deferred_sequence), entry))
+                # Wake a waiting consumer, so it waits no longer than until this message is due
+                self.condition.notify()
+                return
+            discarded: Optional[HiveMessage] = self._add_entry(entry)
+
+        if discarded is not None:
+            self.message_discarded(discarded)
+
+    def _add_entry(self, entry: QueuedMessage) -> Optional[HiveMessage]:
+        """
+        Adds an entry to its priority lane, or coalesces it with the queued entry of the same coalesce key.
+        Must be called with the condition held.
+
+        Parameters:
+        ----------
+        entry : QueuedMessage
+            The entry to add.
+
+        Returns:
+        -------
+        Optional[HiveMessage]
+            The message dropped because a newer one replaced it, for the caller to pass to message_discarded once
+            the condition is released, or None.
+        """
+        hive_message: HiveMessage = entry.hive_message
+        coalesce_key = entry.coalesce_key
+        queued: Optional[QueuedMessage] = self.coalesced_messages.get(coalesce_key) if coalesce_key is not None else None
+        if queued is None:
+            self.get_lane(hive_message).entries.append(entry)
+            if coalesce_key is not None:
+                self.coalesced_messages[coalesce_key] = entry
+            self.message_count += 1
+            self.condition.notify()
+            return None
+
+        # Keep the queue position, only a newer message replaces the queued one (not a retried older one)
+        discarded: HiveMessage
+        if hive_message.created_timestamp >= queued.hive_message.created_timestamp:
+            discarded, queued.hive_message = queued.hive_message, hive_message
+        else:
+            discarded = hive_message
+        self.get_lane(hive_message).coalesced_count += 1
+        self.logger.debug("MessageQueue", f"Coalesced {coalesce_key[0]} message in {self.queue_name} queue...")
+        return discarded
+
+    def _release_due_entries(self, discarded: List[HiveMessage]) -> None:
+        """
+        Moves the deferred entries that are due into their priority lanes. Must be called with the condition held.
+
+        Parameters:
+        ----------
+        discarded : List[HiveMessage]
+            Collects the messages dropped because a newer one replaced them.
+        """
+        now: float = time.monotonic()
+        while self.deferred and self.deferred[0][0] <= now:
+            dropped: Optional[HiveMessage] = self._add_entry(heapq.heappop(self.deferred)[2])
+            if dropped is not None:
+                discarded.append(dropped)
 
-    def dequeue(self) -> Optional[HiveMessage]:
+    def _wait_for_due_messages(self, timeout: Optional[float], discarded: List[HiveMessage]) -> bool:
         """
-        Removes and returns the first HiveMessage from the queue.
+        Waits until a message can be dequeued, waking up when a deferred message becomes due. Must be called with
+        the condition held.
+
+        Parameters:
+        ----------
+        timeout : Optional[float]
+            The number of seconds to wait, 0 to return at once and None to wait indefinitely.
+        discarded : List[HiveMessage]
+            Collects the messages dropped because a newer one replaced them.
+
+        Returns:
+        -------
+        bool
+            True if a message can be dequeued, False if none could before the timeout.
+        """
+        deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._release_due_entries(discarded)
+            if self.message_count:
+                return True
+            now: float = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return False
+            wait: Optional[float] = None if deadline is None else deadline - now
+            if self.deferred:
+                wait = self.deferred[0][0] - now if wait is None else min(wait, self.deferred[0][0] - now)
+            self.condition.wait(wait)
+
+    def message_discarded(self, hive_message: HiveMessage) -> None:
+        """
+        Called when a message is dropped from the queue without being dequeued because a newer message replaced it.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message that was dropped.
+        """
+        if self.on_message_discarded:
+            self.on_message_discarded(hive_message)
+
+    def complete(self, hive_message: HiveMessage) -> None:
+        """
+        Marks a dequeued message as finished, either delivered or given up on. A MessageQueue keeps nothing
+        about a message once it is dequeued, so this does nothing here; durable queues use it to retire the message.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The finished message.
+        """
+
+    def dequeue(self, timeout: Optional[float] = 0) -> Optional[HiveMessage]:
+        """
+        Removes and returns the next HiveMessage from the queue, waiting for one to arrive or become due if none is.
+
+        Parameters:
+        ----------
+        timeout : Optional[float], optional
+            The number of seconds to wait for a message. 0 (the default) returns immediately and None waits indefinitely.
 
         Returns:
         -------
         Optional[HiveMessage]
-            The first message in the queue, or None if the queue is empty.
+            The next message in the queue, or None if the queue is still empty after the timeout.
+        """
+        discarded: List[HiveMessage] = []
+        hive_message: Optional[HiveMessage] = None
+        with self.condition:
+            if self._wait_for_due_messages(timeout, discarded):
+                self.logger.debug("MessageQueue", f"Removing message from {self.queue_name} queue...")
+                hive_message = self._pop_next()
+        for dropped in discarded:
+            self.message_discarded(dropped)
+        return hive_message
+
+    def dequeue_many(self, max_n: int, timeout: Optional[float] = 0) -> List[HiveMessage]:
+        """
+        Removes and returns up to max_n HiveMessages from the queue, waiting for at least one
+        to arrive or become due if none is.
+
+        Parameters:
+        ----------
+        max_n : int
+            The maximum number of messages to return.
+        timeout : Optional[float], optional
+            The number of seconds to wait for a message. 0 (the default) returns immediately and None waits indefinitely.
+
+        Returns:
+        -------
+        List[HiveMessage]
+            The messages removed from the queue in dequeue order, empty if the queue is still empty after the timeout.
+        """
+        discarded: List[HiveMessage] = []
+        hive_messages: List[HiveMessage] = []
+        with self.condition:
+            if self._wait_for_due_messages(timeout, discarded):
+                count: int = min(max_n, self.message_count)
+                self.logger.debug("MessageQueue", f"Removing {count} messages from {self.queue_name} queue...")
+                hive_messages = [self._pop_next() for _ in range(count)]
+        for dropped in discarded:
+            self.message_discarded(dropped)
+        return hive_messages
+
+    def _pop_next(self) -> HiveMessage:
+        """
+        Removes the next message by weighted round robin. Must be called with the condition held and
+        at least one message queued.
+
+        Returns:
+        -------
+        HiveMessage
+            The next message to process.
         """
-        if len(self.queue) > 0:
-            self.logger.debug("MessageQueue", f"Removing message from {self.queue_name} queue...")
-            return self.queue.pop(0)
-        return None
+        while True:
+            for lane in self.lanes.values():
+                if lane.entries and lane.credit > 0:
+                    lane.credit -= 1
+                    self.message_count -= 1
+                    entry: QueuedMessage = lane.pop()
+                    if entry.coalesce_key is not None:
+                        del self.coalesced_messages[entry.coalesce_key]
+                    return entry.hive_message
+            # Every lane with messages has used its share of this round, start the next round
+            for lane in self.lanes.values():
+                lane.credit = lane.weight
+
+    def size(self) -> int:
+        """
+        Returns the number of messages currently in the queue, including the ones that are not due yet.
+
+        Returns:
+        -------
+        int
+            The number of messages in the queue.
+        """
+        with self.condition:
+            return self.message_count + len(self.deferred)
 
     def list_messages(self) -> None:
         """
-        Logs the messages currently in the queue.
+        Logs the depth and wait times of each priority lane, followed by the messages currently in the queue.
         """
+        now: float = time.monotonic()
+        with self.condition:
+            lane_stats: List[str] = []
+            for lane in self.lanes.values():
+                oldest_wait: float = now - lane.entries[0].enqueued_at if lane.entries else 0.0
+                average_wait: float = lane.total_wait_time / lane.dequeued_count if lane.dequeued_count else 0.0
+                lane_stats.append(f"Lane {lane.name:<10} weight: {lane.weight:<3} depth: {len(lane.entries):<6} "
+                                  f"oldest wait: {oldest_wait:8.3f}s  average wait: {average_wait:8.3f}s  max wait: {lane.max_wait_time:8.3f}s  "
+                                  f"coalesced: {lane.coalesced_count}")
+            messages: List[QueuedMessage] = [entry for lane in self.lanes.values() for entry in lane.entries]
+            messages.extend(entry for _, _, entry in sorted(self.deferred))
+
         self.logger.info("MessageQueue", "-" * AppSettings.LOG_LINE_WIDTH)
-        self.logger.info("MessageQueue", f"{self.queue_name} message count: {len(self.queue)}")
-        for message in self.queue:
+        self.logger.info("MessageQueue", f"{self.queue_name} message count: {len(messages)}")
+        for line in lane_stats:
+            self.logger.info("MessageQueue", line)
+        for entry in messages:
+            message: HiveMessage = entry.hive_message
             self.logger.info("MessageQueue", "-" * (AppSettings.LOG_LINE_WIDTH // 2))
             self.logger.info("MessageQueue", f"Sender: [{message.message.sender.friendly_name}|{message.message.sender.ip_address}|{message.message.sender.port_number}]")
             self.logger.info("MessageQueue", f"Recipient: [{message.message.recipient.friendly_name}|{message.message.recipient.ip_address}|{message.message.recipient.port_number}]")
             self.logger.info("MessageQueue", f"Message: {message.message.to_json()}")
             self.logger.info("MessageQueue", f"Send Attempt Count: {message.send_attempt_count}")
+            if entry.not_before > now:
+                self.logger.info("MessageQueue", f"Due In: {entry.not_before - now:.3f}s")
+            self.logger.info("MessageQueue", f"Queued For: {now - entry.enqueued_at:.3f}s")
         self.logger.info("MessageQueue", "-" * AppSettings.LOG_LINE_WIDTH)
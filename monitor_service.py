@@ -4,11 +4,18 @@
 
 
 import datetime
-import json
-import os
+import time
+import threading
 from logger import Logger
+from app_settings import AppSettings
+from config_store import ConfigStore
+from results_store import ResultsStore
+from check_executor import CheckExecutor
+from check_scheduler import CheckScheduler
+from check_plan import CheckPlan
+from check_result import CheckResult
 from hive_node_manager import HiveNodeManager
-from network_monitoring_examples import check_server_http, check_dns_server_status, check_ntp_server, check_tcp_port, check_server_https, check_udp_port
+from typing import Dict
 
 def get_timestamp():
     ''' Helper function to return current timestamp'''
@@ -17,57 +24,139 @@ def get_timestamp():
 
 class ServiceMonitor():
 
-    def __init__(self, local_name, config, lock):
+    def __init__(self, local_name, config, lock, config_store=None, check_executor=None, results_store=None):
         self.logger: Logger = Logger()
         self.config = config
         self.local_name = local_name
         self.lock = lock
+        # Writes the config file, the caller runs its flush thread
+        self.config_store: ConfigStore = config_store if config_store is not None else ConfigStore(f"{local_name}.json", config, local_name, lock)
+        # Keeps the latest result of each service, apart from the replicated config
+        self.results_store: ResultsStore = results_store if results_store is not None else ResultsStore(f"{local_name}.results")
+        # Runs the checks in parallel, its worker threads start with the first check
+        self.check_executor: CheckExecutor = check_executor if check_executor is not None else CheckExecutor()
+        # The services in the order their next check is due, the check plan compiled for each,
+        # and the definitions of the services that could not be compiled
+        self.scheduler: CheckScheduler = CheckScheduler()
+        self.plans: Dict[str, CheckPlan] = {}
+        self.rejected_services: Dict[str, tuple] = {}
+        # Set to wake the monitor loop when the config changes or a check completes
+        self.wake_event = threading.Event()
+        self.config_changed = True
+        self.config_store.on_external_change = self.notify_config_changed
+        self.check_executor.on_result = self.wake_event.set
 
+    def save_config(self):
+        ''' Marks the config changed, the config store writes it to the JSON file of the local node within its flush interval
+            and the monitor loop reschedules the changed services'''
+        self.config_store.mark_dirty()
+        self.notify_config_changed()
+
+    def notify_config_changed(self):
+        ''' Wakes the monitor loop to reschedule the services of the changed config'''
+        self.config_changed = True
+        self.wake_event.set()
 
     def monitor_loop(self):
-        ''' Infinite loop to echo status of tracked services'''
+        ''' Infinite loop sleeping until the next service check is due, a check completes or the config changes,
+            then dispatching the due checks to the check executor and logging the results'''
+        now = time.monotonic()
+        next_stats_time = now + AppSettings.CHECK_STATS_INTERVAL_IN_SECONDS
+        next_poll_time = now + AppSettings.MONITOR_CONFIG_POLL_INTERVAL_IN_SECONDS
         while(1):
-            config_file_name = f"{self.local_name}.json"
-            if os.path.exists(config_file_name):
-                try:
-                    with self.lock.acquire(timeout=1):
-                        with open(config_file_name, 'r') as file:
-                            check_config = json.load(file)
-                            if self.config[self.local_name] != check_config[self.local_name]:
-                                self.config[self.local_name] = check_config[self.local_name]
-                except:
-                    pass
-            for key in self.config[self.local_name][1]:
-                # get time of last check and frequency 
-                timestamp = datetime.datetime.strptime(self.config[self.local_name][1][key][0], "%Y-%m-%d %H:%M:%S")
-                frequency = datetime.timedelta(seconds=int(self.config[self.local_name][1][key][2]))
-                
-                if datetime.datetime.strptime(get_timestamp(), "%Y-%m-%d %H:%M:%S") >= timestamp + frequency:
-                    service_type = self.config[self.local_name][1][key][1]
-
-                    # print monitoring data for each server/service
-                    self.config[self.local_name][1][key][0] = get_timestamp()
-                    if service_type == 'HTTP':
-                        service_response = check_server_http(self.config[self.local_name][1][key][3])
-                    elif service_type == 'HTTPS':
-                        service_response = check_server_https(self.config[self.local_name][1][key][3])
-                    elif service_type == 'NTP':
-                        service_response = check_ntp_server(self.config[self.local_name][1][key][3])
-                    elif service_type == 'DNS':
-                        service_response = check_dns_server_status(self.config[self.local_name][1][key][3], self.config[self.local_name][1][key][4], self.config[self.local_name][1][key][5])
-                    elif service_type == 'UDP':
-                        service_response = check_udp_port(self.config[self.local_name][1][key][3], int(self.config[self.local_name][1][key][4]))
-                    elif service_type == 'TCP':
-                        service_response = check_tcp_port(self.config[self.local_name][1][key][3], int(self.config[self.local_name][1][key][4]))
-
-                    if service_response[0] == True:
-                        status = "GOOD"
-                    else:
-                        status = "ERROR"
-
-                    output = f"{status} - {key} - {service_type} - {service_response}"
-                    self.logger.info("ServiceMonitor", output)
-                    if os.path.exists(config_file_name):
-                        os.remove(config_file_name)
-                    with open(config_file_name, 'w') as file:
-                        json.dump(self.config, file, indent=4)
+            next_due_time = self.scheduler.get_next_due_time()
+            wake_time = min(next_stats_time, next_poll_time, next_due_time if next_due_time is not None else next_poll_time)
+            self.wake_event.wait(max(wake_time - time.monotonic(), 0))
+            # Cleared before handling what woke the loop, so a wake up during the handling is not lost
+            self.wake_event.clear()
+            now = time.monotonic()
+
+            if now >= next_poll_time:
+                next_poll_time = now + AppSettings.MONITOR_CONFIG_POLL_INTERVAL_IN_SECONDS
+                # Pick up services added to the JSON file by hand, only the file's metadata is read while it is unchanged
+                self.config_store.adopt_external_changes()
+            if self.config_changed:
+                self.config_changed = False
+                self.schedule_services()
+
+            for key, due_time in self.scheduler.pop_due(now):
+                self.dispatch_check(key, due_time, now)
+
+            for result in self.check_executor.get_results():
+                self.handle_result(result)
+
+            if now >= next_stats_time:
+                next_stats_time = now + AppSettings.CHECK_STATS_INTERVAL_IN_SECONDS
+                self.log_check_stats()
+
+    def schedule_services(self):
+        ''' Compiles the new and changed services of the local config section into check plans and schedules them, and
+            unschedules the removed ones; the next check of a new or changed service is due its frequency after its last check,
+            taken from the results store, or from the config row of a service checked before results were kept apart'''
+        # The config is changed by the receiver and config protocol threads, copy the section holding the config lock
+        with self.lock:
+            services = dict(self.config[self.local_name][1])
+        for key in [key for key in self.plans if key not in services]:
+            self.scheduler.remove(key)
+            self.results_store.remove(key)
+            del self.plans[key]
+        for key in [key for key in self.rejected_services if key not in services]:
+            del self.rejected_services[key]
+
+        now = time.monotonic()
+        wall_now = time.time()
+        for key, service in services.items():
+            # Index 0 held the last check time before results were kept apart, the rest defines the service
+            definition = tuple(service[1:])
+            plan = self.plans.get(key)
+            if (plan is not None and plan.definition == definition) or self.rejected_services.get(key) == definition:
+                continue
+            try:
+                plan = CheckPlan.compile(key, service)
+            except ValueError as e:
+                self.logger.warning("ServiceMonitor", f"Not checking service {key}: {e}")
+                self.plans.pop(key, None)
+                self.scheduler.remove(key)
+                self.rejected_services[key] = definition
+                continue
+            self.plans[key] = plan
+            self.rejected_services.pop(key, None)
+            last_result = self.results_store.get_latest(key)
+            try:
+                last_check_time = last_result.started_time if last_result is not None else datetime.datetime.strptime(service[0], "%Y-%m-%d %H:%M:%S").timestamp()
+            except (TypeError, ValueError):
+                # Never checked
+                last_check_time = 0.0
+            self.scheduler.schedule(key, now + max(last_check_time + plan.frequency - wall_now, 0.0))
+
+    def dispatch_check(self, key, due_time, now):
+        ''' Submits the due check of a service to the check executor and schedules its next check'''
+        plan = self.plans.get(key)
+        if plan is None:
+            return
+        # The executor measures lateness against the wall clock
+        self.check_executor.submit(key, plan.check_type, plan.check, plan.args, time.time() - (now - due_time))
+        # The next check is due a frequency after this one was due, or after now if the monitor fell behind;
+        # a service whose previous check is still running skips this one
+        next_due_time = due_time + plan.frequency
+        self.scheduler.schedule(key, next_due_time if next_due_time > now else now + plan.frequency)
+
+    def handle_result(self, result: CheckResult):
+        ''' Logs the result of a completed check and records it in the results store, leaving the config unchanged'''
+        if result.is_up == True:
+            status = "GOOD"
+        else:
+            status = "ERROR"
+
+        output = f"{status} - {result.service_name} - {result.check_type} - {result.response}"
+        self.logger.info("ServiceMonitor", output)
+        # A check of a service removed while it ran is not kept
+        if result.service_name in self.plans:
+            self.results_store.record(result)
+
+    def log_check_stats(self):
+        ''' Logs the check rate, deadline overruns and schedule lateness since the last call'''
+        stats = self.check_executor.get_stats(reset=True)
+        self.logger.info("ServiceMonitor", f"{stats['completed']} checks ({stats['per_minute']:.0f}/min), {stats['overruns']} past their deadline, "
+                                           f"{stats['waiting']} waiting, started late by p50 {stats['lateness_p50']:.2f}s "
+                                           f"p99 {stats['lateness_p99']:.2f}s max {stats['lateness_max']:.2f}s")
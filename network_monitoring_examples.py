@@ -236,7 +236,7 @@ def traceroute(host: str, max_hops: int = 30, pings_per_hop: int = 1, verbose: b
     return '\n'.join(results)
 
 
-def check_server_http(url: str) -> Tuple[bool, Optional[int]]:
+def check_server_http(url: str, timeout: int = 5) -> Tuple[bool, Optional[int]]:
     """
     Check if an HTTP server is up by making a request to the provided URL.
 
@@ -245,12 +245,13 @@ def check_server_http(url: str) -> Tuple[bool, Optional[int]]:
     and the HTTP status code returned by the server.
 
     :param url: URL of the server (including http://)
+    :param timeout: Timeout for the request in seconds. Default is 5 seconds.
     :return: Tuple (True/False, status code)
              True if server is up (status code < 400), False otherwise
     """
     try:
-        # Making a GET request to the server
-        response: requests.Response = requests.get(url)
+        # Making a GET request to the server, with a timeout so an unresponsive server cannot hang the check
+        response: requests.Response = requests.get(url, timeout=timeout)
 
         # The HTTP status code is a number that indicates the outcome of the request.
         # Here, we consider status codes less than 400 as successful,
@@ -311,12 +312,14 @@ def check_server_https(url: str, timeout: int = 5) -> Tuple[bool, Optional[int],
         return False, None, f"Error during request: {e}"
 
 
-def check_ntp_server(server: str) -> Tuple[bool, Optional[str]]:
+def check_ntp_server(server: str, port: int = 123, timeout: int = 5) -> Tuple[bool, Optional[str]]:
     """
     Checks if an NTP server is up and returns its status and time.
 
     Args:
     server (str): The hostname or IP address of the NTP server to check.
+    port (int): The UDP port of the NTP server. Default is 123.
+    timeout (int): The timeout in seconds for the request. Default is 5 seconds.
 
     Returns:
     Tuple[bool, Optional[str]]: A tuple containing a boolean indicating the server status
@@ -329,7 +332,7 @@ def check_ntp_server(server: str) -> Tuple[bool, Optional[str]]:
     try:
         # Request time from the NTP server
         # 'version=3' specifies the NTP version to use for the request
-        response = client.request(server, version=3)
+        response = client.request(server, version=3, port=port, timeout=timeout)
 
         # If request is successful, return True and the server time
         # 'ctime' converts the time in seconds since the epoch to a readable format
@@ -339,19 +342,23 @@ def check_ntp_server(server: str) -> Tuple[bool, Optional[str]]:
         return False, None
 
 
-def check_dns_server_status(server, query, record_type) -> (bool, str):
+def check_dns_server_status(server, query, record_type, port: int = 53, timeout: int = 5) -> (bool, str):
     """
     Check if a DNS server is up and return the DNS query results for a specified domain and record type.
 
     :param server: DNS server name or IP address
     :param query: Domain name to query
     :param record_type: Type of DNS record (e.g., 'A', 'AAAA', 'MX', 'CNAME')
+    :param port: The UDP port of the DNS server. Default is 53.
+    :param timeout: Time in seconds the query may take in total. Default is 5 seconds.
     :return: Tuple (status, query_results)
     """
     try:
         # Set the DNS resolver to use the specified server
         resolver = dns.resolver.Resolver()
         resolver.nameservers = [socket.gethostbyname(server)]
+        resolver.lifetime = timeout
+        resolver.port = port
 
         # Perform a DNS query for the specified domain and record type
         query_results = resolver.resolve(query, record_type)
@@ -364,13 +371,14 @@ def check_dns_server_status(server, query, record_type) -> (bool, str):
         return False, str(e)
 
 
-def check_tcp_port(ip_address: str, port: int) -> (bool, str):
+def check_tcp_port(ip_address: str, port: int, timeout: int = 3) -> (bool, str):
     """
     Checks the status of a specific TCP port on a given IP address.
 
     Args:
     ip_address (str): The IP address of the target server.
     port (int): The TCP port number to check.
+    timeout (int): The timeout duration in seconds for the connection attempt. Default is 3 seconds.
 
     Returns:
     tuple: A tuple containing a boolean and a string.
@@ -385,8 +393,8 @@ def check_tcp_port(ip_address: str, port: int) -> (bool, str):
     try:
         # Create a socket object using the AF_INET address family (IPv4) and SOCK_STREAM socket type (TCP).
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            # Set a timeout for the socket to avoid waiting indefinitely. Here, 3 seconds is used as a reasonable timeout duration.
-            s.settimeout(3)
+            # Set a timeout for the socket to avoid waiting indefinitely.
+            s.settimeout(timeout)
 
             # Attempt to connect to the specified IP address and port.
             # If the connection is successful, the port is open.
@@ -421,9 +429,9 @@ def check_udp_port(ip_address: str, port: int, timeout: int = 3) -> (bool, str):
            The string provides a description of the port status.
 
     Description:
-    This function attempts to send a UDP packet to the specified port on the given IP address.
-    Since UDP is a connectionless protocol, the function can't definitively determine if the port is open.
-    It can only confirm if the port is closed, typically indicated by an ICMP 'Destination Unreachable' response.
+    This function connects a UDP socket to the specified port on the given IP address and sends an empty packet.
+    Since UDP is a connectionless protocol, no answer does not prove the port is open. Any answer means it is open.
+    As the socket is connected, an ICMP 'Destination Unreachable' response is reported and the port found closed.
     """
 
     try:
@@ -432,14 +440,20 @@ def check_udp_port(ip_address: str, port: int, timeout: int = 3) -> (bool, str):
             # Set a timeout for the socket to avoid waiting indefinitely.
             s.settimeout(timeout)
 
+            # Connecting a UDP socket does not establish a connection, it only sets the destination.
+            # It also makes the system report an ICMP 'Destination Unreachable' response to this socket.
+            s.connect((ip_address, port))
+
             # Send a dummy packet to the specified IP address and port.
-            # As UDP is connectionless, this does not establish a connection but merely sends the packet.
-            s.sendto(b'', (ip_address, port))
+            s.send(b'')
 
             try:
-                # Try to receive data from the socket.
-                # If an ICMP 'Destination Unreachable' message is received, the port is considered closed.
-                s.recvfrom(1024)
+                # Try to receive data from the socket. Any answer means a service is listening on the port.
+                s.recv(1024)
+                return True, f"Port {port} on {ip_address} is open."
+
+            except ConnectionRefusedError:
+                # If an ICMP 'Destination Unreachable' message is received, the port is closed.
                 return False, f"Port {port} on {ip_address} is closed."
 
             except socket.timeout:
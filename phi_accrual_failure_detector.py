@@ -0,0 +1,162 @@
+import math
+import time
+from array import array
+from typing import Optional
+from app_settings import AppSettings
+
+
+class PhiAccrualFailureDetector:
+    """
+    PhiAccrualFailureDetector estimates how likely it is that a node has failed from the arrival times of its heartbeats.
+    Instead of a binary live/dead verdict it reports a suspicion level phi: the -log10 probability that a heartbeat
+    would still be this late if the node were alive, using a normal distribution fitted to the recent inter-arrival
+    times. phi 1 means a 10% chance of a wrong suspicion, phi 3 a 0.1% chance, and so on.
+
+    The inter-arrival times are kept in a fixed-size ring buffer with a running sum and sum of squares, so recording
+    a heartbeat and computing phi both take constant time.
+
+    Attributes:
+    ----------
+    window_size : int
+        The number of most recent inter-arrival times kept.
+    min_std_deviation : float
+        The smallest standard deviation used, so perfectly regular heartbeats do not make phi explode on a tiny delay.
+    min_std_deviation_ratio : float
+        The smallest standard deviation used, as a fraction of the mean inter-arrival time.
+    acceptable_heartbeat_pause : float
+        Extra seconds a heartbeat may be late before it adds to the suspicion.
+    intervals : array
+        The ring buffer of inter-arrival times in seconds.
+    interval_count : int
+        The number of inter-arrival times in the ring buffer.
+    next_index : int
+        The position in the ring buffer written by the next inter-arrival time.
+    interval_sum : float
+        The sum of the inter-arrival times in the ring buffer.
+    interval_squared_sum : float
+        The sum of the squared inter-arrival times in the ring buffer.
+    last_heartbeat : Optional[float]
+        The monotonic time of the latest heartbeat, or None if none has arrived.
+    first_heartbeat_estimate : float
+        The expected inter-arrival time in seconds, used until the first interval has been measured.
+    """
+
+    def __init__(self,
+                 window_size: int = AppSettings.PHI_WINDOW_SIZE,
+                 min_std_deviation: float = AppSettings.PHI_MIN_STD_DEVIATION_IN_SECONDS,
+                 min_std_deviation_ratio: float = AppSettings.PHI_MIN_STD_DEVIATION_RATIO,
+                 acceptable_heartbeat_pause: float = AppSettings.PHI_ACCEPTABLE_HEARTBEAT_PAUSE_IN_SECONDS,
+                 first_heartbeat_estimate: float = AppSettings.HEARTBEAT_PROTOCOL_FREQUENCY_IN_SECONDS):
+        """
+        Initializes a new instance of PhiAccrualFailureDetector.
+
+        Parameters:
+        ----------
+        window_size : int, optional
+            The number of most recent inter-arrival times kept.
+        min_std_deviation : float, optional
+            The smallest standard deviation used, in seconds.
+        min_std_deviation_ratio : float, optional
+            The smallest standard deviation used, as a fraction of the mean inter-arrival time.
+        acceptable_heartbeat_pause : float, optional
+            Extra seconds a heartbeat may be late before it adds to the suspicion.
+        first_heartbeat_estimate : float, optional
+            The expected inter-arrival time in seconds, used until the first interval has been measured.
+        """
+        self.window_size: int = window_size
+        self.min_std_deviation: float = min_std_deviation
+        self.min_std_deviation_ratio: float = min_std_deviation_ratio
+        self.acceptable_heartbeat_pause: float = acceptable_heartbeat_pause
+        self.intervals: array = array('d', bytes(8 * window_size))
+        self.interval_count: int = 0
+        self.next_index: int = 0
+        self.interval_sum: float = 0.0
+        self.interval_squared_sum: float = 0.0
+        self.last_heartbeat: Optional[float] = None
+        self.first_heartbeat_estimate: float = first_heartbeat_estimate
+
+    def heartbeat(self, now: Optional[float] = None) -> None:
+        """
+        Records the arrival of a heartbeat.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic arrival time (default is the current time).
+        """
+        now = time.monotonic() if now is None else now
+        if self.last_heartbeat is None:
+            # Seed the window so phi is meaningful from the second heartbeat on
+            self.add_interval(self.first_heartbeat_estimate)
+        else:
+            self.add_interval(now - self.last_heartbeat)
+        self.last_heartbeat = now
+
+    def add_interval(self, interval: float) -> None:
+        """
+        Adds an inter-arrival time to the ring buffer, replacing the oldest one once the buffer is full.
+
+        Parameters:
+        ----------
+        interval : float
+            The inter-arrival time in seconds.
+        """
+        if self.interval_count == self.window_size:
+            oldest: float = self.intervals[self.next_index]
+            self.interval_sum -= oldest
+            self.interval_squared_sum -= oldest * oldest
+        else:
+            self.interval_count += 1
+        self.intervals[self.next_index] = interval
+        self.interval_sum += interval
+        self.interval_squared_sum += interval * interval
+        self.next_index = (self.next_index + 1) % self.window_size
+
+    def phi(self, now: Optional[float] = None) -> float:
+        """
+        Returns the current suspicion level of the node, 0 if no heartbeat has arrived yet.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic time to evaluate phi at (default is the current time).
+
+        Returns:
+        -------
+        float
+            The suspicion level phi.
+        """
+        if self.last_heartbeat is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+
+        interval_mean: float = self.interval_sum / self.interval_count
+        mean: float = interval_mean + self.acceptable_heartbeat_pause
+        variance: float = max(self.interval_squared_sum / self.interval_count - interval_mean ** 2, 0.0)
+        std_deviation: float = max(math.sqrt(variance), self.min_std_deviation, self.min_std_deviation_ratio * interval_mean)
+
+        # Logistic approximation of the normal tail, P(late) = 1 / (1 + e^z), so phi = log10(1 + e^z),
+        # computed without overflowing for very late or very early heartbeats
+        y: float = (now - self.last_heartbeat - mean) / std_deviation
+        z: float = y * (1.5976 + 0.070566 * y * y)
+        if z > 0:
+            return (z + math.log1p(math.exp(-z))) / math.log(10)
+        return math.log1p(math.exp(z)) / math.log(10)
+
+    def is_suspect(self, threshold: float = AppSettings.PHI_SUSPICION_THRESHOLD, now: Optional[float] = None) -> bool:
+        """
+        Returns whether the suspicion level has reached the threshold.
+
+        Parameters:
+        ----------
+        threshold : float, optional
+            The phi at which the node is suspected (default is AppSettings.PHI_SUSPICION_THRESHOLD).
+        now : Optional[float], optional
+            The monotonic time to evaluate phi at (default is the current time).
+
+        Returns:
+        -------
+        bool
+            True if the node is suspected to have failed, False otherwise.
+        """
+        return self.phi(now) >= threshold
@@ -0,0 +1,143 @@
+import struct
+import threading
+from logger import Logger
+from app_settings import AppSettings
+from check_result import CheckResult
+from write_ahead_log import WriteAheadLog
+from typing import Dict, Optional
+
+
+class ResultsStore:
+    """
+    ResultsStore keeps the latest check result of every service of the local node, apart from the replicated config,
+    so completed checks change neither the config that is gossiped to the other nodes nor the config file.
+
+    Results are appended to a WriteAheadLog keyed by service name, committed in groups every commit interval and
+    compacted down to the latest result of each service, with the latest results indexed in memory. A result is
+    encoded as the started time, duration and lateness, whether the service was up, the check type and the response
+    as text, truncated to the maximum response length.
+
+    Attributes:
+    ----------
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    directory : str
+        The directory of the results log.
+    response_max_length : int
+        The maximum number of characters of a response kept.
+    log : WriteAheadLog
+        The append-only results log.
+    lock : threading.Lock
+        Guards the latest results.
+    latest : Dict[str, CheckResult]
+        The latest result of each service.
+    """
+
+    RESULT_HEADER_FORMAT: str = '!dffBB'
+    RESULT_HEADER_SIZE: int = struct.calcsize(RESULT_HEADER_FORMAT)
+
+    def __init__(self, directory: str,
+                 commit_interval: float = AppSettings.RESULTS_COMMIT_INTERVAL_IN_SECONDS,
+                 response_max_length: int = AppSettings.RESULTS_RESPONSE_MAX_LENGTH):
+        """
+        Initializes a new instance of ResultsStore, loading the latest results stored in the directory.
+
+        Parameters:
+        ----------
+        directory : str
+            The directory of the results log, created if it does not exist.
+        commit_interval : float, optional
+            The number of seconds results are collected before they are written together (default is AppSettings.RESULTS_COMMIT_INTERVAL_IN_SECONDS).
+        response_max_length : int, optional
+            The maximum number of characters of a response kept (default is AppSettings.RESULTS_RESPONSE_MAX_LENGTH).
+        """
+        self.logger: Logger = Logger()
+        self.directory: str = directory
+        self.response_max_length: int = response_max_length
+        self.log: WriteAheadLog = WriteAheadLog(directory, group_commit_interval=commit_interval)
+        self.lock: threading.Lock = threading.Lock()
+        self.latest: Dict[str, CheckResult] = {}
+        for service_name, payload in self.log.get_live_records().items():
+            try:
+                self.latest[service_name] = self.decode_result(service_name, payload)
+            except (struct.error, UnicodeDecodeError) as e:
+                self.logger.warning("ResultsStore", f"Ignoring unreadable result of {service_name}: {e}")
+        self.logger.debug("ResultsStore", f"Opened {directory} with the results of {len(self.latest)} services")
+
+    def record(self, result: CheckResult) -> None:
+        """
+        Appends a result as the latest result of its service.
+
+        Parameters:
+        ----------
+        result : CheckResult
+            The result of a completed check.
+        """
+        response: str = str(result.response)[:self.response_max_length]
+        stored: CheckResult = CheckResult(result.service_name, result.check_type, result.is_up, response,
+                                          result.started_time, result.duration, result.lateness)
+        with self.lock:
+            self.latest[result.service_name] = stored
+        self.log.put(result.service_name, self.encode_result(stored))
+
+    def remove(self, service_name: str) -> None:
+        """
+        Forgets the results of a service.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the service.
+        """
+        with self.lock:
+            if self.latest.pop(service_name, None) is None:
+                return
+        self.log.delete(service_name)
+
+    def get_latest(self, service_name: str) -> Optional[CheckResult]:
+        """
+        Returns the latest result of a service, with the response as text, or None if it has none.
+
+        Parameters:
+        ----------
+        service_name : str
+            The name of the service.
+        """
+        with self.lock:
+            return self.latest.get(service_name)
+
+    def get_all_latest(self) -> Dict[str, CheckResult]:
+        """
+        Returns a copy of the latest result of every service, with the responses as text.
+        """
+        with self.lock:
+            return dict(self.latest)
+
+    def flush(self) -> None:
+        """
+        Writes the results recorded so far.
+        """
+        self.log.flush()
+
+    def close(self) -> None:
+        """
+        Writes the results recorded so far and closes the results log.
+        """
+        self.log.close()
+
+    def encode_result(self, result: CheckResult) -> bytes:
+        """
+        Encodes a result whose response is text as a results log payload.
+        """
+        check_type: bytes = result.check_type.encode()
+        return (struct.pack(self.RESULT_HEADER_FORMAT, result.started_time, result.duration, result.lateness,
+                            result.is_up, len(check_type)) + check_type + result.response.encode())
+
+    def decode_result(self, service_name: str, payload: bytes) -> CheckResult:
+        """
+        Decodes a results log payload. Raises struct.error or UnicodeDecodeError if the payload is malformed.
+        """
+        started_time, duration, lateness, is_up, check_type_size = struct.unpack_from(self.RESULT_HEADER_FORMAT, payload)
+        check_type_end: int = self.RESULT_HEADER_SIZE + check_type_size
+        check_type: str = payload[self.RESULT_HEADER_SIZE:check_type_end].decode()
+        return CheckResult(service_name, check_type, bool(is_up), payload[check_type_end:].decode(), started_time, duration, lateness)
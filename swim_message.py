@@ -0,0 +1,63 @@
+from base_message import BaseMessage
+from hive_node import HiveNode
+from typing import Dict, List, Optional
+
+
+class SwimMessage(BaseMessage):
+    """
+    SwimMessage represents a message of the SWIM membership protocol in the Hive network: a 'ping', a 'ping_req'
+    asking the recipient to ping a target on the sender's behalf, or a 'ping_ack' answering a ping.
+    Every SWIM message piggybacks a few recent membership updates.
+
+    Attributes:
+    ----------
+    sender : HiveNode
+        The sender node of the message.
+    recipient : HiveNode
+        The recipient node of the message.
+    command : str
+        Either 'ping', 'ping_req' or 'ping_ack'.
+    sequence_number : int
+        Matches a 'ping_ack' to the 'ping' or 'ping_req' it answers.
+    updates : List[Dict]
+        The piggybacked membership updates, each with friendly_name, ip_address, port_number, status and incarnation.
+    target : Optional[Dict[str, str]]
+        For a 'ping_req', and the 'ping_ack' relayed back for it, the friendly_name, ip_address and port_number of the probed node.
+    """
+
+    def __init__(self, sender: HiveNode, recipient: HiveNode, command: str, sequence_number: int, updates: List[Dict], target: Optional[Dict[str, str]] = None):
+        """
+        Initializes a new instance of SwimMessage.
+
+        Parameters:
+        ----------
+        sender : HiveNode
+            The sender node of the message.
+        recipient : HiveNode
+            The recipient node of the message.
+        command : str
+            Either 'ping', 'ping_req' or 'ping_ack'.
+        sequence_number : int
+            Matches a 'ping_ack' to the 'ping' or 'ping_req' it answers.
+        updates : List[Dict]
+            The piggybacked membership updates.
+        target : Optional[Dict[str, str]], optional
+            The probed node of a 'ping_req' (default is None).
+        """
+        super().__init__(sender, recipient, command)
+        self.sequence_number: int = sequence_number
+        self.updates: List[Dict] = updates
+        self.target: Optional[Dict[str, str]] = target
+
+    def to_dict(self) -> Dict:
+        """
+        Converts the SwimMessage instance to a dictionary representation.
+
+        Returns:
+        -------
+        Dict
+            A dictionary representing the SwimMessage instance.
+        """
+        base_dict: Dict = super().to_dict()
+        base_dict.update({'sequence_number': self.sequence_number, 'updates': self.updates, 'target': self.target})
+        return base_dict
@@ -0,0 +1,397 @@
+import math
+import random
+import threading
+import time
+from logger import Logger
+from hive_node import HiveNode
+from hive_message import HiveMessage
+from message_queue import MessageQueue
+from app_settings import AppSettings
+from swim_message import SwimMessage
+from hive_node_manager import HiveNodeManager
+from typing import Dict, List, Optional, Tuple
+
+
+class SwimProtocolCommandManager:
+    """
+    SwimProtocolCommandManager runs the SWIM membership protocol for the Hive network, replacing the separate
+    heartbeat and full-dump gossip protocols.
+
+    Every protocol period the local node pings one member, walking the members in a shuffled round-robin order.
+    If no 'ping_ack' arrives within the ping timeout, it asks AppSettings.SWIM_INDIRECT_PROBE_COUNT other members
+    to ping the member on its behalf with a 'ping_req'. If none of them relays an ack before the period ends, the
+    member becomes suspect, and it is declared dead unless it refutes the suspicion within the suspicion timeout.
+    Membership changes (alive, suspect, dead, each with the member's incarnation number) are not sent in messages
+    of their own but piggybacked on pings and acks, each a logarithmic number of times, so every node sends and
+    receives a roughly constant number of small messages per period whatever the cluster size. The only full
+    membership transfer is the one-off ack to a member pinging for the first time, so it joins in one round trip.
+
+    Attributes:
+    ----------
+    enable : bool
+        A class-level flag to enable or disable the SWIM protocol.
+    COMMANDS : Tuple[str, ...]
+        The commands of the messages handled by this manager.
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    hive_node_manager : HiveNodeManager
+        Manages the nodes in the Hive network.
+    outbound_message_queue : MessageQueue
+        A queue for outbound messages.
+    sequence_number : int
+        The sequence number of the latest ping or ping_req sent.
+    pending_probes : Dict[int, Dict]
+        The probes waiting for an ack by sequence number, each with the probed node, its deadline and
+        whether the indirect probe has started.
+    relayed_probes : Dict[int, Tuple[HiveNode, int, Dict[str, str], float]]
+        The pings sent on behalf of another member by sequence number, with the requester, the requester's
+        sequence number, the probed node and the deadline after which the entry is dropped.
+    suspects : Dict[Tuple[str, int], float]
+        The suspect members by (ip_address, port_number), with the time they will be declared dead.
+    updates : Dict[Tuple[str, int], List]
+        The membership updates still to be piggybacked by (ip_address, port_number), each with the number
+        of times it is still to be sent.
+    probe_order : List[HiveNode]
+        The members still to be probed in the current round-robin round.
+    next_probe_time : float
+        The monotonic time the next protocol period starts.
+    lock : threading.Lock
+        Guards the protocol state, which is used by the protocol thread and the inbound queue thread.
+    """
+
+    enable: bool = True
+    COMMANDS: Tuple[str, ...] = ('ping', 'ping_req', 'ping_ack')
+
+    def __init__(self, hive_node_manager: HiveNodeManager, outbound_message_queue: MessageQueue):
+        """
+        Initializes a new instance of SwimProtocolCommandManager.
+
+        Parameters:
+        ----------
+        hive_node_manager : HiveNodeManager
+            Manages the nodes in the Hive network.
+        outbound_message_queue : MessageQueue
+            A queue for outbound messages.
+        """
+        self.logger: Logger = Logger()
+        self.hive_node_manager: HiveNodeManager = hive_node_manager
+        self.outbound_message_queue: MessageQueue = outbound_message_queue
+        self.sequence_number: int = 0
+        self.pending_probes: Dict[int, Dict] = {}
+        self.relayed_probes: Dict[int, Tuple[HiveNode, int, Dict[str, str], float]] = {}
+        self.suspects: Dict[Tuple[str, int], float] = {}
+        self.updates: Dict[Tuple[str, int], List] = {}
+        self.probe_order: List[HiveNode] = []
+        self.next_probe_time: float = 0.0
+        self.lock: threading.Lock = threading.Lock()
+
+        # Announce the local node so members learn about it from the first pings
+        self.queue_update(self.hive_node_manager.local_node, 'alive')
+
+        self.logger.debug("SwimProtocolCommandManager", "SwimProtocolCommandManager initialized...")
+
+    def run(self) -> None:
+        """
+        Starts the SWIM protocol, probing one member every AppSettings.SWIM_PROTOCOL_PERIOD_IN_SECONDS and
+        expiring probes and suspicions as their deadlines pass.
+        """
+        while True:
+            if SwimProtocolCommandManager.enable:
+                self.tick()
+            time.sleep(AppSettings.SWIM_TICK_IN_SECONDS)
+
+    def tick(self, now: Optional[float] = None) -> None:
+        """
+        Advances the protocol: escalates or fails expired probes, declares expired suspects dead and starts
+        the next probe when a new protocol period begins.
+
+        Parameters:
+        ----------
+        now : Optional[float], optional
+            The monotonic time (default is the current time).
+        """
+        now = time.monotonic() if now is None else now
+        messages: List[SwimMessage] = []
+        with self.lock:
+            for sequence_number, probe in list(self.pending_probes.items()):
+                if probe['deadline'] > now:
+                    continue
+                if probe['indirect']:
+                    del self.pending_probes[sequence_number]
+                    self.suspect_node(probe['node'], now)
+                else:
+                    probe['indirect'] = True
+                    probe['deadline'] = now + max(AppSettings.SWIM_PROTOCOL_PERIOD_IN_SECONDS - AppSettings.SWIM_PING_TIMEOUT_IN_SECONDS, AppSettings.SWIM_PING_TIMEOUT_IN_SECONDS)
+                    messages.extend(self.build_ping_requests(probe['node'], sequence_number))
+
+            for sequence_number, relayed_probe in list(self.relayed_probes.items()):
+                if relayed_probe[3] <= now:
+                    del self.relayed_probes[sequence_number]
+
+            for node_key, deadline in list(self.suspects.items()):
+                if deadline <= now:
+                    del self.suspects[node_key]
+                    node: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(*node_key)
+                    if node:
+                        self.logger.info("SwimProtocolCommandManager", f"Suspect {node.friendly_name} did not refute the suspicion, declaring it dead...")
+                        node.node_is_dead()
+                        self.queue_update(node, 'dead')
+
+            if now >= self.next_probe_time:
+                self.next_probe_time = now + AppSettings.SWIM_PROTOCOL_PERIOD_IN_SECONDS
+                target: Optional[HiveNode] = self.get_next_probe_target()
+                if target:
+                    self.sequence_number += 1
+                    self.pending_probes[self.sequence_number] = {'node': target, 'deadline': now + AppSettings.SWIM_PING_TIMEOUT_IN_SECONDS, 'indirect': False}
+                    messages.append(self.build_message(target, 'ping', self.sequence_number))
+
+        self.send(messages)
+
+    def handle_message(self, hive_message: HiveMessage, now: Optional[float] = None) -> None:
+        """
+        Handles an incoming SWIM message: applies its piggybacked updates and answers or relays it.
+
+        Parameters:
+        ----------
+        hive_message : HiveMessage
+            The message containing a 'ping', 'ping_req' or 'ping_ack' command.
+        now : Optional[float], optional
+            The monotonic time (default is the current time).
+        """
+        now = time.monotonic() if now is None else now
+        message: SwimMessage = hive_message.message
+        messages: List[SwimMessage] = []
+        with self.lock:
+            is_new_member: bool = self.hive_node_manager.get_node_by_ip_address_and_port(message.sender.ip_address, message.sender.port_number) is None
+            sender: HiveNode = self.get_or_add_node(message.sender.friendly_name, message.sender.ip_address, message.sender.port_number, now)
+            self.revive_node(sender)
+            for update in message.updates:
+                self.apply_update(update, now)
+
+            if message.command == 'ping':
+                ack: SwimMessage = self.build_message(sender, 'ping_ack', message.sequence_number, message.target)
+                if is_new_member:
+                    # A joining member gets the whole membership once instead of waiting for it to trickle in
+                    ack.updates.extend(self.get_member_updates())
+                messages.append(ack)
+            elif message.command == 'ping_req' and message.target:
+                target: HiveNode = self.get_or_add_node(message.target['friendly_name'], message.target['ip_address'], message.target['port_number'], now)
+                self.sequence_number += 1
+                self.relayed_probes[self.sequence_number] = (sender, message.sequence_number, message.target, now + AppSettings.SWIM_PROTOCOL_PERIOD_IN_SECONDS)
+                messages.append(self.build_message(target, 'ping', self.sequence_number))
+            elif message.command == 'ping_ack':
+                if self.pending_probes.pop(message.sequence_number, None) is None:
+                    relayed_probe = self.relayed_probes.pop(message.sequence_number, None)
+                    if relayed_probe:
+                        requester, requester_sequence_number, target_info, _ = relayed_probe
+                        messages.append(self.build_message(requester, 'ping_ack', requester_sequence_number, target_info))
+
+        self.send(messages)
+
+    def apply_update(self, update: Dict, now: float) -> None:
+        """
+        Applies a piggybacked membership update if it is newer than what is known about the member, and queues
+        it to be passed on. A suspicion or death of the local node is refuted by raising its incarnation.
+        Must be called with lock held.
+
+        Parameters:
+        ----------
+        update : Dict
+            The update, with friendly_name, ip_address, port_number, status and incarnation.
+        now : float
+            The monotonic time.
+        """
+        status: str = update['status']
+        incarnation: int = int(update['incarnation'])
+        local_node: HiveNode = self.hive_node_manager.local_node
+        node_key: Tuple[str, int] = HiveNodeManager.get_node_key(update['ip_address'], update['port_number'])
+
+        if node_key == HiveNodeManager.get_node_key(local_node.ip_address, local_node.port_number):
+            if status != 'alive' and incarnation >= local_node.incarnation:
+                local_node.incarnation = incarnation + 1
+                self.logger.info("SwimProtocolCommandManager", f"Refuting {status} rumour about the local node with incarnation {local_node.incarnation}...")
+                self.queue_update(local_node, 'alive')
+            return
+
+        node: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(*node_key)
+        if node is None:
+            if status == 'dead':
+                return
+            node = HiveNode(update['friendly_name'], update['ip_address'], int(update['port_number']))
+            node.incarnation = incarnation
+            self.hive_node_manager.add_node(node)
+            if status == 'suspect':
+                self.suspects[node_key] = now + self.get_suspicion_timeout()
+            self.queue_update(node, status)
+            return
+
+        current_status: str = 'dead' if node.status == 'Dead' else 'suspect' if node_key in self.suspects else 'alive'
+        if status == 'alive' and incarnation > node.incarnation:
+            node.incarnation = incarnation
+            self.suspects.pop(node_key, None)
+            node.node_is_alive()
+        elif status == 'suspect' and current_status != 'dead' and (incarnation > node.incarnation or (incarnation == node.incarnation and current_status == 'alive')):
+            node.incarnation = incarnation
+            self.suspects[node_key] = now + self.get_suspicion_timeout()
+        elif status == 'dead' and current_status != 'dead' and incarnation >= node.incarnation:
+            node.incarnation = incarnation
+            self.suspects.pop(node_key, None)
+            node.node_is_dead()
+        else:
+            return
+        self.logger.info("SwimProtocolCommandManager", f"{node.friendly_name} is {status} (incarnation {incarnation})...")
+        self.queue_update(node, status)
+
+    def suspect_node(self, node: HiveNode, now: float) -> None:
+        """
+        Marks a member that failed its direct and indirect probes as suspect. Must be called with lock held.
+
+        Parameters:
+        ----------
+        node : HiveNode
+            The member that failed its probes.
+        now : float
+            The monotonic time.
+        """
+        node_key: Tuple[str, int] = HiveNodeManager.get_node_key(node.ip_address, node.port_number)
+        if node.status == 'Dead' or node_key in self.suspects:
+            return
+        self.logger.info("SwimProtocolCommandManager", f"{node.friendly_name} did not answer direct or indirect probes, suspecting it...")
+        self.suspects[node_key] = now + self.get_suspicion_timeout()
+        self.queue_update(node, 'suspect')
+
+    def report_failed_connection(self, node: HiveNode, now: Optional[float] = None) -> None:
+        """
+        Suspects a member a message could not be sent to, leaving it to the suspicion timeout to declare it dead,
+        so a member that is only briefly unreachable can still refute the suspicion.
+
+        Parameters:
+        ----------
+        node : HiveNode
+            The recipient of the failed send.
+        now : Optional[float], optional
+            The monotonic time (default is the current time).
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            member: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(node.ip_address, node.port_number)
+            if member is not None:
+                self.suspect_node(member, now)
+
+    def revive_node(self, node: HiveNode) -> None:
+        """
+        Marks a suspect or dead member that sent a message directly as alive, since it is evidently up. A member
+        declared dead is also sent a suspicion about itself, which it refutes with a higher incarnation that
+        revives it on the other members. Must be called with lock held.
+
+        Parameters:
+        ----------
+        node : HiveNode
+            The member that sent a message.
+        """
+        node_key: Tuple[str, int] = HiveNodeManager.get_node_key(node.ip_address, node.port_number)
+        was_dead: bool = node.status == 'Dead'
+        if not was_dead and node_key not in self.suspects:
+            return
+        self.logger.info("SwimProtocolCommandManager", f"{node.friendly_name} sent a message, it is alive...")
+        self.suspects.pop(node_key, None)
+        node.node_is_alive()
+        if was_dead:
+            self.queue_update(node, 'suspect')
+
+    def get_or_add_node(self, friendly_name: str, ip_address: str, port_number: int, now: float) -> HiveNode:
+        """
+        Returns the member at the address, adding it as alive if it is not known yet. Must be called with lock held.
+        """
+        node: Optional[HiveNode] = self.hive_node_manager.get_node_by_ip_address_and_port(ip_address, port_number)
+        if node is None:
+            self.apply_update({'friendly_name': friendly_name, 'ip_address': ip_address, 'port_number': port_number, 'status': 'alive', 'incarnation': 0}, now)
+            node = self.hive_node_manager.get_node_by_ip_address_and_port(ip_address, port_number)
+        return node
+
+    def get_next_probe_target(self) -> Optional[HiveNode]:
+        """
+        Returns the next member to probe. Members are probed in a random order that is reshuffled after every
+        member has been probed once, which bounds the time until a failed member is probed. Must be called with lock held.
+        """
+        for _ in range(2):
+            while self.probe_order:
+                node: HiveNode = self.probe_order.pop()
+                if node.status == 'Live' and self.hive_node_manager.get_node_by_ip_address_and_port(node.ip_address, node.port_number) is node:
+                    return node
+            self.probe_order = list(self.hive_node_manager.live_nodes)
+            random.shuffle(self.probe_order)
+        return None
+
+    def get_member_updates(self) -> List[Dict]:
+        """
+        Returns an 'alive' update for every live member, including the local node. Must be called with lock held.
+        """
+        nodes: List[HiveNode] = [self.hive_node_manager.local_node] + list(self.hive_node_manager.live_nodes)
+        return [self.build_update(node, 'alive') for node in nodes]
+
+    def build_ping_requests(self, target: HiveNode, sequence_number: int) -> List[SwimMessage]:
+        """
+        Builds the 'ping_req' messages asking random members to probe the target. Must be called with lock held.
+        """
+        helpers: List[HiveNode] = [node for node in self.hive_node_manager.get_random_live_nodes(AppSettings.SWIM_INDIRECT_PROBE_COUNT + 1) if node is not target]
+        target_info: Dict[str, str] = {'friendly_name': target.friendly_name, 'ip_address': target.ip_address, 'port_number': str(target.port_number)}
+        return [self.build_message(helper, 'ping_req', sequence_number, target_info) for helper in helpers[:AppSettings.SWIM_INDIRECT_PROBE_COUNT]]
+
+    def build_message(self, recipient: HiveNode, command: str, sequence_number: int, target: Optional[Dict[str, str]] = None) -> SwimMessage:
+        """
+        Builds a SWIM message carrying the membership updates that have been sent the fewest times so far.
+        Must be called with lock held.
+        """
+        piggybacked: List[Dict] = []
+        for node_key, entry in sorted(self.updates.items(), key=lambda item: -item[1][1])[:AppSettings.SWIM_MAX_PIGGYBACKED_UPDATES]:
+            piggybacked.append(entry[0])
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self.updates[node_key]
+        return SwimMessage(self.hive_node_manager.local_node, recipient, command, sequence_number, piggybacked, target)
+
+    def queue_update(self, node: HiveNode, status: str) -> None:
+        """
+        Queues a membership update to be piggybacked on the next messages, replacing any older update about the member.
+        """
+        node_key: Tuple[str, int] = HiveNodeManager.get_node_key(node.ip_address, node.port_number)
+        member_count: int = len(self.hive_node_manager.hive_nodes)
+        self.updates[node_key] = [self.build_update(node, status), AppSettings.SWIM_DISSEMINATION_MULTIPLIER * math.ceil(math.log10(member_count + 1))]
+
+    @staticmethod
+    def build_update(node: HiveNode, status: str) -> Dict:
+        """
+        Builds a membership update about a member.
+        """
+        return {'friendly_name': node.friendly_name, 'ip_address': node.ip_address, 'port_number': str(node.port_number),
+                'status': status, 'incarnation': node.incarnation}
+
+    def get_suspicion_timeout(self) -> float:
+        """
+        Returns how long a suspect has to refute the suspicion. It grows with the log of the cluster size,
+        since the suspicion takes that long to reach every member.
+        """
+        member_count: int = len(self.hive_node_manager.hive_nodes)
+        return AppSettings.SWIM_SUSPICION_MULTIPLIER * max(1.0, math.log10(member_count + 1)) * AppSettings.SWIM_PROTOCOL_PERIOD_IN_SECONDS
+
+    def send(self, messages: List[SwimMessage]) -> None:
+        """
+        Queues messages for sending.
+        """
+        for message in messages:
+            self.outbound_message_queue.enqueue(HiveMessage(message))
+
+    def enable_swim_protocol(self) -> None:
+        """
+        Enables the SWIM protocol by setting the appropriate flag.
+        """
+        self.logger.debug("SwimProtocolCommandManager", "Enabling SWIM protocol...")
+        SwimProtocolCommandManager.enable = True
+
+    def disable_swim_protocol(self) -> None:
+        """
+        Disables the SWIM protocol by setting the appropriate flag.
+        """
+        self.logger.debug("SwimProtocolCommandManager", "Disabling SWIM protocol...")
+        SwimProtocolCommandManager.enable = False
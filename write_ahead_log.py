@@ -0,0 +1,354 @@
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import BinaryIO, Dict, List
+from logger import Logger
+from app_settings import AppSettings
+
+
+class WriteAheadLog:
+    """
+    WriteAheadLog is a crash-safe, append-only log of keyed records. Each put stores the latest payload for a key
+    and each delete removes it, so the log always describes the set of live records.
+
+    Records are written to numbered segment files in a directory. A segment is sealed and a new one started once
+    it reaches the segment size, and the log is periodically compacted by rewriting only the live records into a
+    fresh segment and deleting the older ones. Appends are group-committed: a background thread writes everything
+    appended so far with a single fsync, and writers that need durability wait for that commit instead of paying
+    for their own fsync; while one group is being fsync'd, the next one collects. Segments are read back through
+    mmap when the log is opened.
+
+    Each record is framed as a 4 byte big-endian length, a 4 byte CRC32 of the body, and the body: a 1 byte
+    operation, a 2 byte key length, the key and the payload. A torn or corrupt record ends the replay of its segment.
+
+    Attributes:
+    ----------
+    logger : Logger
+        An instance of the Logger class for logging messages.
+    directory : str
+        The directory holding the segment files.
+    segment_size : int
+        The size in bytes after which the active segment is sealed.
+    group_commit_interval : float
+        The number of seconds appends nobody waits for are collected before they are committed together,
+        or 0 to write and fsync every append on its own.
+    compaction_interval : float
+        The minimum number of seconds between compactions.
+    live_records : Dict[str, bytes]
+        The latest payload of every live key, in the order the keys were first put.
+    buffer : bytearray
+        Encoded records appended but not yet written to the active segment.
+    appended_sequence : int
+        The sequence number of the latest append.
+    committed_sequence : int
+        The sequence number of the latest append that has been written and fsync'd.
+    waiting_writers : int
+        The number of writers waiting for their records to be committed.
+    condition : threading.Condition
+        Guards the in-memory state and wakes the commit thread and writers waiting for a commit.
+    io_lock : threading.Lock
+        Serialises writes, rotation and compaction of the segment files.
+    last_compaction : float
+        The monotonic time of the latest compaction.
+    closed : bool
+        Whether the log has been closed.
+    segment_numbers : List[int]
+        The numbers of the segment files in the directory, oldest first; the last one is the active segment.
+    active_file : BinaryIO
+        The open active segment new records are written to.
+    """
+
+    RECORD_HEADER_FORMAT: str = '!II'
+    RECORD_HEADER_SIZE: int = struct.calcsize(RECORD_HEADER_FORMAT)
+    KEY_HEADER_FORMAT: str = '!BH'
+    KEY_HEADER_SIZE: int = struct.calcsize(KEY_HEADER_FORMAT)
+    OPERATION_PUT: int = 1
+    OPERATION_DELETE: int = 2
+
+    def __init__(self, directory: str,
+                 segment_size: int = AppSettings.WAL_SEGMENT_SIZE_IN_BYTES,
+                 group_commit_interval: float = AppSettings.WAL_GROUP_COMMIT_INTERVAL_IN_SECONDS,
+                 compaction_interval: float = AppSettings.WAL_COMPACTION_INTERVAL_IN_SECONDS):
+        """
+        Initializes a new instance of WriteAheadLog, replaying any existing segments in the directory.
+
+        Parameters:
+        ----------
+        directory : str
+            The directory holding the segment files, created if it does not exist.
+        segment_size : int, optional
+            The size in bytes after which the active segment is sealed.
+        group_commit_interval : float, optional
+            The number of seconds appends are collected before they are committed together, or 0 to fsync every append.
+        compaction_interval : float, optional
+            The minimum number of seconds between compactions.
+        """
+        self.logger: Logger = Logger()
+        self.directory: str = directory
+        self.segment_size: int = segment_size
+        self.group_commit_interval: float = group_commit_interval
+        self.compaction_interval: float = compaction_interval
+        self.live_records: Dict[str, bytes] = {}
+        self.buffer: bytearray = bytearray()
+        self.appended_sequence: int = 0
+        self.committed_sequence: int = 0
+        self.waiting_writers: int = 0
+        self.condition: threading.Condition = threading.Condition()
+        self.io_lock: threading.Lock = threading.Lock()
+        self.last_compaction: float = time.monotonic()
+        self.closed: bool = False
+
+        os.makedirs(directory, exist_ok=True)
+        self.segment_numbers: List[int] = sorted(
+            int(file_name[len('segment-'):-len('.log')])
+            for file_name in os.listdir(directory)
+            if file_name.startswith('segment-') and file_name.endswith('.log')
+        )
+        valid_size: int = 0
+        for segment_number in self.segment_numbers:
+            valid_size = self._replay_segment(self._segment_path(segment_number))
+
+        is_new_log: bool = not self.segment_numbers
+        if is_new_log:
+            self.segment_numbers.append(1)
+        self.active_file: BinaryIO = open(self._segment_path(self.segment_numbers[-1]), 'ab')
+        if is_new_log:
+            self._sync_directory()
+        # Drop a torn record at the end of the active segment so new records are appended after valid data
+        if self.active_file.tell() > valid_size:
+            self.active_file.truncate(valid_size)
+        self.logger.debug("WriteAheadLog", f"Opened {directory} with {len(self.live_records)} live records in {len(self.segment_numbers)} segments")
+
+        if self.group_commit_interval > 0:
+            threading.Thread(target=self._commit_loop, daemon=True).start()
+
+    def put(self, key: str, payload: bytes, wait_for_commit: bool = False) -> None:
+        """
+        Appends a record storing the payload as the latest value of the key.
+
+        Parameters:
+        ----------
+        key : str
+            The key of the record.
+        payload : bytes
+            The payload of the record.
+        wait_for_commit : bool, optional
+            Whether to wait until the record has been fsync'd (default is False).
+        """
+        self._append(self.OPERATION_PUT, key, payload, wait_for_commit)
+
+    def delete(self, key: str, wait_for_commit: bool = False) -> None:
+        """
+        Appends a record removing the key, if it is live.
+
+        Parameters:
+        ----------
+        key : str
+            The key of the record.
+        wait_for_commit : bool, optional
+            Whether to wait until the record has been fsync'd (default is False).
+        """
+        self._append(self.OPERATION_DELETE, key, b'', wait_for_commit)
+
+    def get_live_records(self) -> Dict[str, bytes]:
+        """
+        Returns a copy of the latest payload of every live key, in the order the keys were first put.
+
+        Returns:
+        -------
+        Dict[str, bytes]
+            The live payloads by key.
+        """
+        with self.condition:
+            return dict(self.live_records)
+
+    def flush(self) -> None:
+        """
+        Writes and fsyncs everything appended so far.
+        """
+        self._commit()
+
+    def close(self) -> None:
+        """
+        Commits everything appended so far, stops the commit thread and closes the active segment.
+        """
+        self._commit()
+        with self.io_lock:
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+            self.active_file.close()
+
+    def _append(self, operation: int, key: str, payload: bytes, wait_for_commit: bool) -> None:
+        """
+        Applies a record to the live records and appends it to the log.
+        """
+        record: bytes = self._encode_record(operation, key, payload)
+        with self.condition:
+            if operation == self.OPERATION_PUT:
+                self.live_records[key] = payload
+            elif self.live_records.pop(key, None) is None:
+                return
+            self.buffer.extend(record)
+            self.appended_sequence += 1
+            sequence: int = self.appended_sequence
+            self.condition.notify_all()
+
+        if self.group_commit_interval <= 0:
+            self._commit()
+            self._compact_if_due()
+        elif wait_for_commit:
+            with self.condition:
+                self.waiting_writers += 1
+                self.condition.notify_all()
+                self.condition.wait_for(lambda: self.committed_sequence >= sequence)
+                self.waiting_writers -= 1
+
+    def _commit_loop(self) -> None:
+        """
+        Commits appended records in groups, rotating and compacting segments as they fill up.
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.buffer or self.closed, self.compaction_interval)
+                if self.closed:
+                    return
+                waiting: bool = self.waiting_writers > 0
+            # Writers waiting for durability are committed at once, and the writers arriving during that fsync
+            # form the next group. Appends nobody waits for are collected for the interval first.
+            if not waiting:
+                time.sleep(self.group_commit_interval)
+            try:
+                self._commit()
+                self._compact_if_due()
+            except OSError as e:
+                self.logger.error("WriteAheadLog", f"Failed to commit {self.directory}: {e}")
+
+    def _commit(self) -> None:
+        """
+        Writes the buffered records to the active segment with a single fsync and wakes the waiting writers.
+        """
+        with self.io_lock:
+            with self.condition:
+                if not self.buffer or self.closed:
+                    return
+                data: bytes = bytes(self.buffer)
+                self.buffer.clear()
+                sequence: int = self.appended_sequence
+
+            self.active_file.write(data)
+            self.active_file.flush()
+            os.fsync(self.active_file.fileno())
+
+            if self.active_file.tell() >= self.segment_size:
+                self._rotate()
+
+        with self.condition:
+            self.committed_sequence = max(self.committed_sequence, sequence)
+            self.condition.notify_all()
+
+    def _rotate(self) -> None:
+        """
+        Seals the active segment and starts a new one. Must be called with io_lock held.
+        """
+        self.active_file.close()
+        self.segment_numbers.append(self.segment_numbers[-1] + 1)
+        self.active_file = open(self._segment_path(self.segment_numbers[-1]), 'ab')
+        # Records committed to the new segment are only durable once its directory entry is
+        self._sync_directory()
+        self.logger.debug("WriteAheadLog", f"Rotated {self.directory} to segment {self.segment_numbers[-1]}")
+
+    def _compact_if_due(self) -> None:
+        """
+        Compacts the log if it has sealed segments and the compaction interval has passed.
+        """
+        if not self.closed and len(self.segment_numbers) > 1 and time.monotonic() - self.last_compaction >= self.compaction_interval:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Rewrites the live records into a new segment and deletes every older segment.
+        """
+        with self.io_lock:
+            with self.condition:
+                # The live records already include everything still buffered, so the buffer is folded in
+                data: bytes = b''.join(self._encode_record(self.OPERATION_PUT, key, payload) for key, payload in self.live_records.items())
+                self.buffer.clear()
+                sequence: int = self.appended_sequence
+
+            old_segment_numbers: List[int] = list(self.segment_numbers)
+            self.active_file.close()
+            self.segment_numbers = [old_segment_numbers[-1] + 1]
+            self.active_file = open(self._segment_path(self.segment_numbers[-1]), 'ab')
+            self.active_file.write(data)
+            self.active_file.flush()
+            os.fsync(self.active_file.fileno())
+            # The new segment must survive a crash before the segments it replaces are deleted
+            self._sync_directory()
+
+            for segment_number in old_segment_numbers:
+                os.remove(self._segment_path(segment_number))
+            self._sync_directory()
+            self.last_compaction = time.monotonic()
+
+        with self.condition:
+            self.committed_sequence = max(self.committed_sequence, sequence)
+            self.condition.notify_all()
+        self.logger.debug("WriteAheadLog", f"Compacted {self.directory}: {len(old_segment_numbers)} segments into 1")
+
+    def _sync_directory(self) -> None:
+        """
+        Fsyncs the log directory, so segment files created or deleted in it survive a crash. Windows cannot open
+        a directory for fsync, and NTFS journals the directory change itself, so this does nothing there.
+        """
+        if os.name == 'nt':
+            return
+        directory_fd: int = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def _replay_segment(self, segment_path: str) -> int:
+        """
+        Applies the records of a segment file to the live records, reading it through mmap.
+        Returns the size of the valid records at the start of the segment.
+        """
+        if os.path.getsize(segment_path) == 0:
+            return 0
+
+        offset: int = 0
+        with open(segment_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while offset + self.RECORD_HEADER_SIZE <= len(data):
+                body_size, checksum = struct.unpack_from(self.RECORD_HEADER_FORMAT, data, offset)
+                body_start: int = offset + self.RECORD_HEADER_SIZE
+                body: bytes = data[body_start:body_start + body_size]
+                if len(body) < body_size or zlib.crc32(body) != checksum:
+                    self.logger.warning("WriteAheadLog", f"Ignoring torn record at offset {offset} of {segment_path}")
+                    break
+
+                operation, key_size = struct.unpack_from(self.KEY_HEADER_FORMAT, body)
+                key: str = body[self.KEY_HEADER_SIZE:self.KEY_HEADER_SIZE + key_size].decode()
+                if operation == self.OPERATION_PUT:
+                    self.live_records[key] = body[self.KEY_HEADER_SIZE + key_size:]
+                else:
+                    self.live_records.pop(key, None)
+                offset = body_start + body_size
+        return offset
+
+    def _encode_record(self, operation: int, key: str, payload: bytes) -> bytes:
+        """
+        Encodes one record in the on-disk format.
+        """
+        encoded_key: bytes = key.encode()
+        body: bytes = struct.pack(self.KEY_HEADER_FORMAT, operation, len(encoded_key)) + encoded_key + payload
+        return struct.pack(self.RECORD_HEADER_FORMAT, len(body), zlib.crc32(body)) + body
+
+    def _segment_path(self, segment_number: int) -> str:
+        """
+        Returns the path of a segment file.
+        """
+        return os.path.join(self.directory, f"segment-{segment_number:08d}.log")